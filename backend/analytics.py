@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Contact analytics: precomputed daily rollups of lead volume
+
+One rollup document per UTC day, in the `contact_rollups` collection:
+
+    {"id": "day:2026-10-19", "bucket": "day", "start": datetime(2026, 10, 19),
+     "total": 12,
+     "by_service": {"AI Solutions": 7, "unspecified": 5},
+     "by_status": {"new": 10, "resolved": 2}}
+
+submit_contact calls record_contact(), one upserted `$inc` per submission.
+Queries read one document per day in the range, so their cost depends on the
+range rather than on the number of contacts. Week and month buckets are
+summed from the daily documents.
+
+Contacts that miss the `$inc` (spooled while MongoDB was down, failed
+increments, imports) are picked up by rebuild_rollups(). It recounts a date
+range from `contacts` with an aggregation pipeline and replaces those
+days' rollups. It only rebuilds days that ended at least SETTLE_TIME ago:
+submissions still `$inc` the open day, and replacing its rollup would lose
+the increments that land between the count and the replace. Run it
+periodically, for example from cron:
+
+    python analytics.py rebuild --days 7
+    python analytics.py report --bucket week --days 90
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+ROLLUP_COLLECTION = "contact_rollups"
+BUCKETS = ("day", "week", "month")
+UNSPECIFIED = "unspecified"
+# How long after midnight (UTC) a day's rollup may be rebuilt: in-flight
+# submissions from just before midnight still $inc it until then
+SETTLE_TIME = timedelta(minutes=5)
+
+
+# ============ KEYS ============
+
+def encode_key(value):
+    """Make a value safe as a field name ('.' and a leading '$' are reserved)"""
+    if value is None or value == "":
+        return UNSPECIFIED
+    value = str(value).replace(".", "．")
+    return "＄" + value[1:] if value.startswith("$") else value
+
+
+def decode_key(key):
+    key = key.replace("．", ".")
+    return "$" + key[1:] if key.startswith("＄") else key
+
+
+def day_start(moment):
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def bucket_start(day, bucket):
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, bucket):
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def rollup_id(day):
+    return f"day:{day:%Y-%m-%d}"
+
+
+# ============ INCREMENTAL UPDATES ============
+
+def contact_increment(contact):
+    """(filter, update) that adds one contact to its day's rollup"""
+    day = day_start(contact["created_at"])
+    return (
+        {"id": rollup_id(day)},
+        {
+            "$inc": {
+                "total": 1,
+                f"by_service.{encode_key(contact.get('service_interest'))}": 1,
+                f"by_status.{encode_key(contact.get('status', 'new'))}": 1,
+            },
+            "$setOnInsert": {"bucket": "day", "start": day},
+        },
+    )
+
+
+def record_contact(rollups, contact):
+    rollup_filter, update = contact_increment(contact)
+    rollups.update_one(rollup_filter, update, upsert=True)
+
+
+def ensure_indexes(rollups):
+    rollups.create_index("id", unique=True)
+    rollups.create_index([("bucket", 1), ("start", 1)])
+
+
+# ============ REBUILD ============
+
+def _count_rows(contacts, start, end, batch_size):
+    """(day, service_interest, status, count) rows for contacts in [start, end)"""
+    match = {"created_at": {"$gte": start, "$lt": end}}
+    if hasattr(contacts, "aggregate"):
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                    "service": "$service_interest",
+                    "status": "$status",
+                },
+                "count": {"$sum": 1},
+            }},
+        ]
+        for row in contacts.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size):
+            group = row["_id"]
+            yield datetime.strptime(group["day"], "%Y-%m-%d"), group.get("service"), group.get("status"), row["count"]
+    else:
+        # In-memory store: no aggregation framework, so count in Python
+        projection = {"created_at": 1, "service_interest": 1, "status": 1}
+        for contact in contacts.find(match, projection).batch_size(batch_size):
+            yield day_start(contact["created_at"]), contact.get("service_interest"), contact.get("status"), 1
+
+
+def fold_rows(rows):
+    """Group count rows into daily rollup documents"""
+    days = {}
+    for day, service, status, count in rows:
+        document = days.get(day)
+        if document is None:
+            document = days[day] = {
+                "id": rollup_id(day), "bucket": "day", "start": day,
+                "total": 0, "by_service": {}, "by_status": {},
+            }
+        document["total"] += count
+        service_key = encode_key(service)
+        status_key = encode_key(status or "new")
+        document["by_service"][service_key] = document["by_service"].get(service_key, 0) + count
+        document["by_status"][status_key] = document["by_status"].get(status_key, 0) + count
+    return days
+
+
+def closed_before(now=None):
+    """Start of the earliest day that may still receive increments"""
+    return day_start((now or datetime.utcnow()) - SETTLE_TIME)
+
+
+def rebuild_rollups(contacts, rollups, start, end, batch_size=1000, now=None):
+    """Recount contacts created in [start, end) and replace those days' rollups
+
+    `end` is capped at closed_before(now); the open day keeps its live rollup.
+    """
+    start, end = day_start(start), min(day_start(end), closed_before(now))
+    if start >= end:
+        return {"days_written": 0, "days_removed": 0, "contacts_counted": 0, "end": end.date().isoformat()}
+    days = fold_rows(_count_rows(contacts, start, end, batch_size))
+    for document in days.values():
+        rollups.replace_one({"id": document["id"]}, document, upsert=True)
+    # Days in range that no longer have any contacts
+    removed = rollups.delete_many({
+        "bucket": "day",
+        "start": {"$gte": start, "$lt": end},
+        "id": {"$nin": [document["id"] for document in days.values()]},
+    }).deleted_count
+    return {"days_written": len(days), "days_removed": removed,
+            "contacts_counted": sum(document["total"] for document in days.values()),
+            "end": end.date().isoformat()}
+
+
+# ============ QUERIES ============
+
+def _add_counts(target, counts):
+    for key, value in (counts or {}).items():
+        key = decode_key(key)
+        target[key] = target.get(key, 0) + value
+
+
+def query_rollups(rollups, bucket="day", start=None, end=None):
+    """Time-bucketed counts for [start, end); every bucket is listed, empty ones as zero"""
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+    end = day_start(end) if end else day_start(datetime.utcnow()) + timedelta(days=1)
+    start = day_start(start) if start else end - timedelta(days=30)
+
+    series = []
+    index = {}
+    cursor = bucket_start(start, bucket)
+    while cursor < end:
+        entry = {"start": cursor.date().isoformat(), "total": 0, "by_service": {}, "by_status": {}}
+        index[cursor] = entry
+        series.append(entry)
+        cursor = next_bucket(cursor, bucket)
+
+    totals = {"total": 0, "by_service": {}, "by_status": {}}
+    documents = rollups.find(
+        {"bucket": "day", "start": {"$gte": start, "$lt": end}},
+        {"_id": 0, "start": 1, "total": 1, "by_service": 1, "by_status": 1},
+    ).sort("start", 1)
+    for document in documents:
+        for target in (index[bucket_start(document["start"], bucket)], totals):
+            target["total"] += document.get("total", 0)
+            _add_counts(target["by_service"], document.get("by_service"))
+            _add_counts(target["by_status"], document.get("by_status"))
+
+    return {
+        "bucket": bucket,
+        "start": start.date().isoformat(),
+        "end": end.date().isoformat(),
+        "buckets": series,
+        "totals": totals,
+    }
+
+
+# ============ CLI ============
+
+def main():
+    parser = argparse.ArgumentParser(description="Contact analytics rollups")
+    parser.add_argument("command", choices=["rebuild", "report"])
+    parser.add_argument("--days", type=int, default=30, help="how many days back from today (default 30)")
+    parser.add_argument("--bucket", choices=BUCKETS, default="day")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import server
+    end = day_start(datetime.utcnow()) + timedelta(days=1)
+    start = end - timedelta(days=args.days)
+
+    if args.command == "rebuild":
+        # Today is skipped: rebuild_rollups stops at the last closed day
+        result = rebuild_rollups(server.db.contacts, server.db[ROLLUP_COLLECTION], start, end, args.batch_size)
+        print(f"Rebuilt {start:%Y-%m-%d}..{result['end']}: {result}")
+    else:
+        report = query_rollups(server.db[ROLLUP_COLLECTION], args.bucket, start, end)
+        for entry in report["buckets"]:
+            print(f"{entry['start']}  {entry['total']:>6}  {entry['by_status']}")
+        print(f"total {report['totals']['total']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Benchmark contact analytics: scanning contacts vs reading the daily rollups
+
+Seeds N synthetic contacts (default 1,000,000) spread over --days days, then
+times the same report (lead volume per day/week/month, per service_interest
+and per status) two ways:
+
+    scan     group every contact in the range (what a report costs without
+             rollups; O(contacts))
+    rollups  analytics.query_rollups over the daily documents (O(days))
+
+With --mongo-url (or --mongod for a throwaway mongod) both run against
+MongoDB: the scan is the aggregation pipeline that `analytics.py rebuild`
+uses. Without MongoDB, the scan is the in-process fold over the generated
+contacts, which is a lower bound because it does no I/O. The rollups are read
+from the in-memory store. The per-submission `$inc` cost is reported as well.
+
+Usage:
+    python bench_analytics.py                         # 1M contacts, in-process
+    python bench_analytics.py --contacts 200000 --days 90
+    python bench_analytics.py --mongod --output analytics.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import analytics  # noqa: E402
+
+SERVICES = ["ICT Solutions", "AI Solutions", "Advertising & Marketing", "Programming & Coding",
+            "Financial Technology", None]
+STATUSES = ["new", "new", "new", "in-progress", "resolved"]
+
+
+def generate_contacts(count, days, seed=42):
+    rng = random.Random(seed)
+    end = analytics.day_start(datetime.utcnow())
+    span = days * 86400
+    for number in range(count):
+        yield {
+            "id": f"bench-{number}",
+            "name": "Bench Contact",
+            "email": f"lead{number}@example.com",
+            "service_interest": rng.choice(SERVICES),
+            "message": "benchmark",
+            "status": rng.choice(STATUSES),
+            "email_sent": True,
+            "created_at": end - timedelta(seconds=rng.randrange(span)),
+        }
+
+
+def timed(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, {"min_ms": round(min(samples), 3), "median_ms": round(statistics.median(samples), 3)}
+
+
+def run_in_process(args):
+    from memory_store import MemoryDatabase
+
+    print(f"Generating {args.contacts:,} contacts over {args.days} days...")
+    contacts = list(generate_contacts(args.contacts, args.days))
+    end = analytics.day_start(datetime.utcnow()) + timedelta(days=1)
+    start = end - timedelta(days=args.days + 1)
+
+    def scan():
+        rows = ((analytics.day_start(c["created_at"]), c["service_interest"], c["status"], 1) for c in contacts)
+        return analytics.fold_rows(rows)
+
+    days, scan_timing = timed(scan, args.repeat)
+    rollups = MemoryDatabase("bench_analytics")[analytics.ROLLUP_COLLECTION]
+    for document in days.values():
+        rollups.insert_one(document)
+
+    results = {"backend": "in-process", "scan": scan_timing}
+    for bucket in analytics.BUCKETS:
+        report, results[f"rollups_{bucket}"] = timed(
+            lambda: analytics.query_rollups(rollups, bucket, start, end), args.repeat)
+    results["rollup_documents"] = len(days)
+    results["total_counted"] = report["totals"]["total"]
+
+    sample = contacts[:1000]
+    _, inc_timing = timed(lambda: [analytics.record_contact(rollups, contact) for contact in sample], 3)
+    results["record_contact_us"] = round(inc_timing["min_ms"] * 1000 / len(sample), 2)
+    return results
+
+
+def run_mongodb(args, mongo_url):
+    import pymongo
+
+    client = pymongo.MongoClient(mongo_url, serverSelectionTimeoutMS=5000)
+    database = client[args.database]
+    database.drop_collection("contacts")
+    database.drop_collection(analytics.ROLLUP_COLLECTION)
+    contacts = database.contacts
+    rollups = database[analytics.ROLLUP_COLLECTION]
+    analytics.ensure_indexes(rollups)
+
+    print(f"Seeding {args.contacts:,} contacts into {args.database}...")
+    batch = []
+    for contact in generate_contacts(args.contacts, args.days):
+        batch.append(contact)
+        if len(batch) == 10000:
+            contacts.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        contacts.insert_many(batch, ordered=False)
+    contacts.create_index("created_at")
+
+    end = analytics.day_start(datetime.utcnow()) + timedelta(days=1)
+    start = end - timedelta(days=args.days + 1)
+    results = {"backend": "mongodb"}
+    rebuild, results["scan"] = timed(
+        lambda: analytics.rebuild_rollups(contacts, rollups, start, end), args.repeat)
+    for bucket in analytics.BUCKETS:
+        report, results[f"rollups_{bucket}"] = timed(
+            lambda: analytics.query_rollups(rollups, bucket, start, end), args.repeat)
+    results["rollup_documents"] = rebuild["days_written"]
+    results["total_counted"] = report["totals"]["total"]
+
+    sample = list(generate_contacts(1000, args.days, seed=7))
+    _, inc_timing = timed(lambda: [analytics.record_contact(rollups, contact) for contact in sample], 3)
+    results["record_contact_us"] = round(inc_timing["min_ms"] * 1000 / len(sample), 2)
+
+    if not args.keep:
+        client.drop_database(args.database)
+    client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark contact analytics rollups")
+    parser.add_argument("--contacts", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mongo-url", help="run against this MongoDB instead of in-process")
+    parser.add_argument("--mongod", action="store_true", help="start a throwaway mongod (needs mongod on PATH)")
+    parser.add_argument("--database", default="aximoix_bench_analytics")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded database")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    mongod = None
+    mongo_url = args.mongo_url
+    if args.mongod:
+        from load_test import start_mongod, stop_process
+        mongod, mongo_url, _ = start_mongod()
+    try:
+        results = run_mongodb(args, mongo_url) if mongo_url else run_in_process(args)
+    finally:
+        if mongod:
+            stop_process(mongod)
+
+    results.update({"contacts": args.contacts, "days": args.days})
+    scan_ms = results["scan"]["min_ms"]
+    print(f"\n{args.contacts:,} contacts over {args.days} days ({results['backend']})")
+    print(f"  scan all contacts      {scan_ms:>10.1f} ms")
+    for bucket in analytics.BUCKETS:
+        rollup_ms = results[f"rollups_{bucket}"]["min_ms"]
+        print(f"  rollups by {bucket:<6}      {rollup_ms:>10.2f} ms   ({scan_ms / rollup_ms:,.0f}x faster)")
+    print(f"  $inc per submission    {results['record_contact_us']:>10.1f} us")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
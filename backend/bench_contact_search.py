@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark admin contact search: indexed queries vs regex scans
+
+Seeds N synthetic contacts (default 1,000,000) into MongoDB and times each
+query two ways:
+
+    indexed  contact_search.search_contacts(): $text on the contacts_text
+             index, or a regex on the email_lower index keys
+    regex    case-insensitive $regex over name / message / email, which is
+             what searching contacts costs without those indexes
+
+Both fetch the first page (20 rows, the regex one newest first) and count
+all matches. explain() supplies the keys and documents each query examined.
+The query set covers rare and common names, message words, an email domain
+and an address prefix, plus a status filter. Index build time and index sizes
+are reported too.
+
+Check: an address-prefix query is an anchored regex, so it must examine at
+most one index key more than it matches. The benchmark exits with status 1 if
+one scans the index instead. Domain queries ("@...") scan every key by
+design and are only reported.
+
+The comparison is about MongoDB's indexes, so it needs a MongoDB: --mongo-url,
+or --mongod for a throwaway one (needs mongod on PATH or MONGOD_BIN).
+
+Usage:
+    python bench_contact_search.py --mongod
+    python bench_contact_search.py --mongo-url mongodb://localhost:27017 --contacts 200000
+    python bench_contact_search.py --mongod --output contact-search.json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import contact_export  # noqa: E402
+import contact_search  # noqa: E402
+
+FIRST_NAMES = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David",
+               "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah",
+               "Amara", "Chen", "Fatima", "Hiroshi", "Ingrid", "Kwame", "Lucia", "Mateo", "Priya", "Yusuf"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+              "Martinez", "Hernandez", "Lopez", "Wilson", "Anderson", "Taylor", "Moore", "Jackson", "Martin",
+              "Nakamura", "Mensah", "Rossi", "Schmidt", "Kowalski", "Haddad", "Silva", "Novak", "Patel"]
+RARE_LAST_NAME = "Okonkwo"   # about 1 contact in 20,000
+DOMAINS = ["gmail.com", "outlook.com", "yahoo.com", "icloud.com", "proton.me", "acme.com", "initech.com",
+           "umbrella.co", "hooli.io", "stark.industries", "wayne.enterprises", "piedpiper.com"]
+RARE_DOMAIN = "globex.io"    # about 1 contact in 1,000
+SERVICES = ["ICT Solutions", "AI Solutions", "Advertising & Marketing", "Programming & Coding",
+            "Financial Technology", None]
+STATUSES = ["new", "new", "new", "in-progress", "resolved"]
+OPENERS = ["Hello, we are looking for help with", "Hi team, I would like a quote for",
+           "Good morning. Our company needs support on", "We are interested in",
+           "Could you tell us more about"]
+TOPICS = ["a new website", "our online shop", "search engine optimisation", "a mobile app",
+          "cloud hosting", "a social media campaign", "network security", "data analytics dashboards",
+          "an accounting integration", "payment processing", "a customer portal", "IT support contracts"]
+RARE_TOPIC = "a Kubernetes migration"   # about 1 message in 500
+CLOSERS = ["Please call me back.", "What would the timeline be?", "Budget is flexible.",
+           "We would like to start next month.", "Thanks in advance.", ""]
+
+QUERIES = [
+    # (label, query, mode, filters)
+    ("rare name", "okonkwo", "text", {}),
+    ("common name", "smith", "text", {}),
+    ("message words", "kubernetes migration", "text", {}),
+    ("words + status", "kubernetes", "text", {"status": "in-progress"}),
+    ("email domain", "@" + RARE_DOMAIN, "email", {}),
+    ("email prefix", "amara.okonkwo", "email", {}),
+]
+
+
+def generate_contacts(count, days=365, seed=42):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    span = days * 86400
+    for number in range(count):
+        first = rng.choice(FIRST_NAMES)
+        last = RARE_LAST_NAME if rng.random() < 1 / 20000 else rng.choice(LAST_NAMES)
+        domain = RARE_DOMAIN if rng.random() < 1 / 1000 else rng.choice(DOMAINS)
+        local = f"{first}.{last}{number % 1000}"
+        email = f"{local if rng.random() < 0.3 else local.lower()}@{domain}"
+        topic = RARE_TOPIC if rng.random() < 1 / 500 else rng.choice(TOPICS)
+        yield {
+            "id": f"bench-{number}",
+            "name": f"{first} {last}",
+            "email": email,
+            "email_lower": contact_search.normalize_email(email),
+            "service_interest": rng.choice(SERVICES),
+            "message": f"{rng.choice(OPENERS)} {topic}. {rng.choice(CLOSERS)}".strip(),
+            "status": rng.choice(STATUSES),
+            "email_sent": True,
+            "created_at": now - timedelta(seconds=rng.randrange(span)),
+        }
+
+
+def regex_filter(query, filters):
+    """The unindexed search: any query word, case-insensitively, anywhere in name, message or email"""
+    pattern = "|".join(re.escape(word) for word in query.split())
+    regex = {"$regex": pattern, "$options": "i"}
+    return {"$or": [{"name": regex}, {"message": regex}, {"email": regex}], **filters}
+
+
+def timed(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, {"min_ms": round(min(samples), 3), "median_ms": round(statistics.median(samples), 3)}
+
+
+def examined(cursor):
+    stats = cursor.explain().get("executionStats", {})
+    return {"keys": stats.get("totalKeysExamined"), "documents": stats.get("totalDocsExamined")}
+
+
+def prefix_scans(rows):
+    """Address-prefix queries that examined more index keys than a bounded range would"""
+    return [row for row in rows if row["mode"] == "email" and not row["query"].startswith("@")
+            and (row["indexed_examined"]["keys"] or 0) > row["indexed_matches"] + 1]
+
+
+def seed(contacts, count, batch_size=10000):
+    batch = []
+    for contact in generate_contacts(count):
+        batch.append(contact)
+        if len(batch) == batch_size:
+            contacts.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        contacts.insert_many(batch, ordered=False)
+
+
+def run(args, mongo_url):
+    import pymongo
+
+    client = pymongo.MongoClient(mongo_url, serverSelectionTimeoutMS=5000)
+    database = client[args.database]
+    database.drop_collection("contacts")
+    contacts = database.contacts
+
+    print(f"Seeding {args.contacts:,} contacts into {args.database}...")
+    started = time.perf_counter()
+    seed(contacts, args.contacts)
+    results = {"seed_s": round(time.perf_counter() - started, 1)}
+
+    # The export index serves the regex side's newest-first sort
+    contact_export.ensure_indexes(contacts)
+    started = time.perf_counter()
+    contact_search.ensure_indexes(contacts)
+    results["index_build_s"] = round(time.perf_counter() - started, 1)
+    try:
+        sizes = database.command("collStats", "contacts")["indexSizes"]
+        results["index_mb"] = {name: round(size / 1e6, 1) for name, size in sizes.items()}
+    except pymongo.errors.PyMongoError:
+        pass
+
+    results["queries"] = []
+    for label, query, mode, filters in QUERIES:
+        page, indexed_page = timed(lambda: contact_search.search_contacts(
+            contacts, query, mode, page_size=args.page_size, **filters), args.repeat)
+        indexed_filter = contact_search.build_filter(query, mode, **filters)
+        indexed_matches, indexed_count = timed(lambda: contacts.count_documents(indexed_filter), args.repeat)
+
+        scan_filter = regex_filter(query, filters)
+        scan_cursor = lambda: contacts.find(scan_filter, {"_id": 0}).sort("created_at", -1).limit(args.page_size)  # noqa: E731
+        _, regex_page = timed(lambda: list(scan_cursor()), args.repeat)
+        matches, regex_count = timed(lambda: contacts.count_documents(scan_filter), args.repeat)
+
+        results["queries"].append({
+            "label": label, "query": query, "mode": mode, "filters": filters,
+            "matches": matches, "indexed_matches": indexed_matches,
+            "indexed_page": indexed_page, "indexed_count": indexed_count,
+            "indexed_examined": examined(contacts.find(indexed_filter)),
+            "regex_page": regex_page, "regex_count": regex_count,
+            "regex_examined": examined(contacts.find(scan_filter)),
+            "first_page_rows": len(page["results"]),
+        })
+
+    if not args.keep:
+        client.drop_database(args.database)
+    client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark admin contact search against regex scans")
+    parser.add_argument("--contacts", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=contact_search.DEFAULT_PAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL"), help="MongoDB to seed and query")
+    parser.add_argument("--mongod", action="store_true", help="start a throwaway mongod (needs mongod on PATH)")
+    parser.add_argument("--database", default="aximoix_bench_contact_search")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded database")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    mongod = None
+    mongo_url = args.mongo_url
+    if args.mongod:
+        from load_test import start_mongod, stop_process
+        mongod, mongo_url, _ = start_mongod()
+    if not mongo_url:
+        sys.exit("Needs MongoDB: pass --mongo-url (or set MONGO_URL) or --mongod")
+    try:
+        results = run(args, mongo_url)
+    finally:
+        if mongod:
+            stop_process(mongod)
+
+    results["contacts"] = args.contacts
+    print(f"\n{args.contacts:,} contacts: seeded in {results['seed_s']} s, "
+          f"search indexes built in {results['index_build_s']} s")
+    for name, size in results.get("index_mb", {}).items():
+        print(f"  index {name:<28} {size:>8.1f} MB")
+    print(f"\n  {'query':<16} {'matches':>8}  {'indexed page':>12} {'count':>9}  {'regex page':>10} {'count':>9}"
+          f"  {'docs examined (indexed / regex)':>32}")
+    for row in results["queries"]:
+        docs = f"{row['indexed_examined']['documents']:,} / {row['regex_examined']['documents']:,}"
+        print(f"  {row['label']:<16} {row['matches']:>8,}  {row['indexed_page']['min_ms']:>9.1f} ms"
+              f" {row['indexed_count']['min_ms']:>6.1f} ms  {row['regex_page']['min_ms']:>7.1f} ms"
+              f" {row['regex_count']['min_ms']:>6.1f} ms  {docs:>32}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2, default=str)
+        print(f"\nWrote {args.output}")
+
+    scans = prefix_scans(results["queries"])
+    for row in scans:
+        print(f"❌ {row['label']} ({row['query']!r}) examined {row['indexed_examined']['keys']:,} index keys "
+              f"for {row['indexed_matches']:,} match(es); the email_lower regex is not anchored")
+    if scans:
+        sys.exit(1)
+    print("✅ Address-prefix queries read a bounded range of email_lower keys")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+In-process micro-benchmarks for the backend hot paths
+
+Times the CPU-bound pieces of server.py (document conversion, static catalogue
+lookups, email template build, Pydantic validation, response serialization) and the main routes via
+fastapi.testclient with STORAGE_BACKEND=memory (the in-memory document
+store, seeded with the static catalogue), so no MongoDB or network is
+involved.
+
+Baselines are stored as JSON on the machine that recorded them (git-ignored:
+timings don't transfer between machines); a comparison run fails (exit code
+1) when any benchmark's best-of-N time is slower than its baseline by more
+than the threshold. Best-of-N (timeit's recommendation) is far less sensitive to
+noisy neighbours than the median, which is reported for information.
+
+Usage:
+    python bench_hotpaths.py                      # run and print results
+    python bench_hotpaths.py --save               # run and store as baseline
+    python bench_hotpaths.py --compare            # fail on >25% regressions
+    python bench_hotpaths.py --compare --threshold 0.10 --filter route_
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BACKEND_DIR / ".benchmarks" / "hotpaths.json"
+
+# Keep the server on the in-memory store and away from real services
+os.environ.pop("RESEND_API_KEY", None)
+os.environ["STORAGE_BACKEND"] = "memory"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+import models  # noqa: E402
+import profiler  # noqa: E402
+from bson import ObjectId  # noqa: E402
+from catalogue_cache import render_json  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+def silence_server_logs():
+    """Drop server.py's per-request prints so they don't dominate the timings"""
+    server.print = lambda *args, **kwargs: None
+
+
+# ============ BENCHMARKS ============
+
+CONTACT_DATA = {
+    "name": "Jane Doe",
+    "email": "jane@example.com",
+    "service_interest": "AI Solutions",
+    "message": "We would like to automate our onboarding workflow. " * 8,
+}
+
+
+def build_benchmarks(client):
+    services_documents = [
+        dict(service, _id=ObjectId(), created_at=datetime.utcnow(), updated_at=datetime.utcnow())
+        for service in server.get_static_services()
+    ]
+    service_payload = dict(server.get_static_services()[0])
+    company_payload = {
+        "name": "AximoIX", "motto": "m", "tagline": "t", "description": "d",
+        "about": {"goal": "g", "vision": "v", "mission": "m"},
+        "contact": {"email": "hello@aximoix.com", "phone": "p", "address": "a", "social_media": {}},
+    }
+
+    sampler = profiler.SamplingProfiler()
+
+    return {
+        "convert_objectid_services": lambda: server.convert_objectid(services_documents),
+        "convert_objectid_single": lambda: server.convert_objectid(services_documents[0]),
+        "get_static_services": server.get_static_services,
+        "get_static_service_by_id": lambda: server.get_static_service_by_id("5"),
+        "build_contact_email": lambda: server.build_contact_email(CONTACT_DATA),
+        "validate_contact_submission_create": lambda: models.ContactSubmissionCreate.model_validate(CONTACT_DATA),
+        "validate_service_model": lambda: models.Service.model_validate(service_payload),
+        "validate_company_model": lambda: models.CompanyInfo.model_validate(company_payload),
+        # Validate + encode the catalogue: the untyped dict path the routes used
+        # before response models, FastAPI's response_model path (validate, dump to
+        # Python, jsonable_encoder, json.dumps) and the compiled TypeAdapter path
+        # server.py uses
+        "serialize_services_dict": lambda: render_json(server.convert_objectid(services_documents)),
+        "serialize_services_response_model": lambda: render_json(models.service_list_adapter.dump_python(
+            models.service_list_adapter.validate_python(server.convert_objectid(services_documents)),
+            mode="json", exclude_unset=True)),
+        "serialize_services_type_adapter": lambda: server.render_model(models.service_list_adapter, services_documents),
+        "search_services_index": lambda: server.service_index.search("cloud migration blockch"),
+        # One stack walk of every thread: the per-sample cost of a running profile
+        "profiler_sample": sampler._sample,
+        "route_get_services": lambda: client.get("/api/services"),
+        "route_get_service_by_id": lambda: client.get("/api/services/3"),
+        "route_get_company": lambda: client.get("/api/company"),
+        "route_search_services": lambda: client.get("/api/services/search", params={"q": "cloud migration"}),
+        "route_post_contact": lambda: client.post("/api/contact", json=CONTACT_DATA),
+    }
+
+
+def measure(func, repeat=7, min_time=0.2):
+    """Per-call seconds for each of `repeat` runs, auto-sizing loops to ~min_time"""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    runs = timer.repeat(repeat=repeat, number=number)
+    return [run / number for run in runs], number
+
+
+def run_benchmarks(name_filter=None, repeat=7):
+    silence_server_logs()
+    client = TestClient(server.app)
+    server.refresh_service_index()
+    results = {}
+    for name, func in build_benchmarks(client).items():
+        if name_filter and name_filter not in name:
+            continue
+        samples, loops = measure(func, repeat=repeat)
+        results[name] = {
+            "median_us": round(statistics.median(samples) * 1e6, 3),
+            "min_us": round(min(samples) * 1e6, 3),
+            "stdev_us": round(statistics.pstdev(samples) * 1e6, 3),
+            "loops": loops,
+            "repeat": repeat,
+        }
+        print(f"  {name:<38} median {results[name]['median_us']:>12.3f} µs   min {results[name]['min_us']:>12.3f} µs")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (name, baseline_us, current_us, ratio) regressions"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous:
+            continue
+        ratio = current["min_us"] / previous["min_us"]
+        marker = "❌" if ratio > 1 + threshold else "✅"
+        print(f"  {marker} {name:<38} {previous['min_us']:>12.3f} -> {current['min_us']:>12.3f} µs ({ratio - 1:+.1%})")
+        if ratio > 1 + threshold:
+            regressions.append((name, previous["min_us"], current["min_us"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for backend hot paths")
+    parser.add_argument("--save", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="fail on regressions against the baseline")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    print("⏱️  Running hot-path benchmarks")
+    results = run_benchmarks(args.filter, args.repeat)
+
+    exit_code = 0
+    if args.compare:
+        if not args.baseline.exists():
+            print(f"⚠️ No baseline at {args.baseline} - run with --save first")
+            return 1
+        baseline = json.loads(args.baseline.read_text())
+        print(f"\n📊 Comparing against {args.baseline} (threshold {args.threshold:.0%})")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark(s) regressed beyond {args.threshold:.0%}")
+            exit_code = 1
+        else:
+            print("\n✅ No regressions")
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "benchmarks": results,
+        }, indent=2))
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark contact notification sends: blocking SDK vs pooled async transport
+
+Starts fake_resend.py locally (with per-connection and per-request latency)
+and sends --messages notifications four ways:
+
+    sdk          resend.Emails.send, one after another. This was the request
+                 path before the async transport. The SDK opens a new
+                 connection for every message.
+    http-serial  ResendHttpTransport, one after another. Isolates the gain
+                 from keep-alive connection reuse.
+    http-pooled  ResendHttpTransport with --concurrency sends in flight over
+                 the pooled connections.
+    http-batch   BatchMailer over the same transport: up to 100 emails per
+                 batch API call.
+
+Reports sends/sec and how many TCP connections the fake API accepted.
+
+Usage:
+    python bench_mail.py
+    python bench_mail.py --messages 500 --concurrency 20 --latency-ms 40 --connect-latency-ms 80
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mail_batcher import BatchMailer  # noqa: E402
+from mail_transport import ResendHttpTransport  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake(port, latency_ms, connect_latency_ms):
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_resend.py"),
+         "--port", str(port), "--latency-ms", str(latency_ms), "--connect-latency-ms", str(connect_latency_ms)],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("fake Resend API did not start")
+
+
+def fake_stats(base_url, reset=False):
+    request = urllib.request.Request(base_url + "/stats", method="POST" if reset else "GET")
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def message(number):
+    return {
+        "from": "AximoIX <onboarding@resend.dev>",
+        "to": ["team@example.com"],
+        "subject": f"New contact #{number}",
+        "html": "<p>benchmark</p>",
+    }
+
+
+def run_sdk(base_url, count):
+    import resend
+
+    resend.api_key = "bench"
+    resend.api_url = base_url
+    for number in range(count):
+        resend.Emails.send(message(number))
+
+
+async def run_http(base_url, count, concurrency):
+    transport = ResendHttpTransport("bench", base_url=base_url, max_connections=concurrency,
+                                    max_keepalive_connections=concurrency, concurrency=concurrency)
+    try:
+        await asyncio.gather(*(transport.send(message(number)) for number in range(count)))
+    finally:
+        await transport.aclose()
+
+
+async def run_batched(base_url, count, concurrency):
+    transport = ResendHttpTransport("bench", base_url=base_url, max_connections=concurrency,
+                                    max_keepalive_connections=concurrency, concurrency=concurrency)
+    mailer = BatchMailer(transport, flush_interval=0.05)
+    try:
+        futures = [mailer.enqueue(f"bench-{number}", message(number)) for number in range(count)]
+        await mailer.flush()
+        results = await asyncio.gather(*futures)
+        assert all("id" in result for result in results), "batch send failed"
+    finally:
+        await transport.aclose()
+
+
+def measure(name, base_url, count, func):
+    fake_stats(base_url, reset=True)
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    stats = fake_stats(base_url)
+    return {
+        "mode": name,
+        "messages": count,
+        "seconds": round(elapsed, 3),
+        "sends_per_sec": round(count / elapsed, 1),
+        # Minus the connection that fetched these stats
+        "connections": stats["connections"] - 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mail transports against a fake Resend API")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=30, help="per-request latency of the fake API")
+    parser.add_argument("--connect-latency-ms", type=float, default=60, help="per-connection handshake cost")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    fake = start_fake(port, args.latency_ms, args.connect_latency_ms)
+    try:
+        results = [
+            measure("sdk", base_url, args.messages, lambda: run_sdk(base_url, args.messages)),
+            measure("http-serial", base_url, args.messages,
+                    lambda: asyncio.run(run_http(base_url, args.messages, 1))),
+            measure(f"http-pooled (x{args.concurrency})", base_url, args.messages,
+                    lambda: asyncio.run(run_http(base_url, args.messages, args.concurrency))),
+            measure("http-batch", base_url, args.messages,
+                    lambda: asyncio.run(run_batched(base_url, args.messages, args.concurrency))),
+        ]
+    finally:
+        fake.terminate()
+        fake.wait()
+
+    print(f"\n{args.messages} messages, {args.latency_ms:g} ms per request, "
+          f"{args.connect_latency_ms:g} ms per new connection")
+    baseline = results[0]["sends_per_sec"]
+    for result in results:
+        print(f"  {result['mode']:<22} {result['sends_per_sec']:>8.1f} sends/s   "
+              f"{result['connections']:>4} connection(s)   {result['sends_per_sec'] / baseline:>5.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
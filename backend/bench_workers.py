@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Requests-per-second vs worker count benchmark for the production profile
+
+Starts `serve.py` once per worker count, waits for /api/ping, then drives a
+fixed number of keep-alive connections against one endpoint for a fixed
+duration and reports throughput. Results are printed as a table and JSON.
+
+Usage:
+    python bench_workers.py --workers 1 2 4 --connections 64 --duration 15
+    python bench_workers.py --path /api/company --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from load_test import HttpConnection, wait_until_ready
+
+BACKEND_DIR = Path(__file__).parent
+
+
+async def _connection_loop(host, port, path, stop_at, totals):
+    """Send GET requests back-to-back on one keep-alive connection"""
+    connection = HttpConnection(host, port)
+    loop = asyncio.get_running_loop()
+    try:
+        while loop.time() < stop_at:
+            status, _ = await connection.request("GET", path)
+            totals["ok" if status < 400 else "errors"] += 1
+    except (ConnectionError, asyncio.IncompleteReadError):
+        totals["errors"] += 1
+    finally:
+        connection.close()
+
+
+async def drive_load(host, port, path, connections, duration):
+    totals = {"ok": 0, "errors": 0}
+    stop_at = asyncio.get_running_loop().time() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _connection_loop(host, port, path, stop_at, totals) for _ in range(connections)
+    ])
+    elapsed = time.perf_counter() - started
+    totals["elapsed_s"] = round(elapsed, 3)
+    totals["rps"] = round(totals["ok"] / elapsed, 1)
+    return totals
+
+
+def run_one(workers, port, path, connections, duration):
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), HOST="127.0.0.1")
+    process = subprocess.Popen(
+        [sys.executable, "serve.py"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        if not wait_until_ready(base_url):
+            raise RuntimeError(f"server with {workers} worker(s) did not become ready")
+        # Warm every worker before measuring
+        asyncio.run(drive_load("127.0.0.1", port, path, connections, 2))
+        return asyncio.run(drive_load("127.0.0.1", port, path, connections, duration))
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=40)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark requests/second against worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--path", default="/api/services")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for workers in args.workers:
+        print(f"⏱️  {workers} worker(s): {args.connections} connections x {args.duration}s on {args.path}")
+        totals = run_one(workers, args.port, args.path, args.connections, args.duration)
+        totals["workers"] = workers
+        results.append(totals)
+        print(f"   {totals['rps']} req/s ({totals['ok']} ok, {totals['errors']} errors)")
+
+    print(f"\n{'workers':>8} {'req/s':>10} {'errors':>8}")
+    for row in results:
+        print(f"{row['workers']:>8} {row['rps']:>10} {row['errors']:>8}")
+
+    report = {
+        "path": args.path,
+        "connections": args.connections,
+        "duration_s": args.duration,
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Benchmark contact submit latency per write-concern tier
+
+Replays the database writes of POST /api/contact (see durability.py and
+submit_contact in server.py) --submits times per configuration, and reports
+p50/p99/mean latency and submits/sec:
+
+    majority           insert, rollup and email_sent update all at
+                       w: "majority" (the behaviour before the tiers)
+    fast               insert and rollup at w: 1, j: true; email_sent update
+                       at majority (the default)
+    combined           one insert at w: 1, j: true with email_sent already
+                       set, plus the rollup (CONTACT_WRITE_MODE=combined)
+    combined-majority  the same single insert at w: "majority"
+
+The notification itself is simulated by --mail-ms of sleep (0 by default, so
+the numbers are the database's share of a submit).
+
+Write concerns only differ on a replica set: --replset starts a throwaway
+three-member set on this machine (needs mongod on PATH or MONGOD_BIN), or
+point --mongo-url at one. Members on one machine replicate over loopback, so
+"majority" costs far less than across availability zones; run against the
+production topology for real numbers.
+
+Usage:
+    python bench_write_concern.py --replset
+    python bench_write_concern.py --replset --submits 5000 --concurrency 8
+    python bench_write_concern.py --mongo-url "mongodb://h1,h2,h3/?replicaSet=rs0" --output write-concern.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pymongo  # noqa: E402
+
+import analytics  # noqa: E402
+import durability  # noqa: E402
+from load_test import free_port, percentile, stop_process  # noqa: E402
+
+REPLSET = "aximoix-bench"
+# name -> (insert tier, status tier, write mode)
+CONFIGS = {
+    "majority": ("majority", "majority", "separate"),
+    "fast": ("fast", "majority", "separate"),
+    "combined": ("fast", None, "combined"),
+    "combined-majority": ("majority", None, "combined"),
+}
+
+
+def start_replica_set(members=3):
+    """Start `members` mongods as one replica set; returns (processes, url, dbpaths)"""
+    binary = os.getenv("MONGOD_BIN") or shutil.which("mongod")
+    if not binary:
+        raise RuntimeError("mongod not found - install MongoDB or set MONGOD_BIN")
+    ports = [free_port() for _ in range(members)]
+    dbpaths = [tempfile.mkdtemp(prefix="aximoix-replset-") for _ in ports]
+    processes = [
+        subprocess.Popen(
+            [binary, "--replSet", REPLSET, "--dbpath", dbpath, "--port", str(port),
+             "--bind_ip", "127.0.0.1", "--quiet"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        for port, dbpath in zip(ports, dbpaths)
+    ]
+    try:
+        deadline = time.monotonic() + 30
+        for port in ports:
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError("mongod did not start within 30s")
+                    time.sleep(0.25)
+        with pymongo.MongoClient(f"mongodb://127.0.0.1:{ports[0]}", directConnection=True) as seed:
+            seed.admin.command("replSetInitiate", {
+                "_id": REPLSET,
+                "members": [{"_id": index, "host": f"127.0.0.1:{port}"} for index, port in enumerate(ports)],
+            })
+        url = f"mongodb://{','.join(f'127.0.0.1:{port}' for port in ports)}/?replicaSet={REPLSET}"
+        # Wait for an election and for every member to be a healthy primary/secondary
+        deadline = time.monotonic() + 60
+        with pymongo.MongoClient(url, serverSelectionTimeoutMS=60000) as client:
+            while True:
+                states = [member["stateStr"] for member in client.admin.command("replSetGetStatus")["members"]]
+                if states.count("PRIMARY") == 1 and states.count("SECONDARY") == members - 1:
+                    break
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"replica set did not come up within 60s: {states}")
+                time.sleep(0.5)
+    except Exception:
+        for process in processes:
+            stop_process(process)
+        raise
+    return processes, url, dbpaths
+
+
+def contact():
+    return {
+        "id": str(uuid.uuid4()),
+        "name": "Write Concern Bench",
+        "email": "bench@example.com",
+        "email_lower": "bench@example.com",
+        "service_interest": "ICT Solutions",
+        "message": "Hello, we would like a quote for cloud hosting and network security. " * 3,
+        "created_at": datetime.utcnow(),
+        "status": "new",
+        "email_sent": False,
+    }
+
+
+def submit(contacts, rollups, config, mail_seconds):
+    """The writes of one POST /api/contact under `config`; seconds taken"""
+    insert_tier, status_tier, mode = config
+    contacts_insert = durability.with_tier(contacts, insert_tier)
+    rollups_insert = durability.with_tier(rollups, insert_tier)
+    document = contact()
+    started = time.perf_counter()
+    if mode == "combined":
+        time.sleep(mail_seconds)
+        document["email_sent"] = True
+        contacts_insert.insert_one(document)
+        analytics.record_contact(rollups_insert, document)
+    else:
+        contacts_insert.insert_one(document)
+        analytics.record_contact(rollups_insert, document)
+        time.sleep(mail_seconds)
+        durability.with_tier(contacts, status_tier).update_one(
+            {"id": document["id"]}, {"$set": {"email_sent": True}}
+        )
+    return time.perf_counter() - started
+
+
+def run_config(contacts, rollups, config, submits, concurrency, mail_seconds):
+    def worker(count):
+        return [submit(contacts, rollups, config, mail_seconds) for _ in range(count)]
+
+    per_worker = [submits // concurrency + (1 if index < submits % concurrency else 0) for index in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(latency for batch in pool.map(worker, per_worker) for latency in batch)
+    elapsed = time.perf_counter() - started
+    to_ms = lambda value: round(value * 1000, 2)
+    return {
+        "submits": len(latencies),
+        "p50_ms": to_ms(percentile(latencies, 0.50)),
+        "p99_ms": to_ms(percentile(latencies, 0.99)),
+        "mean_ms": to_ms(sum(latencies) / len(latencies)),
+        "max_ms": to_ms(latencies[-1]),
+        "submits_per_sec": round(len(latencies) / elapsed, 1),
+    }
+
+
+def run(args, mongo_url):
+    client = pymongo.MongoClient(mongo_url, w="majority", retryWrites=True)
+    database = client[args.database]
+    contacts = database.contacts
+    rollups = database[analytics.ROLLUP_COLLECTION]
+    contacts.create_index("id", unique=True)
+    analytics.ensure_indexes(rollups)
+    hello = client.admin.command("hello")
+    results = {"replica_set": hello.get("setName"), "members": len(hello.get("hosts", [])), "configs": {}}
+    if not hello.get("setName"):
+        print("⚠️ Not a replica set: every tier acknowledges after one member, so they will look alike")
+    try:
+        for name in args.configs:
+            config = CONFIGS[name]
+            run_config(contacts, rollups, config, min(50, args.submits), 1, 0)  # warm-up
+            results["configs"][name] = run_config(
+                contacts, rollups, config, args.submits, args.concurrency, args.mail_ms / 1000
+            )
+            print(f"  {name:<18} {results['configs'][name]}")
+    finally:
+        if not args.keep:
+            client.drop_database(args.database)
+        client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark contact submit latency per write-concern tier")
+    parser.add_argument("--submits", type=int, default=2000, help="submits per configuration")
+    parser.add_argument("--concurrency", type=int, default=1, help="submitting threads")
+    parser.add_argument("--mail-ms", type=float, default=0, help="simulated notification latency")
+    parser.add_argument("--config", dest="configs", action="append", choices=list(CONFIGS),
+                        help="configuration to run (repeatable; default all)")
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL"), help="a replica set to write to")
+    parser.add_argument("--replset", action="store_true",
+                        help="start a throwaway 3-member replica set (needs mongod on PATH)")
+    parser.add_argument("--database", default="aximoix_bench_write_concern")
+    parser.add_argument("--keep", action="store_true", help="keep the written database")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+    args.configs = args.configs or list(CONFIGS)
+    args.submits = max(1, args.submits)
+    args.concurrency = max(1, args.concurrency)
+
+    processes = []
+    mongo_url = args.mongo_url
+    if args.replset:
+        processes, mongo_url, _ = start_replica_set()
+    if not mongo_url:
+        sys.exit("Needs a MongoDB replica set: pass --mongo-url (or set MONGO_URL) or --replset")
+    try:
+        print(f"{args.submits} submits per configuration, {args.concurrency} thread(s), mail {args.mail_ms:g} ms")
+        results = run(args, mongo_url)
+    finally:
+        for process in processes:
+            stop_process(process)
+
+    results.update(submits=args.submits, concurrency=args.concurrency, mail_ms=args.mail_ms)
+    print(f"\nReplica set {results['replica_set'] or '(none)'} with {results['members']} member(s):")
+    print(f"  {'configuration':<18} {'p50':>9} {'p99':>9} {'mean':>9} {'submits/s':>10}")
+    for name, row in results["configs"].items():
+        print(f"  {name:<18} {row['p50_ms']:>6.2f} ms {row['p99_ms']:>6.2f} ms {row['mean_ms']:>6.2f} ms"
+              f" {row['submits_per_sec']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2, default=str)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
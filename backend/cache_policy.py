@@ -0,0 +1,194 @@
+"""
+CDN cache policies per route, and tag purges when the catalogue changes
+
+Vercel's edge (or any shared cache in front of the API) only caches a
+response when the response says it may. CachePolicies picks a policy per
+route template and sets the headers on the response:
+
+    Cache-Control  "public, max-age=0, s-maxage=N, stale-while-revalidate=N,
+                   stale-if-error=N" for cacheable routes. Browsers always
+                   revalidate (max-age=0); the edge serves for s-maxage, then
+                   serves stale while it refetches in the background, and
+                   keeps serving stale if the function fails.
+                   "no-store" for everything else.
+    Cache-Tag      the catalogue collections a cacheable response was built
+                   from (the header name is configurable), so a purge by tag
+                   drops exactly those responses.
+
+Only successful GET/HEAD responses get a cacheable policy. Errors, writes and
+routes without a rule get no-store, and a Cache-Control set by the route
+itself (e.g. profiling responses) is left alone.
+
+CdnPurger turns catalogue version changes into purges: server.py registers it
+as a CatalogueCache listener, so admin writes and change-stream events purge
+the collection's tag. Purges are coalesced for `debounce` seconds and POSTed
+from a background thread as {"tags": [...]} to CDN_PURGE_URL, so several
+writes in a row cost one call. With debounce 0 each purge is sent right away
+from its own thread, and a caller off the event loop waits for it, up to the
+HTTP timeout and what is left of its request budget. That suits serverless
+functions, which may be frozen after responding. The POST never runs on the
+event loop.
+"""
+
+import asyncio
+import fnmatch
+import threading
+import time
+
+from deadlines import remaining
+
+NO_STORE_HEADER = "no-store"
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+
+class CachePolicy:
+    """Shared-cache lifetimes in seconds; all zero means no-store"""
+
+    __slots__ = ("s_maxage", "stale_while_revalidate", "stale_if_error", "tags", "header")
+
+    def __init__(self, s_maxage=0, stale_while_revalidate=0, stale_if_error=0, tags=()):
+        self.s_maxage = s_maxage
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self.tags = tuple(tags)
+        self.header = self._header()
+
+    @property
+    def cacheable(self):
+        return self.s_maxage > 0
+
+    def _header(self):
+        if not self.cacheable:
+            return NO_STORE_HEADER
+        parts = ["public", "max-age=0", f"s-maxage={self.s_maxage}"]
+        if self.stale_while_revalidate:
+            parts.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        if self.stale_if_error:
+            parts.append(f"stale-if-error={self.stale_if_error}")
+        return ", ".join(parts)
+
+
+NO_STORE = CachePolicy()
+
+
+class CachePolicies:
+    """First matching rule wins; `rules` is [(route template glob, CachePolicy)]"""
+
+    def __init__(self, rules, default=NO_STORE, tag_header="Cache-Tag"):
+        self.rules = list(rules)
+        self.default = default
+        self.tag_header = tag_header
+
+    def policy_for(self, method, path):
+        if method not in CACHEABLE_METHODS:
+            return NO_STORE
+        for pattern, policy in self.rules:
+            if fnmatch.fnmatchcase(path, pattern):
+                return policy
+        return self.default
+
+    def apply(self, request, response):
+        """Set Cache-Control (and the tag header) on `response` unless the route already chose"""
+        if "cache-control" in response.headers:
+            return
+        # Match the route template, so /api/services/3 and /api/services/4 share a rule
+        route = request.scope.get("route")
+        policy = self.policy_for(request.method, route.path if route is not None else request.url.path)
+        if response.status_code != 200:
+            policy = NO_STORE
+        response.headers["Cache-Control"] = policy.header
+        if policy.tags and self.tag_header:
+            response.headers[self.tag_header] = ",".join(policy.tags)
+
+    def describe(self):
+        return {pattern: policy.header for pattern, policy in self.rules}
+
+
+class CdnPurger:
+    """Coalesces purge requests by tag and POSTs them to a purge endpoint"""
+
+    def __init__(self, url, token=None, debounce=0.5, timeout=5.0):
+        self.url = url
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.debounce = debounce
+        self.timeout = timeout
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._client = None
+        self._counters = {"requested": 0, "purges": 0, "failures": 0}
+        self.last_error = None
+
+    def purge(self, tags):
+        """Queue `tags` for purging (sent at once when debounce is 0)"""
+        tags = [tag for tag in tags if tag]
+        if not tags:
+            return
+        with self._lock:
+            self._pending.update(tags)
+            self._counters["requested"] += 1
+        if self.debounce <= 0:
+            sender = threading.Thread(target=self.flush, name="cdn-purge", daemon=True)
+            sender.start()
+            if not _on_event_loop():
+                # Wait so the purge leaves before the response, but not past the request's budget
+                sender.join(max(0, min(self.timeout, remaining(self.timeout))))
+            return
+        if self._thread is None:
+            self._start_thread()
+        self._wake.set()
+
+    def _start_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="cdn-purger", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            # Let a burst of changes pile up into one purge
+            time.sleep(self.debounce)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Send everything pending now"""
+        with self._send_lock:
+            with self._lock:
+                tags, self._pending = sorted(self._pending), set()
+            if not tags:
+                return
+            if self._client is None:
+                import httpx
+                self._client = httpx.Client(timeout=self.timeout)
+            try:
+                response = self._client.post(self.url, json={"tags": tags}, headers=self.headers)
+                response.raise_for_status()
+                self._counters["purges"] += 1
+                print(f"🧹 Purged CDN cache tags: {', '.join(tags)}")
+            except Exception as e:
+                self._counters["failures"] += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"⚠️ CDN purge of {', '.join(tags)} failed: {self.last_error}")
+
+    def close(self):
+        self.flush()
+        if self._client is not None:
+            self._client.close()
+
+    def metrics(self):
+        with self._lock:
+            pending = sorted(self._pending)
+        return {"url": self.url, "debounce_s": self.debounce, "pending": pending,
+                "last_error": self.last_error, **self._counters}
+
+
+def _on_event_loop():
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
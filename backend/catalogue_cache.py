@@ -0,0 +1,134 @@
+"""
+In-process cache for catalogue reads (services, company)
+
+Every entry keeps the validated document and its pre-rendered JSON body, so a
+cache hit skips the MongoDB read, validation and JSON encoding. Callers that
+already encoded the value (server.py renders through the models' TypeAdapters)
+pass the body to put(); otherwise it is rendered like JSONResponse would.
+
+Entries are only served as fresh while something is watching the source
+collections for changes (see change_watcher.py). Without a watcher, each
+request still reads MongoDB, and the cache only acts as the last good copy
+that is served while MongoDB is failing.
+
+Each collection has a generation counter. invalidate() bumps it, and put()
+only marks an entry fresh if the generation hasn't moved since the read
+started. A read that races a change can't re-cache the old data as fresh.
+Listeners added with add_listener() are called with the names of the
+collections each invalidation touched (server.py purges the CDN with them).
+invalidate(notify=False) is a local reset that skips them: the change watcher
+uses it when it (re)starts without knowing what changed, so a worker boot or
+a reconnect doesn't purge the edge.
+"""
+
+import json
+import threading
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+
+def render_json(value):
+    """Encode like FastAPI's JSONResponse"""
+    return json.dumps(
+        jsonable_encoder(value),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class CacheEntry:
+    __slots__ = ("value", "body", "collection", "fresh", "loaded_at")
+
+    def __init__(self, value, collection, fresh, body=None):
+        self.value = value
+        self.body = render_json(value) if body is None else body
+        self.collection = collection
+        self.fresh = fresh
+        self.loaded_at = time.time()
+
+
+class CatalogueCache:
+    def __init__(self, collections=("services", "company")):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generations = {name: 0 for name in collections}
+        self._watching = False
+        self._counters = {"hits": 0, "misses": 0, "stale_served": 0, "invalidations": 0}
+        self._listeners = []
+
+    @property
+    def watching(self):
+        return self._watching
+
+    def set_watching(self, watching):
+        """Turn fresh serving on/off; losing the watcher makes everything stale"""
+        with self._lock:
+            if self._watching and not watching:
+                for entry in self._entries.values():
+                    entry.fresh = False
+            self._watching = watching
+
+    def generation(self, collection):
+        with self._lock:
+            return self._generations[collection]
+
+    def fresh(self, key):
+        """Entry that can be served without reading MongoDB, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._watching and entry is not None and entry.fresh:
+                self._counters["hits"] += 1
+                return entry
+            self._counters["misses"] += 1
+            return None
+
+    def stale(self, key):
+        """Last good entry regardless of freshness (fallback while MongoDB fails)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._counters["stale_served"] += 1
+            return entry
+
+    def put(self, key, collection, value, generation, body=None):
+        """Store a read that started at `generation`"""
+        with self._lock:
+            fresh = self._watching and self._generations[collection] == generation
+        entry = CacheEntry(value, collection, fresh, body)
+        with self._lock:
+            if entry.fresh and self._generations[collection] != generation:
+                entry.fresh = False
+            self._entries[key] = entry
+        return entry
+
+    def add_listener(self, callback):
+        """Call `callback(collection names)` after every invalidation"""
+        self._listeners.append(callback)
+
+    def invalidate(self, collection=None, notify=True):
+        """Mark a collection's entries (or all entries) stale; listeners are told unless notify=False"""
+        with self._lock:
+            names = [name for name in ([collection] if collection else self._generations)
+                     if name in self._generations]
+            for name in names:
+                self._generations[name] += 1
+                self._counters["invalidations"] += 1
+                for entry in self._entries.values():
+                    if entry.collection == name:
+                        entry.fresh = False
+        if names and notify:
+            for callback in self._listeners:
+                callback(names)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "watching": self._watching,
+                "entries": len(self._entries),
+                "fresh_entries": sum(1 for entry in self._entries.values() if entry.fresh),
+                "generations": dict(self._generations),
+                **self._counters,
+            }
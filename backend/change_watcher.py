@@ -0,0 +1,139 @@
+"""
+Change-stream watcher that keeps the catalogue cache coherent with MongoDB
+
+A daemon thread tails one database-level change stream, filtered to the
+catalogue collections. Each change invalidates that collection's cache entries
+right away, so an edit made in Atlas shows up on the next request. While the
+stream is healthy, no request reads the catalogue from MongoDB.
+
+- Disconnects: the cache stops serving fresh entries and the routes read
+  MongoDB again. The stream then resumes from the last resume token, so
+  changes made in the meantime are replayed. If the oplog no longer holds the
+  token, the watcher invalidates everything and starts a new stream.
+- Starting without a resume token (boot, lost history, first poll) resets the
+  cache locally with invalidate(notify=False). Only actual change events reach
+  the cache's listeners, so these don't purge the CDN.
+- Standalone mongod (no change streams): the watcher falls back to polling
+  `dbHash` for the catalogue collections every `poll_interval` seconds.
+  Staleness is then at most one interval, at the cost of one small command
+  per interval.
+"""
+
+import threading
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+# "The $changeStream stage is only supported on replica sets"
+CHANGE_STREAMS_UNSUPPORTED = 40573
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+class CatalogueWatcher:
+    def __init__(self, database, cache, collections=("services", "company"),
+                 poll_interval=5.0, retry_interval=2.0, max_await_ms=1000):
+        self.database = database
+        self.cache = cache
+        self.collections = list(collections)
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self.max_await_ms = max_await_ms
+        self.mode = "stopped"
+        self.resume_token = None
+        self.changes_seen = 0
+        self.reconnects = 0
+        self.last_error = None
+        self._hashes = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="catalogue-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.cache.set_watching(False)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.mode == "polling":
+                    self._poll()
+                    self._stop.wait(self.poll_interval)
+                else:
+                    self._watch()
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    print("📋 Change streams unavailable (standalone mongod) - polling catalogue for changes")
+                    self.mode = "polling"
+                    continue
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    # Too far behind to resume: everything cached here may be out of date
+                    self.resume_token = None
+                    self.cache.invalidate(notify=False)
+                self._disconnected(e)
+            except PyMongoError as e:
+                self._disconnected(e)
+        self.mode = "stopped"
+
+    def _disconnected(self, error):
+        self.cache.set_watching(False)
+        self.reconnects += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        print(f"⚠️ Catalogue watcher lost MongoDB, retrying: {self.last_error}")
+        self._stop.wait(self.retry_interval)
+
+    def _watch(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": self.collections}}}]
+        with self.database.watch(pipeline, resume_after=self.resume_token,
+                                 max_await_time_ms=self.max_await_ms) as stream:
+            if self.resume_token is None:
+                # Nothing to replay from, so anything cached before now is suspect.
+                # A local reset: no change was seen, so listeners (the CDN purge) aren't told
+                self.cache.invalidate(notify=False)
+            self.mode = "change_stream"
+            self.cache.set_watching(True)
+            self.last_error = None
+            while not self._stop.is_set() and stream.alive:
+                change = stream.try_next()
+                self.resume_token = stream.resume_token
+                if change is not None:
+                    self._apply(change)
+
+    def _apply(self, change):
+        self.changes_seen += 1
+        collection = change.get("ns", {}).get("coll")
+        if change.get("operationType") in ("dropDatabase", "invalidate"):
+            # The stream ends here and can't be resumed past this event
+            self.resume_token = None
+            self.cache.invalidate()
+        elif collection not in self.collections:
+            self.cache.invalidate()
+        else:
+            self.cache.invalidate(collection)
+
+    def _poll(self):
+        hashes = self.database.command("dbHash", collections=self.collections)["collections"]
+        if self._hashes is None:
+            # First poll: no baseline to compare against, reset locally only
+            self.cache.invalidate(notify=False)
+        else:
+            for name in self.collections:
+                if hashes.get(name) != self._hashes.get(name):
+                    self.changes_seen += 1
+                    self.cache.invalidate(name)
+        self._hashes = hashes
+        self.cache.set_watching(True)
+        self.last_error = None
+
+    def metrics(self):
+        return {
+            "mode": self.mode,
+            "collections": self.collections,
+            "changes_seen": self.changes_seen,
+            "reconnects": self.reconnects,
+            "resumable": self.resume_token is not None,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Per-route allocation budgets: fail when a route allocates more than its budget
+
+Runs each route in ROUTES, one at a time, through server.app with
+MEMORY_TRACKING=1. The tracking middleware records, per request, the peak
+traced bytes above the level at which the request started, and the net bytes
+still allocated when it ended (see memory_tracking.py). Requests run one at a
+time, so the numbers belong to that route alone. Each route has two budgets,
+in KB:
+
+    peak   the highest peak over --repeat calls (what the worker must have free)
+    net    traced memory kept per call: growth over the --repeat calls, after
+           a GC, divided by --repeat (a leak shows up here)
+
+FUNCTIONS are measured the same way, without HTTP, for the two hot helpers
+every request path goes through: convert_objectid and build_contact_email.
+
+Every route runs once as a warm-up first, so first imports and cache fills
+are not counted. Runs use STORAGE_BACKEND=memory and MAIL_TRANSPORT=fake
+unless they are already set. Exits with status 1 when a budget is exceeded.
+tests/test_allocations.py asserts the same budgets under pytest, one test
+per route and function; this script is the CLI for a one-off run with other
+--repeat or --scale values.
+
+Usage:
+    python check_allocations.py
+    python check_allocations.py --repeat 20 --scale 1.5
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+CONTACT = {"name": "Allocation Check", "email": "allocation-check@example.com",
+           "service_interest": "AI Solutions", "message": "Checking allocations. " * 40}
+# (method, path, JSON body, needs admin, peak KB, net KB per call)
+ROUTES = [
+    ("GET", "/api", None, False, 64, 2),
+    ("GET", "/api/services", None, False, 80, 2),
+    ("GET", "/api/services/3", None, False, 64, 2),
+    ("GET", "/api/company", None, False, 64, 2),
+    ("GET", "/api/services/search?q=cloud+migration", None, False, 64, 2),
+    ("POST", "/api/contact", CONTACT, False, 128, 8),
+    ("GET", "/api/health", None, False, 64, 2),
+    ("GET", "/api/admin/analytics/contacts", None, True, 128, 2),
+    ("GET", "/api/admin/contacts/search?q=allocations", None, True, 256, 2),
+]
+# name -> (peak KB, net KB per call)
+FUNCTIONS = {
+    "convert_objectid(services)": (16, 0),
+    "build_contact_email(contact)": (32, 0),
+}
+
+
+async def call(app, method, path, body=None, headers=()):
+    """One request straight through the ASGI app; the status code
+
+    No HTTP client in between: a client would buffer the response body inside
+    the measured window, and it would count as the route's net growth.
+    """
+    path, _, query = path.partition("?")
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "", "client": ("127.0.0.1", 0),
+        "server": ("allocation-check", 80),
+        "headers": [(b"host", b"allocation-check"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode()), *headers],
+    }
+    messages = [{"type": "http.request", "body": payload, "more_body": False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Never disconnects; the response ends the exchange
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def retained(server):
+    """Traced bytes once the garbage of finished requests is gone
+
+    A request's tasks and reference cycles are freed a loop turn or a GC
+    later, so the net growth the middleware sees per request overstates what
+    is kept. Growth across a whole run, measured this way, is what stays.
+    The fake mail transport keeps every message it "sends"; production
+    transports don't, so those are dropped first.
+    """
+    getattr(server.mail_transport, "sent", []).clear()
+    await asyncio.sleep(0)
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def measure_routes(server, routes, repeat):
+    admin = [(b"authorization", f"Bearer {server.ADMIN_API_KEY}".encode())]
+    results = []
+    for method, path, body, needs_admin, *_ in routes:
+        await call(server.app, method, path, body, admin if needs_admin else ())
+    for method, path, body, needs_admin, peak_kb, net_kb in routes:
+        before = await retained(server)
+        server.route_allocations.reset()
+        statuses = {await call(server.app, method, path, body, admin if needs_admin else ()) for _ in range(repeat)}
+        after = await retained(server)
+        # One route per run, so the only recorded route is this one
+        (stats,) = server.route_allocations.metrics().values()
+        results.append({
+            "name": f"{method} {path}",
+            "status": sorted(statuses),
+            "peak_kb": stats["peak_kb_max"],
+            "net_kb": round((after - before) / repeat / 1024, 1),
+            "budget": (peak_kb, net_kb),
+        })
+    return results
+
+
+def measure_functions(server, repeat, names=None):
+    from memory_tracking import Allocation
+
+    services = list(server.db.services.find())
+    calls = {
+        "convert_objectid(services)": lambda: server.convert_objectid(services),
+        "build_contact_email(contact)": lambda: server.build_contact_email(CONTACT),
+    }
+    results = []
+    for name in names or calls:
+        func = calls[name]
+        func()
+        peaks, nets = [], []
+        for _ in range(repeat):
+            allocation = Allocation().begin()
+            result = func()
+            # Net is what outlives the call, so drop the result before measuring it
+            del result
+            allocation.end()
+            peaks.append(allocation.peak)
+            nets.append(allocation.net)
+        results.append({
+            "name": name,
+            "status": [],
+            "peak_kb": round(max(peaks) / 1024, 1),
+            "net_kb": round(sum(nets) / len(nets) / 1024, 1),
+            "budget": FUNCTIONS[name],
+        })
+    return results
+
+
+def environment(environ=os.environ):
+    """The variables server must be imported with: defaults unless already set, tracking always on"""
+    env = {name: environ.get(name, value) for name, value in
+           (("STORAGE_BACKEND", "memory"), ("MAIL_TRANSPORT", "fake"), ("ADMIN_API_KEY", "allocation-check"))}
+    env.update(MEMORY_TRACKING="1", LOOP_MONITOR="0")
+    return env
+
+
+def load_server():
+    """Import server; set environment() first, or the allocation middleware is missing"""
+    import server
+    server.print = lambda *a, **k: None
+    return server
+
+
+def over_budget(result, scale=1.0):
+    """(peak budget, net budget, over?) for one measured route or function"""
+    peak_budget, net_budget = (budget * scale for budget in result["budget"])
+    return peak_budget, net_budget, result["peak_kb"] > peak_budget or result["net_kb"] > net_budget
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a route allocates more than its budget")
+    parser.add_argument("--repeat", type=int, default=10, help="calls per route")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (e.g. on another Python)")
+    args = parser.parse_args()
+    repeat = max(1, args.repeat)
+
+    os.environ.update(environment())
+    server = load_server()
+    results = asyncio.run(measure_routes(server, ROUTES, repeat)) + measure_functions(server, repeat)
+    tracemalloc.stop()
+
+    failures = []
+    print(f"Allocations per call, KB (budgets x{args.scale:g}):")
+    for result in results:
+        peak_budget, net_budget, over = over_budget(result, args.scale)
+        if over:
+            failures.append(result)
+        status = f"   HTTP {result['status']}" if result["status"] else ""
+        print(f"  {'❌' if over else '✅'} {result['name']:<48} peak {result['peak_kb']:>7.1f} / {peak_budget:<6g}"
+              f" net {result['net_kb']:>6.1f} / {net_budget:<5g}{status}")
+    if failures:
+        print(f"\n❌ {len(failures)} over budget; find the allocating lines with "
+              "POST /api/admin/memory/snapshot and GET /api/admin/memory/diff")
+        sys.exit(1)
+    print("✅ Every route is within its allocation budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for server.py (what every serverless cold start pays)
+
+Runs `python -X importtime -c "import server"` in a fresh interpreter,
+--repeat times, and checks the fastest run against the budgets:
+
+    --max-ms        cumulative import time of `server`, in ms
+    --max-modules   number of modules imported along the way
+    --forbid        modules that must not be imported at startup (the resend
+                    SDK and requests load on first use, see mail_transport.py;
+                    the admin-only subsystems load in the routes that use them)
+
+It also fails if the import creates an index: server.py leaves that to
+`python retention.py indexes` at deploy time, since a createIndexes per index
+on every cold start is a round trip each. One extra, untimed import counts
+the create_index / create_indexes calls.
+
+Imports run with STORAGE_BACKEND=memory, so no MongoDB connection is attempted,
+and with production defaults (VERCEL_ENV=production, so no diagnostic routes).
+Exits with status 1 when a budget is exceeded and prints the heaviest modules,
+so the check can run in CI:
+
+    python check_import_time.py
+    python check_import_time.py --max-ms 1500 --max-modules 600 --top 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+DEFAULT_MAX_MS = 1500
+DEFAULT_MAX_MODULES = 600
+DEFAULT_FORBIDDEN = ["resend", "requests", "debug_routes", "contact_export", "retention",
+                     "profiler", "memory_tracking", "tracemalloc"]
+# Imports server with create_index / create_indexes replaced by a recorder,
+# on both pymongo and the in-memory store, and prints the calls
+INDEX_PROBE = """
+import json, pymongo.collection, memory_store
+calls = []
+def recorder(method):
+    def record(self, *args, **kwargs):
+        calls.append(f"{self.name}.{method}")
+    return record
+for cls in (pymongo.collection.Collection, memory_store.MemoryCollection):
+    for method in ("create_index", "create_indexes"):
+        setattr(cls, method, recorder(method))
+import server
+print(json.dumps(calls))
+"""
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def _import_server(args, extra_env=None):
+    env = {**os.environ, "STORAGE_BACKEND": "memory", "VERCEL_ENV": "production",
+           "PYTHONDONTWRITEBYTECODE": "1", **(extra_env or {})}
+    env.pop("DEBUG_ROUTES", None)
+    result = subprocess.run(
+        [sys.executable, *args],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import server failed:\n{result.stderr[-2000:]}")
+    return result
+
+
+def measure(extra_env=None):
+    result = _import_server(["-X", "importtime", "-c", "import server"], extra_env)
+    modules = parse_importtime(result.stderr)
+    server_us = next(cumulative for name, _, cumulative, depth in modules if name == "server" and depth == 0)
+    return {"server_ms": server_us / 1000, "modules": len(modules), "imported": modules}
+
+
+def index_calls(extra_env=None):
+    """["collection.create_index", ...] made while importing server"""
+    return json.loads(_import_server(["-c", INDEX_PROBE], extra_env).stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if importing server.py exceeds its time or module budget")
+    parser.add_argument("--max-ms", type=float, default=DEFAULT_MAX_MS)
+    parser.add_argument("--max-modules", type=int, default=DEFAULT_MAX_MODULES)
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN,
+                        help="modules that must not be imported at startup")
+    parser.add_argument("--repeat", type=int, default=3, help="runs; the fastest is checked")
+    parser.add_argument("--top", type=int, default=10, help="heaviest modules to list")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(max(1, args.repeat))]
+    best = min(runs, key=lambda run: run["server_ms"])
+    imported = {name for name, _, _, _ in best["imported"]}
+
+    failures = []
+    if best["server_ms"] > args.max_ms:
+        failures.append(f"import server took {best['server_ms']:.0f} ms (budget {args.max_ms:.0f} ms)")
+    if best["modules"] > args.max_modules:
+        failures.append(f"{best['modules']} modules imported (budget {args.max_modules})")
+    for module in args.forbid:
+        if module in imported:
+            failures.append(f"{module} is imported at startup")
+    indexes = index_calls()
+    if indexes:
+        failures.append(f"import server created {len(indexes)} index(es) ({', '.join(indexes)}); "
+                        f"leave them to `python retention.py indexes`")
+
+    print(f"import server: {best['server_ms']:.0f} ms (best of {len(runs)}), {best['modules']} modules, "
+          f"{len(indexes)} index call(s)")
+    print(f"Heaviest modules (self time):")
+    for name, self_us, cumulative_us, _ in sorted(best["imported"], key=lambda item: -item[1])[:args.top]:
+        print(f"  {self_us / 1000:>8.1f} ms  {cumulative_us / 1000:>8.1f} ms cumulative  {name}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Within the import-time budget")
+
+
+if __name__ == "__main__":
+    main()
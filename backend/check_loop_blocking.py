@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Fail when a route blocks the event loop for longer than --max-ms
+
+Runs each route in ROUTES, one at a time, through server.app on this
+process's event loop (httpx.AsyncClient with the app as transport). A
+LoopLagMonitor runs in strict mode meanwhile: it checks the loop every 5 ms,
+and its block threshold is --max-ms. Any synchronous work a handler does on
+the loop shows up as lag. Examples are a pymongo call made directly in an
+async route, a blocking SDK call, or a large render. The report lists each
+route's worst lag. For every route over the budget it also prints the
+blocking stack and the coroutine that made the call, and exits with status 1,
+so the check can run in CI next to check_import_time.py.
+
+Every route runs once as a warm-up first, so one-off costs such as first
+imports and cache fills are not counted (use --no-warmup to count them).
+Runs use STORAGE_BACKEND=memory, MAIL_TRANSPORT=fake and DEBUG_ROUTES=1
+(so the diagnostic routes are checked too) unless they are already set.
+The in-memory store answers in microseconds, so on its own it would hide a
+driver call made on the loop: the check makes every store operation sleep
+--latency-ms (by default twice --max-ms), like a round trip to MongoDB. A
+call made on the loop then always exceeds the budget, and one made in the
+threadpool costs nothing: the monitor doesn't count a stall while the loop
+idles in select() (loop_monitor.waiting), which is what threadpool work
+holding the GIL looks like. Point MONGO_URL at a MongoDB and set
+STORAGE_BACKEND=mongodb to check the real driver paths instead.
+tests/test_loop_blocking.py runs the same check under pytest.
+
+Usage:
+    python check_loop_blocking.py
+    python check_loop_blocking.py --max-ms 20 --repeat 5
+    python check_loop_blocking.py --latency-ms 0    # the bare in-memory store
+    python check_loop_blocking.py --route "GET /api/services" --route "POST /api/contact"
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("MAIL_TRANSPORT", "fake")
+os.environ.setdefault("ADMIN_API_KEY", "loop-check")
+os.environ.setdefault("DEBUG_ROUTES", "1")  # the diagnostic routes are on outside production, so check them too
+os.environ["LOOP_MONITOR"] = "0"  # this script runs its own, stricter monitor
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MAX_MS = 50
+CONTACT = {"name": "Loop Check", "email": "loop-check@example.com",
+           "service_interest": "AI Solutions", "message": "Checking the event loop. " * 20}
+# (method, path, JSON body, needs admin)
+ROUTES = [
+    ("GET", "/api", None, False),
+    ("GET", "/api/services", None, False),
+    ("GET", "/api/services/3", None, False),
+    ("GET", "/api/company", None, False),
+    ("GET", "/api/services/search?q=cloud+migration", None, False),
+    ("POST", "/api/contact", CONTACT, False),
+    ("GET", "/api/health", None, False),
+    ("GET", "/api/admin/analytics/contacts", None, True),
+    ("GET", "/api/admin/contacts/search?q=event+loop", None, True),
+    ("GET", "/api/admin/contacts/export?limit=100", None, True),
+    ("GET", "/api/test-mongodb", None, False),
+    ("GET", "/api/debug", None, False),
+    ("GET", "/api/test-db", None, False),
+    ("DELETE", "/api/cleanup-test", None, False),
+]
+
+
+def parse_route(value):
+    method, _, path = value.partition(" ")
+    if not path.startswith("/"):
+        raise argparse.ArgumentTypeError(f"expected 'METHOD /path', got {value!r}")
+    return method.upper(), path, CONTACT if method.upper() == "POST" else None, path.startswith("/api/admin")
+
+
+async def run(routes, max_ms=DEFAULT_MAX_MS, repeat=3, warmup=True, latency_ms=None):
+    """One result per route: its worst lag and the stalls over `max_ms`"""
+    import server
+
+    server.print = lambda *args, **kwargs: None
+    # Only the in-memory store can simulate a round trip; MongoDB has real ones
+    simulated = hasattr(server.db, "latency")
+    if simulated:
+        previous, server.db.latency = server.db.latency, (2 * max_ms if latency_ms is None else latency_ms) / 1000
+    try:
+        return await _run(server, routes, max_ms, repeat, warmup)
+    finally:
+        if simulated:
+            server.db.latency = previous
+
+
+async def _run(server, routes, max_ms, repeat, warmup):
+    import httpx
+    from loop_monitor import LagHistogram, LoopLagMonitor
+
+    admin = {"Authorization": f"Bearer {server.ADMIN_API_KEY}"}
+    monitor = LoopLagMonitor(interval=0.005, threshold=max_ms / 1000)
+    monitor.start()
+    results = []
+    async with httpx.AsyncClient(app=server.app, base_url="http://loop-check") as client:
+        async def call(method, path, body, needs_admin):
+            response = await client.request(method, path, json=body, headers=admin if needs_admin else None)
+            await response.aread()
+            return response.status_code
+
+        if warmup:
+            for route in routes:
+                await call(*route)
+        for method, path, body, needs_admin in routes:
+            await asyncio.sleep(monitor.interval * 2)
+            monitor.histogram = LagHistogram()
+            monitor.clear_events()
+            statuses = set()
+            for _ in range(repeat):
+                # Drop cached catalogue reads, so every call goes to the store
+                server.catalogue_cache.invalidate()
+                statuses.add(await call(method, path, body, needs_admin))
+            # Let the monitor's next heartbeat close any stall still open
+            await asyncio.sleep(monitor.interval * 2)
+            results.append({
+                "route": f"{method} {path}",
+                "status": sorted(statuses),
+                "max_lag_ms": monitor.histogram.max_ms,
+                "events": monitor.blocking_events(min_lag_ms=max_ms),
+            })
+    monitor.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a route blocks the event loop for longer than --max-ms")
+    parser.add_argument("--max-ms", type=float, default=DEFAULT_MAX_MS)
+    parser.add_argument("--repeat", type=int, default=3, help="calls per route")
+    parser.add_argument("--route", action="append", type=parse_route, help="'METHOD /path' (repeatable)")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false")
+    parser.add_argument("--latency-ms", type=float,
+                        help="simulated round trip per in-memory store operation (default: 2 x --max-ms)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.route or ROUTES, args.max_ms, max(1, args.repeat), args.warmup, args.latency_ms))
+
+    failures = [result for result in results if result["events"]]
+    print(f"Event-loop blocking per route (budget {args.max_ms:g} ms):")
+    for result in results:
+        mark = "❌" if result["events"] else "✅"
+        print(f"  {mark} {result['route']:<48} max lag {result['max_lag_ms']:>8.1f} ms   HTTP {result['status']}")
+    for result in failures:
+        worst = max(result["events"], key=lambda event: event["lag_ms"])
+        print(f"\n❌ {result['route']} blocked the loop for {worst['lag_ms']:.0f} ms "
+              f"in {worst['coroutine'] or 'a callback'}:")
+        for frame in worst["stack"][-12:]:
+            print(f"     {frame}")
+    if failures:
+        sys.exit(1)
+    print("✅ No route blocks the event loop beyond the budget")
+
+
+if __name__ == "__main__":
+    main()
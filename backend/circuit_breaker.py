@@ -0,0 +1,171 @@
+"""
+Circuit breakers for outbound dependencies (MongoDB, Resend)
+
+Each dependency gets one breaker with three states:
+
+    closed     calls go through; consecutive failures are counted
+    open       calls are rejected at once with CircuitOpenError until
+               `recovery_timeout` has passed, so callers can serve cached or
+               static data in microseconds instead of waiting out timeouts
+    half_open  up to `half_open_max_calls` trial calls are let through; one
+               success closes the circuit, one failure re-opens it
+
+`deadline` is the per-operation time budget in seconds. The breaker doesn't
+enforce it; callers apply it through the dependency's own timeout mechanism
+(pymongo.timeout, HTTP client timeouts), so slow calls surface as failures.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"circuit '{name}' is open; retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30.0,
+                 half_open_max_calls=1, deadline=None, failure_exceptions=(Exception,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.deadline = deadline
+        self.failure_exceptions = failure_exceptions
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._consecutive_failures = 0
+        self._counters = {"calls": 0, "successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self._last_failure = None
+        self._last_state_change = datetime.utcnow()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def _transition(self, state):
+        if state == self._state:
+            return
+        self._state = state
+        self._last_state_change = datetime.utcnow()
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self._counters["opened"] += 1
+            print(f"🔴 Circuit '{self.name}' opened after {self._consecutive_failures} failure(s)")
+        elif state == HALF_OPEN:
+            self._half_open_calls = 0
+            print(f"🟡 Circuit '{self.name}' half-open - allowing a trial call")
+        else:
+            self._consecutive_failures = 0
+            print(f"🟢 Circuit '{self.name}' closed")
+
+    def allow_request(self):
+        """Reserve a call slot; False means fail fast"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self._counters["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._counters["successes"] += 1
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._counters["failures"] += 1
+            self._consecutive_failures += 1
+            self._last_failure = {
+                "error": f"{type(error).__name__}: {str(error)[:200]}" if error else None,
+                "at": datetime.utcnow().isoformat(),
+            }
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._transition(OPEN)
+
+    def _release_trial(self):
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_calls:
+                self._half_open_calls -= 1
+
+    def retry_after(self):
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def call(self, func, *args, **kwargs):
+        """Run `func` through the breaker; raises CircuitOpenError when open"""
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+        with self._lock:
+            self._counters["calls"] += 1
+        try:
+            result = func(*args, **kwargs)
+        except self.failure_exceptions as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            # Not the dependency's fault (e.g. the caller's own deadline); free
+            # the trial slot so a half-open circuit isn't left waiting forever
+            self._release_trial()
+            raise
+        self.record_success()
+        return result
+
+    async def call_async(self, func, *args, **kwargs):
+        """Await coroutine function `func` through the breaker"""
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+        with self._lock:
+            self._counters["calls"] += 1
+        try:
+            result = await func(*args, **kwargs)
+        except self.failure_exceptions as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            self._release_trial()
+            raise
+        self.record_success()
+        return result
+
+    def metrics(self):
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout_s": self.recovery_timeout,
+                "deadline_ms": round(self.deadline * 1000) if self.deadline else None,
+                "retry_after_s": round(max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at)), 3)
+                if state == OPEN else 0.0,
+                "last_failure": self._last_failure,
+                "last_state_change": self._last_state_change.isoformat(),
+                **self._counters,
+            }
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Streaming export of contact submissions as NDJSON or CSV
+
+Contacts are read through one MongoDB cursor in `batch_size` batches and
+written out row by row, so memory use stays flat however many contacts match.
+Rows are ordered by (created_at, id), which makes every row a stable resume
+point. Each row carries its cursor token: a `cursor` field in NDJSON, a last
+`cursor` column in CSV. An interrupted export restarts with
+`after=<cursor of the last complete row received>` and continues exactly
+after it.
+
+Used by GET /api/admin/contacts/export and by the CLI:
+
+    python contact_export.py --format csv --output leads.csv
+    python contact_export.py --status new --start 2026-01-01 --output new.ndjson
+    python contact_export.py --format csv --output leads.csv --resume   # continue after a failure
+
+After each batch, the CLI stores the last written row's token and the file
+size in `<output>.cursor`. --resume truncates any partial batch written after
+that point, so no row is duplicated. The state file is deleted when the export
+completes. --resume refuses to run, rather than rewriting from scratch, when
+the output is missing or shorter than the checkpoint, or when the output
+exists without a checkpoint.
+"""
+
+import argparse
+import base64
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime
+
+CSV_COLUMNS = ["id", "created_at", "name", "email", "service_interest", "status", "email_sent", "message"]
+# Row field / last CSV column holding the row's resume token
+CURSOR_FIELD = "cursor"
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+DEFAULT_BATCH_SIZE = 1000
+# Rows are grouped into chunks of about this size before being yielded
+CHUNK_BYTES = 64 * 1024
+
+
+def cursor_token(contact):
+    """Opaque resume token for the position right after `contact`"""
+    raw = f"{contact['created_at'].isoformat()}|{contact['id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def parse_cursor_token(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, contact_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), contact_id
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid export cursor token")
+
+
+def build_filter(start=None, end=None, status=None, after=None):
+    """Mongo filter for contacts created in [start, end) with `status`, after a cursor token"""
+    conditions = []
+    created = {}
+    if start:
+        created["$gte"] = start
+    if end:
+        created["$lt"] = end
+    if created:
+        conditions.append({"created_at": created})
+    if status:
+        conditions.append({"status": status})
+    if after:
+        created_at, contact_id = parse_cursor_token(after)
+        conditions.append({"$or": [
+            {"created_at": {"$gt": created_at}},
+            {"created_at": created_at, "id": {"$gt": contact_id}},
+        ]})
+    if not conditions:
+        return {}
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def iter_contacts(collection, query, batch_size=DEFAULT_BATCH_SIZE, limit=0):
+    # email_lower is a search-index copy of email (contact_search.py), not exported
+    cursor = collection.find(query, {"_id": 0, "email_lower": 0}).sort([("created_at", 1), ("id", 1)]).batch_size(batch_size)
+    if limit:
+        cursor = cursor.limit(limit)
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+
+def ensure_indexes(contacts):
+    # Serves the export sort, date-range filters and cursor resumes
+    contacts.create_index([("created_at", 1), ("id", 1)])
+
+
+# ============ ENCODERS ============
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def ndjson_row(contact):
+    return json.dumps({**contact, CURSOR_FIELD: cursor_token(contact)}, default=_json_default,
+                      ensure_ascii=False) + "\n"
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    value = str(value)
+    # Keep spreadsheet apps from evaluating submitted text as a formula
+    if value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    return value
+
+
+def _csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def csv_header():
+    return _csv_line(CSV_COLUMNS + [CURSOR_FIELD])
+
+
+def csv_row(contact):
+    return _csv_line([_csv_cell(contact.get(column)) for column in CSV_COLUMNS] + [cursor_token(contact)])
+
+
+ROW_ENCODERS = {"ndjson": ndjson_row, "csv": csv_row}
+
+
+def encode(contacts, export_format, header=True):
+    """Text rows for an iterable of contacts (CSV starts with a header row)"""
+    if export_format == "csv" and header:
+        yield csv_header()
+    encode_row = ROW_ENCODERS[export_format]
+    for contact in contacts:
+        yield encode_row(contact)
+
+
+def chunked(rows, chunk_bytes=CHUNK_BYTES):
+    """Join rows into ~chunk_bytes byte strings, so sends aren't one syscall per row"""
+    parts = []
+    size = 0
+    for row in rows:
+        data = row.encode("utf-8")
+        parts.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b"".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield b"".join(parts)
+
+
+def stream_export(collection, export_format="ndjson", start=None, end=None, status=None,
+                  after=None, batch_size=DEFAULT_BATCH_SIZE, limit=0):
+    """Byte chunks of the export; suitable for StreamingResponse"""
+    query = build_filter(start, end, status, after)
+    return chunked(encode(iter_contacts(collection, query, batch_size, limit), export_format))
+
+
+# ============ CLI ============
+
+def _parse_date(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def prepare_resume(output_path, state_path):
+    """The cursor to continue after, with the output cut back to its last checkpoint
+
+    Raises ValueError when the output can't be continued safely: it is missing
+    or shorter than the checkpoint (moved, replaced or truncated), or it has
+    content but no checkpoint to continue from.
+    """
+    if not os.path.exists(state_path):
+        if os.path.exists(output_path) and os.path.getsize(output_path):
+            raise ValueError(f"--resume: no checkpoint ({state_path}) for the existing {output_path}; "
+                             "move the file away, or drop --resume to overwrite it")
+        return None
+    with open(state_path) as state_file:
+        state = json.load(state_file)
+    if not os.path.exists(output_path):
+        raise ValueError(f"--resume: {output_path} is missing but {state_path} expects {state['offset']} bytes of it; "
+                         f"delete {state_path} to start over")
+    size = os.path.getsize(output_path)
+    if size < state["offset"]:
+        raise ValueError(f"--resume: {output_path} is {size} bytes, shorter than the {state['offset']} checkpointed "
+                         f"in {state_path}; it was replaced or truncated. Delete {state_path} to start over")
+    # Drop rows written after the last recorded batch; they are exported again
+    with open(output_path, "r+b") as output:
+        output.truncate(state["offset"])
+    return state["after"]
+
+
+def export_to_file(collection, output_path, export_format="ndjson", start=None, end=None, status=None,
+                   batch_size=DEFAULT_BATCH_SIZE, resume=False):
+    """Write the export to `output_path`, checkpointing to <output>.cursor; returns (rows written, resumed)"""
+    state_path = output_path + ".cursor"
+    after = prepare_resume(output_path, state_path) if resume else None
+    contacts = iter_contacts(collection, build_filter(start, end, status, after), batch_size)
+
+    written = 0
+    encode_row = ROW_ENCODERS[export_format]
+    with open(output_path, "a" if after else "w", encoding="utf-8", newline="") as output:
+        if export_format == "csv" and not after:
+            output.write(csv_header())
+        for contact in contacts:
+            output.write(encode_row(contact))
+            written += 1
+            if written % batch_size == 0:
+                # Record progress only once the rows before it are on disk
+                output.flush()
+                os.fsync(output.fileno())
+                with open(state_path, "w") as state_file:
+                    json.dump({"after": cursor_token(contact), "offset": os.fstat(output.fileno()).st_size}, state_file)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return written, after is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export contact submissions as NDJSON or CSV")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    parser.add_argument("--output", required=True, help="file to write (appended to with --resume)")
+    parser.add_argument("--start", help="created on/after this date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="created before this date (YYYY-MM-DD)")
+    parser.add_argument("--status", choices=["new", "in-progress", "resolved"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--resume", action="store_true", help="continue from <output>.cursor")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import server
+    try:
+        written, resumed = export_to_file(server.db.contacts, args.output, args.format, _parse_date(args.start),
+                                          _parse_date(args.end), args.status, args.batch_size, args.resume)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Exported {written} contact(s) to {args.output}" + (" (resumed)" if resumed else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Admin search over contact submissions: by name, email fragment or message words
+
+Two indexes serve it, so a search never scans `contacts`:
+
+    contacts_text         text index on name (weight 10) and message (weight 1),
+                          English stemming: "migrate" finds "migrating"
+    contacts_email_lower  ascending index on `email_lower`, the address
+                          lowercased on insert (the stored `email` keeps the
+                          case the visitor typed)
+
+Text queries are `$text` matches, ranked by textScore and then newest first.
+Email queries are regex matches on `email_lower`, and a document is fetched
+only when its address matches. A case-insensitive regex on `email` would read
+every document instead.
+
+- An address prefix ("j.smith", "j.smith@acme") is anchored (`^` + prefix),
+  so MongoDB reads only the range of index keys that start with it.
+- A domain ("@acme.com") can sit anywhere in an address, so its regex is
+  tested against every key of the index. That is O(index size), though
+  still without reading documents.
+
+`mode` picks the kind of query:
+
+    text   words and "quoted phrases" in name/message
+    email  an address prefix ("j.smith", "j.smith@acme") or a domain ("@acme.com")
+    auto   email when the query is one token containing "@" or ".". Otherwise
+           text, retried as an address prefix when a one-word query finds nothing.
+
+Results are filtered on `status` / `service_interest` and paginated (page,
+page_size up to MAX_PAGE_SIZE). One extra row is fetched to set `has_more`, so
+`total` (a second query) is only counted on request.
+
+The in-memory store has no text indexes and raises on `$text`, so demo mode
+falls back to scanning and scoring name/message in Python with
+service_search.tokenize(), which has similar stemming.
+
+Contacts written before `email_lower` existed need a one-off backfill:
+
+    python contact_search.py ensure-indexes
+    python contact_search.py backfill
+    python contact_search.py search "kubernetes migration" --status new
+"""
+
+import argparse
+import os
+import re
+import sys
+from collections import Counter
+
+TEXT_INDEX_NAME = "contacts_text"
+TEXT_WEIGHTS = {"name": 10, "message": 1}
+EMAIL_INDEX_NAME = "contacts_email_lower"
+MODES = ("auto", "text", "email")
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+SNIPPET_LENGTH = 200
+RESULT_FIELDS = ["id", "name", "email", "service_interest", "status", "email_sent", "created_at", "message"]
+
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+
+def ensure_indexes(contacts):
+    contacts.create_index([("name", "text"), ("message", "text")], name=TEXT_INDEX_NAME,
+                          weights=TEXT_WEIGHTS, default_language="english")
+    contacts.create_index("email_lower", name=EMAIL_INDEX_NAME)
+
+
+def backfill_email_lower(contacts):
+    """Set `email_lower` on contacts that predate it; returns the number updated"""
+    missing = {"email_lower": {"$exists": False}, "email": {"$type": "string"}}
+    if hasattr(contacts, "aggregate"):
+        # One server-side pass with a pipeline update
+        return contacts.update_many(missing, [{"$set": {"email_lower": {"$toLower": "$email"}}}]).modified_count
+    updated = 0
+    for contact in contacts.find({"email_lower": {"$exists": False}}, {"id": 1, "email": 1}):
+        if isinstance(contact.get("email"), str):
+            contacts.update_one({"id": contact["id"]}, {"$set": {"email_lower": normalize_email(contact["email"])}})
+            updated += 1
+    return updated
+
+
+# ============ QUERIES ============
+
+def detect_mode(query):
+    query = query.strip()
+    return "email" if len(query.split()) == 1 and ("@" in query or "." in query) else "text"
+
+
+def build_filter(query, mode, status=None, service_interest=None):
+    conditions = {}
+    if mode == "email":
+        fragment = normalize_email(query)
+        # A prefix reads a bounded key range; a domain is matched against every key
+        pattern = re.escape(fragment) if fragment.startswith("@") else "^" + re.escape(fragment)
+        conditions["email_lower"] = {"$regex": pattern}
+    else:
+        conditions["$text"] = {"$search": query}
+    if status:
+        conditions["status"] = status
+    if service_interest:
+        conditions["service_interest"] = service_interest
+    return conditions
+
+
+def _text_scores(contacts, conditions):
+    """In-memory store: (score, contact) for contacts matching the $text search, scored in Python"""
+    from service_search import tokenize
+
+    terms = set(tokenize(conditions["$text"]["$search"]))
+    filters = {key: value for key, value in conditions.items() if key != "$text"}
+    scored = []
+    for contact in contacts.find(filters, {"_id": 0}):
+        score = 0.0
+        for field, weight in TEXT_WEIGHTS.items():
+            counts = Counter(tokenize(str(contact.get(field) or "")))
+            score += weight * sum(counts[term] for term in terms)
+        if score:
+            scored.append((score, contact))
+    scored.sort(key=lambda item: (-item[0], -item[1]["created_at"].timestamp()))
+    return scored
+
+
+def _find(contacts, conditions, mode, skip, limit):
+    """[(score or None, contact)] for one page"""
+    if mode == "email":
+        cursor = contacts.find(conditions, {"_id": 0, **{field: 1 for field in RESULT_FIELDS}})
+        return [(None, contact) for contact in cursor.sort("created_at", -1).skip(skip).limit(limit)]
+    projection = {"_id": 0, **{field: 1 for field in RESULT_FIELDS}, "score": {"$meta": "textScore"}}
+    try:
+        cursor = contacts.find(conditions, projection)
+    except ValueError:
+        # The in-memory store has no text indexes and rejects $text
+        return _text_scores(contacts, conditions)[skip:skip + limit]
+    cursor = cursor.sort([("score", {"$meta": "textScore"}), ("created_at", -1)])
+    return [(contact.pop("score"), contact) for contact in cursor.skip(skip).limit(limit)]
+
+
+def _count(contacts, conditions, mode):
+    try:
+        return contacts.count_documents(conditions)
+    except ValueError:
+        if mode != "text":
+            raise
+        return len(_text_scores(contacts, conditions))
+
+
+def _hit(score, contact):
+    message = contact.get("message") or ""
+    return {
+        **{field: contact.get(field) for field in RESULT_FIELDS if field != "message"},
+        "message": message if len(message) <= SNIPPET_LENGTH else message[:SNIPPET_LENGTH].rstrip() + "…",
+        "score": round(score, 3) if score is not None else None,
+    }
+
+
+def search_contacts(contacts, query, mode="auto", status=None, service_interest=None,
+                    page=1, page_size=DEFAULT_PAGE_SIZE, include_total=False):
+    """One page of contacts matching `query`, best first; see the module docstring"""
+    query = query.strip()
+    if not query:
+        raise ValueError("query must not be empty")
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    page = max(1, page)
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    skip = (page - 1) * page_size
+
+    resolved = detect_mode(query) if mode == "auto" else mode
+    conditions = build_filter(query, resolved, status, service_interest)
+    rows = _find(contacts, conditions, resolved, skip, page_size + 1)
+    if mode == "auto" and resolved == "text" and not rows and page == 1 and len(query.split()) == 1:
+        # A bare word that matched no name or message may be part of an address ("jsmith")
+        resolved = "email"
+        conditions = build_filter(query, resolved, status, service_interest)
+        rows = _find(contacts, conditions, resolved, skip, page_size + 1)
+
+    result = {
+        "query": query,
+        "mode": resolved,
+        "page": page,
+        "page_size": page_size,
+        "has_more": len(rows) > page_size,
+        "results": [_hit(score, contact) for score, contact in rows[:page_size]],
+    }
+    if include_total:
+        result["total"] = _count(contacts, conditions, resolved)
+    return result
+
+
+# ============ CLI ============
+
+def main():
+    parser = argparse.ArgumentParser(description="Contact search indexes, backfill and queries")
+    parser.add_argument("command", choices=["ensure-indexes", "backfill", "search"])
+    parser.add_argument("query", nargs="?", help="search text (for `search`)")
+    parser.add_argument("--mode", choices=MODES, default="auto")
+    parser.add_argument("--status")
+    parser.add_argument("--service-interest")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import server
+
+    contacts = server.db.contacts
+    if args.command == "ensure-indexes":
+        ensure_indexes(contacts)
+        print(f"✅ {TEXT_INDEX_NAME} and {EMAIL_INDEX_NAME} are in place")
+    elif args.command == "backfill":
+        print(f"✅ Set email_lower on {backfill_email_lower(contacts)} contact(s)")
+    else:
+        if not args.query:
+            parser.error("search needs a query")
+        result = search_contacts(contacts, args.query, args.mode, args.status, args.service_interest,
+                                 args.page, args.page_size, include_total=True)
+        print(f"{result['total']} match(es), mode {result['mode']}, page {result['page']}")
+        for hit in result["results"]:
+            score = f"{hit['score']:>7.2f}" if hit["score"] is not None else "      -"
+            print(f"{score}  {hit['created_at']:%Y-%m-%d}  {hit['status']:<11}  {hit['name']} <{hit['email']}>")
+
+
+if __name__ == "__main__":
+    main()
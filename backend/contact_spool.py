@@ -0,0 +1,357 @@
+"""
+Append-only local spool for contact submissions
+
+When MongoDB is down, or slower than the contact write deadline, submit_contact
+appends the submission here instead of losing it. A background replayer
+upserts spooled contacts into MongoDB once a ping succeeds again. Replay is
+idempotent: each insert becomes `$setOnInsert` keyed by `id`, so a contact that
+was partly written before the failure, or replayed twice, is never duplicated.
+
+File format: NDJSON, one bson.json_util record per line
+    {"op": "insert", "doc": {...contact...}}
+    {"op": "set", "id": "<contact id>", "fields": {"email_sent": true}}
+
+Durability: each append is written and flushed at once. fsync is batched:
+it runs after `fsync_batch` records, or at most `fsync_interval` seconds after
+the first unsynced record (a flusher thread covers the idle tail). A crash
+loses at most that window, and the write path never pays one fsync per
+request.
+
+Each worker process appends to its own file (`<path>.<pid>`), so workers never
+race on the rotate-before-replay step. Files left behind by workers that have
+exited are adopted and replayed by any live worker:
+
+- A worker holds an flock on `<path>.<pid>.lock` from its first append until
+  it closes the spool. The kernel drops the lock when the process dies, so an
+  exited owner is detected even after its pid is reused. Where flock doesn't
+  exist (Windows), or for files written before the lock, the pid is probed.
+- A worker adopts an orphan by renaming it to `<name>.claimed-<its pid>`
+  (os.replace is atomic). If two workers race, the loser gets
+  FileNotFoundError and skips the file. A claimed file whose claimer died in
+  turn is claimed again.
+
+pending_count() is a running counter of this worker's records: appends add
+one, and a replay subtracts what it applied. The /api/health probe reads it
+without touching the files. The files are only counted once, at startup.
+
+Note: on Vercel the spool lives in the function's ephemeral /tmp, so it only
+survives for the lifetime of a warm instance. On VM deployments
+(see serve.py) point CONTACT_SPOOL_PATH at persistent disk.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from bson import json_util
+from pymongo import UpdateOne
+
+try:
+    import fcntl
+except ImportError:  # Windows: owners are probed by pid only
+    fcntl = None
+
+CLAIM_MARKER = ".claimed-"
+
+
+class ContactSpool:
+    """NDJSON write-ahead spool with batched fsync and rotate-on-replay"""
+
+    def __init__(self, path, fsync_batch=16, fsync_interval=0.05):
+        self.base_path = Path(path)
+        self.pid = os.getpid()
+        self.path = self.base_path.with_name(f"{self.base_path.name}.{self.pid}")
+        self.replay_path = self.path.with_name(self.path.name + ".replaying")
+        self.lock_path = self._lock_path(self.pid)
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._owner_lock = None
+        self._unsynced = 0
+        self._first_unsynced_at = None
+        self._flusher = None
+        self._stop = threading.Event()
+        # Records left by an earlier process with the same pid are ours to replay
+        self._pending = sum(self._count_records(path) for path in (self.replay_path, self.path))
+
+    # ---- writing ----
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._hold_owner_lock()
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def _lock_path(self, pid):
+        return self.base_path.with_name(f"{self.base_path.name}.{pid}.lock")
+
+    def _hold_owner_lock(self):
+        """Mark this process as the live owner of its spool files (until close)"""
+        if fcntl is None or self._owner_lock is not None:
+            return
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.lock_path, "a")
+        # Blocks only while another worker is claiming files of a dead process that had our pid
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        self._owner_lock = lock_file
+
+    def _append(self, record):
+        line = json_util.dumps(record) + "\n"
+        with self._lock:
+            spool_file = self._open()
+            spool_file.write(line)
+            spool_file.flush()
+            self._pending += 1
+            self._unsynced += 1
+            if self._first_unsynced_at is None:
+                self._first_unsynced_at = time.monotonic()
+            if self._unsynced >= self.fsync_batch:
+                self._fsync_locked()
+        self._ensure_flusher()
+
+    def append_contact(self, contact_data):
+        """Spool a full contact document for later insertion"""
+        self._append({"op": "insert", "doc": contact_data})
+
+    def append_update(self, contact_id, fields):
+        """Spool a field update (e.g. email_sent) for a spooled contact"""
+        self._append({"op": "set", "id": contact_id, "fields": fields})
+
+    def _fsync_locked(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._first_unsynced_at = None
+
+    def flush(self):
+        with self._lock:
+            self._fsync_locked()
+
+    def _ensure_flusher(self):
+        with self._lock:
+            if self._flusher is None and self._unsynced:
+                self._flusher = threading.Thread(target=self._flush_loop, name="contact-spool-fsync", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        # Runs only while there are unsynced records, then exits until the next append
+        while not self._stop.wait(self.fsync_interval):
+            with self._lock:
+                if self._first_unsynced_at is None:
+                    self._flusher = None
+                    return
+                if time.monotonic() - self._first_unsynced_at >= self.fsync_interval:
+                    self._fsync_locked()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._fsync_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._owner_lock is not None:
+                self._owner_lock.close()
+                self._owner_lock = None
+
+    # ---- orphans ----
+
+    def _spool_files(self):
+        """[(path, owner pid)] for every spool file of any worker; a claimed file belongs to its claimer"""
+        files = []
+        for path in self.base_path.parent.glob(f"{self.base_path.name}.*"):
+            suffix = path.name[len(self.base_path.name) + 1:]
+            if suffix.endswith(".lock"):
+                continue
+            owner = suffix.rsplit(CLAIM_MARKER, 1)[1] if CLAIM_MARKER in suffix else suffix.split(".", 1)[0]
+            if owner.isdigit():
+                files.append((path, int(owner)))
+        return sorted(files)
+
+    @contextmanager
+    def _owner_exited(self, pid):
+        """True while `pid` is known to have exited; holds its lock meanwhile, so it can't come back"""
+        lock_file = None
+        if fcntl is not None:
+            try:
+                lock_file = open(self._lock_path(pid), "r")
+            except FileNotFoundError:
+                pass  # never took the lock: written before it existed, or never appended
+        if lock_file is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                lock_file.close()
+            return
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            yield True
+        except PermissionError:
+            yield False  # alive, owned by another user
+        else:
+            yield False
+
+    def has_orphans(self):
+        """Whether exited workers left spool files to adopt (or this worker holds unreplayed claims)"""
+        for path, owner in self._spool_files():
+            if owner == self.pid:
+                if CLAIM_MARKER in path.name:
+                    return True
+                continue
+            with self._owner_exited(owner) as exited:
+                if exited:
+                    return True
+        return False
+
+    def _claim_orphans(self):
+        """Rename the files of exited workers to `.claimed-<our pid>`; returns every file we have claimed"""
+        claimed = []
+        for path, owner in self._spool_files():
+            if owner == self.pid:
+                if CLAIM_MARKER in path.name:
+                    claimed.append(path)  # claimed earlier; its replay failed
+                continue
+            # Hold our own lock first, so nobody takes our claims for orphans
+            self._hold_owner_lock()
+            with self._owner_exited(owner) as exited:
+                if not exited:
+                    continue
+                target = path.with_name(f"{path.name.split(CLAIM_MARKER, 1)[0]}{CLAIM_MARKER}{self.pid}")
+                try:
+                    os.replace(path, target)
+                except FileNotFoundError:
+                    continue  # another worker claimed it first
+            claimed.append(target)
+        return claimed
+
+    # ---- reading / replay ----
+
+    @staticmethod
+    def _count_records(path):
+        if not path.exists():
+            return 0
+        with open(path, encoding="utf-8") as spool_file:
+            return sum(1 for line in spool_file if line.strip())
+
+    def pending_count(self):
+        """This worker's spooled records not yet replayed (a counter; no file reads)"""
+        return self._pending
+
+    def _rotate(self):
+        """Move the live spool aside so new appends don't race the replay"""
+        with self._lock:
+            if self.replay_path.exists():
+                return True
+            if not self.path.exists() or self.path.stat().st_size == 0:
+                return False
+            self._fsync_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            os.replace(self.path, self.replay_path)
+            return True
+
+    def _read_records(self, path):
+        with open(path, encoding="utf-8") as spool_file:
+            for line in spool_file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json_util.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write; everything before it is intact
+                    print(f"⚠️ Skipping unreadable spool line in {path.name}")
+
+    def replay(self, collection, batch_size=500):
+        """Upsert every spooled record into `collection`; returns records applied"""
+        applied = 0
+        for orphan in self._claim_orphans():
+            try:
+                applied += self._replay_file(orphan, collection, batch_size)
+            except FileNotFoundError:
+                continue
+        if self._rotate():
+            applied += self._replay_file(self.replay_path, collection, batch_size)
+        return applied
+
+    def _replay_file(self, path, collection, batch_size):
+        applied = 0
+        records = 0
+        batch = []
+        for record in self._read_records(path):
+            records += 1
+            if record.get("op") == "insert":
+                document = record["doc"]
+                document.pop("_id", None)
+                batch.append(UpdateOne({"id": document["id"]}, {"$setOnInsert": document}, upsert=True))
+            elif record.get("op") == "set":
+                batch.append(UpdateOne({"id": record["id"]}, {"$set": record["fields"]}))
+            if len(batch) >= batch_size:
+                collection.bulk_write(batch, ordered=True)
+                applied += len(batch)
+                batch = []
+        if batch:
+            collection.bulk_write(batch, ordered=True)
+            applied += len(batch)
+        # Only drop the file once every batch is acknowledged
+        os.remove(path)
+        if path == self.replay_path:
+            with self._lock:
+                self._pending = max(0, self._pending - records)
+        return applied
+
+
+class SpoolReplayer:
+    """Background thread that drains the spool whenever MongoDB is healthy"""
+
+    def __init__(self, spool, get_collection, is_healthy, interval=10.0, batch_size=500):
+        self.spool = spool
+        self.get_collection = get_collection
+        self.is_healthy = is_healthy
+        self.interval = interval
+        self.batch_size = batch_size
+        self.replayed_total = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="contact-spool-replayer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def replay_once(self):
+        if (self.spool.pending_count() == 0 and not self.spool.has_orphans()) or not self.is_healthy():
+            return 0
+        try:
+            replayed = self.spool.replay(self.get_collection(), self.batch_size)
+            self.replayed_total += replayed
+            self.last_error = None
+            if replayed:
+                print(f"✅ Replayed {replayed} spooled contact record(s) into MongoDB")
+            return replayed
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"⚠️ Contact spool replay failed, will retry: {self.last_error}")
+            return 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.replay_once()
+            self._stop.wait(self.interval)
@@ -0,0 +1,115 @@
+"""
+Per-request deadlines and timeout budgets
+
+Each route declares a latency budget with a dependency:
+
+    @app.get("/api/services", dependencies=[request_budget(800)])
+
+The deadline is stored in a context variable, so downstream calls can take
+what is left of it:
+
+    with pymongo.timeout(operation_timeout(1.5)):   # min(1.5s, remaining)
+        ...
+
+When the budget is already spent, operation_timeout() raises DeadlineExceeded
+and the route degrades to cached or fallback data. Requests and exceeded
+deadlines are counted per route; see metrics().
+
+ROUTE_BUDGETS_MS (JSON, e.g. {"/api/services": 500}) overrides the declared
+budgets without a code change.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+
+from fastapi import Depends, Request
+
+_current = contextvars.ContextVar("request_deadline", default=None)
+_lock = threading.Lock()
+_stats = {}
+
+try:
+    BUDGET_OVERRIDES_MS = json.loads(os.getenv("ROUTE_BUDGETS_MS", "") or "{}")
+except ValueError:
+    print("⚠️ ROUTE_BUDGETS_MS is not valid JSON - using declared route budgets")
+    BUDGET_OVERRIDES_MS = {}
+
+
+class DeadlineExceeded(Exception):
+    """The request's latency budget is spent"""
+
+
+class RequestDeadline:
+    def __init__(self, route, budget_ms):
+        self.route = route
+        self.budget_ms = budget_ms
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_ms / 1000
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+def _route_stats(route, budget_ms):
+    stats = _stats.get(route)
+    if stats is None:
+        stats = _stats[route] = {"budget_ms": budget_ms, "requests": 0, "deadline_exceeded": 0}
+    return stats
+
+
+def request_budget(budget_ms):
+    """Route dependency that starts the request's deadline clock"""
+    async def start_deadline(request: Request):
+        route = getattr(request.scope.get("route"), "path", request.url.path)
+        budget = BUDGET_OVERRIDES_MS.get(route, budget_ms)
+        _current.set(RequestDeadline(route, budget))
+        with _lock:
+            _route_stats(route, budget)["requests"] += 1
+    return Depends(start_deadline)
+
+
+def current_deadline():
+    return _current.get()
+
+
+def remaining(default=None):
+    """Seconds left in the current request's budget (default outside a request)"""
+    deadline = _current.get()
+    return deadline.remaining() if deadline else default
+
+
+def operation_timeout(cap):
+    """Timeout for one downstream call: min(cap, remaining budget)"""
+    deadline = _current.get()
+    if deadline is None:
+        return cap
+    left = deadline.remaining()
+    if left <= 0:
+        record_exceeded()
+        raise DeadlineExceeded(f"{deadline.route} exceeded its {deadline.budget_ms}ms budget")
+    return min(cap, left)
+
+
+def limited_by_budget(cap):
+    """True when the request budget, not `cap`, bounds the next operation"""
+    left = remaining()
+    return left is not None and left < cap
+
+
+def record_exceeded():
+    deadline = _current.get()
+    if deadline is None:
+        return
+    with _lock:
+        _route_stats(deadline.route, deadline.budget_ms)["deadline_exceeded"] += 1
+
+
+def metrics():
+    with _lock:
+        return {route: dict(stats) for route, stats in sorted(_stats.items())}
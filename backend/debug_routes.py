@@ -0,0 +1,226 @@
+"""
+Diagnostic routes: /api/test-mongodb, /api/debug, /api/env-check, /api/test-db
+and /api/cleanup-test
+
+They report connection details and environment variable names, and
+/api/test-db writes to the database, so they are only registered when
+DEBUG_ROUTES is enabled (by default everywhere except VERCEL_ENV=production).
+When disabled this module is never imported, and a cold start does not pay
+for defining them.
+
+Handlers read state through the `server` module passed to register(), so they
+always see the current client and database. The ones that call the database
+are plain defs: FastAPI runs them in the threadpool, so the blocking driver
+calls never stall the event loop (check_loop_blocking.py covers them).
+"""
+
+import os
+import sys
+import uuid
+from datetime import datetime
+
+import pymongo
+
+
+def register(app, server):
+    """Add the diagnostic routes to `app`"""
+    @app.get("/api/test-mongodb")
+    def test_mongodb_connection():
+        """Test MongoDB connection specifically"""
+        try:
+            if server.client:
+                # Test if we have a real client
+                server.client.admin.command('ping')
+
+                # Get database stats
+                collections = server.db.list_collection_names()
+                services_count = server.db.services.count_documents({})
+                company_count = server.db.company.count_documents({})
+                contacts_count = server.db.contacts.count_documents({}) if 'contacts' in collections else 0
+
+                return {
+                    "status": "success",
+                    "message": "MongoDB connected successfully",
+                    "database": server.db.name,
+                    "collections": collections,
+                    "counts": {
+                        "services": services_count,
+                        "company": company_count,
+                        "contacts": contacts_count
+                    },
+                    "connection": {
+                        "url_set": True,
+                        "type": "real_mongodb"
+                    },
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+            else:
+                return {
+                    "status": "demo_mode",
+                    "message": "Running in demo mode - MongoDB not connected",
+                    "database": server.db.name,
+                    "connection": {
+                        "url_set": bool(server.MONGODB_URL and server.MONGODB_URL != "mongodb://localhost:27017/aximoix"),
+                        "type": "memory_store"
+                    },
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": str(e),
+                "connection_url": server.MONGODB_URL[:50] + "..." if len(server.MONGODB_URL) > 50 else server.MONGODB_URL,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+
+    @app.get("/api/debug")
+    def debug_info():
+        """Debug endpoint to check everything"""
+        try:
+            if server.client:
+                # Test MongoDB
+                server.client.admin.command('ping')
+                db_status = "connected"
+                collections = server.db.list_collection_names()
+
+                # Check contacts collection
+                contact_count = server.db.contacts.count_documents({}) if 'contacts' in collections else 0
+
+                # Check services collection
+                services_count = server.db.services.count_documents({}) if 'services' in collections else 0
+
+                # Check company collection
+                company_count = server.db.company.count_documents({}) if 'company' in collections else 0
+
+            else:
+                db_status = "demo_mode"
+                collections = server.db.list_collection_names()
+                contact_count = server.db.contacts.count_documents({})
+                services_count = server.db.services.count_documents({})
+                company_count = server.db.company.count_documents({})
+
+        except Exception as e:
+            db_status = f"disconnected: {str(e)}"
+            collections = []
+            contact_count = 0
+            services_count = 0
+            company_count = 0
+
+        # Get environment info
+        env_vars = {}
+        for key in os.environ:
+            if "MONGO" in key.upper() or "URL" in key.upper() or "DB" in key.upper():
+                value = os.getenv(key)
+                if value and any(secret in key.lower() for secret in ['pass', 'key', 'secret']):
+                    env_vars[key] = "*****"
+                else:
+                    env_vars[key] = "SET" if value else "NOT SET"
+
+        return {
+            "backend": "running",
+            "python_version": sys.version.split()[0],
+            "pymongo_version": pymongo.__version__,
+            "database": db_status,
+            "collections": collections,
+            "contact_submissions": contact_count,
+            "services_count": services_count,
+            "company_count": company_count,
+            "timestamp": datetime.utcnow().isoformat(),
+            "environment": os.getenv("VERCEL_ENV", "development"),
+            "environment_variables": env_vars
+        }
+
+    @app.get("/api/env-check")
+    async def env_check():
+        """Debug endpoint to check environment variables"""
+        env_info = {}
+        for key in os.environ:
+            if "MONGO" in key or "URL" in key or "DB" in key:
+                value = os.getenv(key)
+                if value and ("PASS" in key or "KEY" in key or "SECRET" in key):
+                    env_info[key] = "****SET****"
+                else:
+                    env_info[key] = "SET" if value else "NOT SET"
+
+        return {
+            "mongodb_url": "SET" if server.MONGODB_URL and server.MONGODB_URL != "mongodb://localhost:27017/aximoix" else "NOT SET",
+            "db_name": server.DB_NAME,
+            "environment": os.getenv("VERCEL_ENV", "development"),
+            "all_relevant_vars": env_info,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+
+    # Test database operations
+    @app.get("/api/test-db")
+    def test_database():
+        """Test database connection and operations"""
+        try:
+            if server.client:
+                # Test connection
+                server.client.admin.command('ping')
+
+                # Test collections
+                collections = server.db.list_collection_names()
+
+                # Test insert
+                test_doc = {
+                    "id": "test-" + str(uuid.uuid4()),
+                    "message": "Test document from Vercel",
+                    "created_at": datetime.utcnow(),
+                    "test": True
+                }
+
+                result = server.db.test.insert_one(test_doc)
+
+                # Test read
+                found_doc = server.db.test.find_one({"id": test_doc["id"]})
+
+                # Clean up
+                server.db.test.delete_one({"id": test_doc["id"]})
+
+                return {
+                    "status": "success",
+                    "database": "connected",
+                    "collections": collections,
+                    "test_insert": "successful",
+                    "test_read": "successful" if found_doc else "failed",
+                    "message": "Real MongoDB connection working"
+                }
+            else:
+                return {
+                    "status": "demo_mode",
+                    "database": "memory_store",
+                    "message": "Running in demo mode - no real MongoDB connection",
+                    "test_insert": "simulated",
+                    "test_read": "simulated"
+                }
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "database": "disconnected",
+                "error": str(e)
+            }
+
+    # Add a route to clean up test data
+    @app.delete("/api/cleanup-test")
+    def cleanup_test_data():
+        """Clean up any test data"""
+        try:
+            if server.client and hasattr(server.db, 'test'):
+                result = server.db.test.delete_many({"test": True})
+                return {
+                    "success": True,
+                    "deleted_count": result.deleted_count,
+                    "message": "Test data cleaned up"
+                }
+            return {
+                "success": True,
+                "message": "No test data to clean up"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
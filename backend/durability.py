@@ -0,0 +1,55 @@
+"""
+Write-concern tiers for the contact write path
+
+The MongoClient defaults to w: "majority", so every write waits until most
+replica-set members have it. A contact submission made two such writes: the
+insert, and then the `email_sent` update once the notification went out.
+Tiers let each operation pick its own durability:
+
+    fast                w: 1, j: true. Acknowledged once the primary has the
+                        write in its journal, so a mongod crash or restart
+                        keeps it. A failover before it replicates can roll it
+                        back; it is then in the rollback files, not lost
+                        silently.
+    majority            w: "majority" (the client default). Survives any
+                        failover.
+    majority_journaled  w: "majority", j: true. Also on disk on each of those
+                        members.
+
+server.py uses CONTACT_INSERT_WRITE_CONCERN (default fast) for the contact
+insert and its analytics rollup, and CONTACT_STATUS_WRITE_CONCERN (default
+majority) for status changes: `email_sent`, from the submission and from
+send-pending. With CONTACT_WRITE_MODE=combined the notification goes out
+first and the contact is inserted once, `email_sent` included, at the insert
+tier. That saves a write but delays the insert by the mail call.
+bench_write_concern.py reports p50/p99 submit latency per tier against a
+replica set.
+"""
+
+from pymongo.write_concern import WriteConcern
+
+TIERS = {
+    "fast": WriteConcern(w=1, j=True),
+    "majority": WriteConcern(w="majority"),
+    "majority_journaled": WriteConcern(w="majority", j=True),
+}
+WRITE_MODES = ("separate", "combined")
+
+
+def tier(name):
+    """The WriteConcern for tier `name`; ValueError naming the valid tiers otherwise"""
+    try:
+        return TIERS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown write concern tier {name!r}; expected one of {', '.join(TIERS)}") from None
+
+
+def write_mode(name):
+    if name.lower() not in WRITE_MODES:
+        raise ValueError(f"Unknown contact write mode {name!r}; expected one of {', '.join(WRITE_MODES)}")
+    return name.lower()
+
+
+def with_tier(collection, name):
+    """`collection` writing at tier `name` (reads are unaffected)"""
+    return collection.with_options(write_concern=tier(name))
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Snapshot the read-only API responses into static JSON files for CDN serving
+
+Calls the same route handlers as the live API, so the files hold what
+/api/services, /api/services/{id} and /api/company return: MongoDB data when
+MONGO_URL is reachable, otherwise the static fallback in server.py. Mongo's
+internal `_id` is dropped, so an unchanged catalogue exports byte-identical
+files.
+
+Output (default: ../public/api, so it ships with the frontend build):
+
+    services.json                 stable name, fetched by the frontend
+    services.<sha256[:12]>.json   content-addressed copy, safe to cache forever
+    services/<id>.json            one per active service (+ hashed copies)
+    company.json
+    manifest.json                 logical name -> hashed file, hash, sizes
+    *.gz                          gzip -9 copies of every file, for servers
+                                  that serve precompressed assets
+
+Re-running only rewrites files whose content changed. Files the previous
+export wrote (per its manifest.json) that this one doesn't are removed;
+nothing else in the output directory is deleted.
+
+Usage:
+    python export_static.py                     # MongoDB (or fallback) -> ../public/api
+    python export_static.py --source static     # server.py static data only
+    python export_static.py --output /tmp/api --check
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+DEFAULT_OUTPUT = BACKEND_DIR.parent / "public" / "api"
+
+
+def load_server(source):
+    if source == "static":
+        # The in-memory store is seeded from the static catalogue
+        os.environ["STORAGE_BACKEND"] = "memory"
+    os.environ.pop("RESEND_API_KEY", None)
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    return server
+
+
+def response_body(result):
+    """Route result (a Response or plain data) -> JSON bytes without `_id`"""
+    from catalogue_cache import render_json
+    data = json.loads(result.body) if hasattr(result, "body") else result
+    if isinstance(data, list):
+        data = [{k: v for k, v in item.items() if k != "_id"} for item in data]
+    else:
+        data = {k: v for k, v in data.items() if k != "_id"}
+    return render_json(data)
+
+
+def collect_payloads(server):
+    """{relative file name: JSON bytes} for every read-only catalogue response"""
+    payloads = {}
+    services_body = response_body(asyncio.run(server.get_services()))
+    payloads["services.json"] = services_body
+    for service in json.loads(services_body):
+        service_id = service["id"]
+        payloads[f"services/{service_id}.json"] = response_body(asyncio.run(server.get_service(service_id)))
+    payloads["company.json"] = response_body(asyncio.run(server.get_company()))
+    return payloads
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+def hashed_name(name, digest):
+    stem, suffix = name.rsplit(".", 1)
+    return f"{stem}.{digest[:12]}.{suffix}"
+
+
+def gzip_bytes(body):
+    # mtime=0 keeps the .gz output byte-identical across runs
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def write_if_changed(path, body):
+    if path.exists() and path.read_bytes() == body:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_bytes(body)
+    os.replace(temp_path, path)
+    return True
+
+
+def manifest_files(manifest):
+    """Every file an export with `manifest` wrote, .gz copies included"""
+    names = set()
+    for name, entry in manifest.get("files", {}).items():
+        for file_name in (name, entry["path"]):
+            names.update({file_name, file_name + ".gz"})
+    return names
+
+
+def export(payloads, output_dir, source):
+    output_dir = Path(output_dir)
+    previous = {}
+    manifest_path = output_dir / "manifest.json"
+    if manifest_path.exists():
+        previous = json.loads(manifest_path.read_text(encoding="utf-8"))
+    written = 0
+    files = {}
+    keep = set()
+    for name, body in sorted(payloads.items()):
+        digest = content_hash(body)
+        compressed = gzip_bytes(body)
+        versioned = hashed_name(name, digest)
+        for file_name in (name, versioned):
+            keep.update({file_name, file_name + ".gz"})
+            written += write_if_changed(output_dir / file_name, body)
+            written += write_if_changed(output_dir / (file_name + ".gz"), compressed)
+        files[name] = {
+            "path": versioned,
+            "sha256": digest,
+            "bytes": len(body),
+            "gzip_bytes": len(compressed),
+        }
+
+    # Drop what the previous export wrote and this one doesn't (old hashed
+    # copies, removed services); files this script never wrote are left alone
+    removed = 0
+    for relative in sorted(manifest_files(previous) - keep):
+        path = output_dir / relative
+        if path.is_file():
+            path.unlink()
+            removed += 1
+
+    # Only bump generated_at when some content actually changed
+    unchanged = previous.get("files") == files
+    manifest = {
+        "generated_at": previous["generated_at"] if unchanged and "generated_at" in previous
+        else datetime.utcnow().isoformat() + "Z",
+        "source": source,
+        "files": files,
+    }
+    manifest_body = (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode("utf-8")
+    written += write_if_changed(manifest_path, manifest_body)
+    write_if_changed(output_dir / "manifest.json.gz", gzip_bytes(manifest_body))
+    return manifest, written, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export catalogue API responses as static JSON")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="output directory (default: ../public/api)")
+    parser.add_argument("--source", choices=["auto", "static"], default="auto",
+                        help="auto: MongoDB with the server's fallbacks; static: server.py data only")
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 if the files on disk differ from a fresh export (for CI)")
+    args = parser.parse_args()
+
+    server = load_server(args.source)
+    server.print = lambda *a, **k: None
+    payloads = collect_payloads(server)
+    source = "mongodb" if server.client else "static"
+
+    if args.check:
+        output_dir = Path(args.output)
+        stale = [name for name, body in payloads.items()
+                 if not (output_dir / name).exists() or (output_dir / name).read_bytes() != body]
+        for name in stale:
+            print(f"out of date: {name}")
+        sys.exit(1 if stale else 0)
+
+    manifest, written, removed = export(payloads, args.output, source)
+    total = sum(entry["bytes"] for entry in manifest["files"].values())
+    total_gz = sum(entry["gzip_bytes"] for entry in manifest["files"].values())
+    print(f"Exported {len(manifest['files'])} responses from {source} to {args.output}")
+    print(f"  {total} bytes JSON, {total_gz} bytes gzip; {written} file(s) written, {removed} stale removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Resend HTTP API, for tests and mail benchmarks
+
+Accepts the same requests as api.resend.com and never sends mail:
+
+    POST /emails         -> {"id": "<uuid>"}
+    POST /emails/batch   -> {"data": [{"id": "<uuid>"}, ...]}, plus "errors" for
+                            emails without to/from when sent with
+                            x-batch-validation: permissive
+    GET  /stats          -> request, connection and email counters
+    POST /stats          -> resets the counters
+
+--connect-latency-ms is added once per new TCP connection, standing in for
+the TCP + TLS handshake to the real API. --latency-ms is added to every
+request, standing in for the network round trip plus API processing. With
+both set, the benchmark shows what connection reuse saves.
+
+Usage:
+    python fake_resend.py --port 8025 --latency-ms 30 --connect-latency-ms 60
+    RESEND_API_URL=http://127.0.0.1:8025 RESEND_API_KEY=test python serve.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import uuid
+
+
+class FakeResend:
+    def __init__(self, latency=0.0, connect_latency=0.0, fail_rate=0.0):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.fail_rate = fail_rate
+        self.reset()
+
+    def reset(self):
+        self.stats = {"connections": 0, "requests": 0, "emails": 0, "batches": 0, "failures": 0}
+
+    async def handle(self, reader, writer):
+        self.stats["connections"] += 1
+        if self.connect_latency:
+            await asyncio.sleep(self.connect_latency)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0") or 0))
+                status, payload = await self.route(method, path, headers, body)
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, headers, body):
+        if path == "/stats":
+            if method == "POST":
+                self.reset()
+            return 200, self.stats
+        self.stats["requests"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            self.stats["failures"] += 1
+            return 500, {"statusCode": 500, "name": "internal_server_error", "message": "simulated failure"}
+        if method == "POST" and path == "/emails":
+            self.stats["emails"] += 1
+            return 200, {"id": str(uuid.uuid4())}
+        if method == "POST" and path == "/emails/batch":
+            emails = json.loads(body or b"[]")
+            if len(emails) > 100:
+                return 422, {"statusCode": 422, "name": "validation_error",
+                             "message": "Batch cannot contain more than 100 emails"}
+            invalid = [index for index, email in enumerate(emails) if not email.get("to") or not email.get("from")]
+            if invalid and headers.get("x-batch-validation") != "permissive":
+                return 422, {"statusCode": 422, "name": "validation_error",
+                             "message": f"emails[{invalid[0]}] is missing `to` or `from`"}
+            self.stats["batches"] += 1
+            self.stats["emails"] += len(emails) - len(invalid)
+            response = {"data": [{"id": str(uuid.uuid4())} for _ in range(len(emails) - len(invalid))]}
+            if invalid:
+                response["errors"] = [{"index": index, "message": "Missing `to` or `from` field"} for index in invalid]
+            return 200, response
+        return 404, {"statusCode": 404, "name": "not_found", "message": f"{method} {path}"}
+
+
+async def serve(host, port, fake):
+    server = await asyncio.start_server(fake.handle, host, port)
+    print(f"Fake Resend API listening on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Resend API for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every request")
+    parser.add_argument("--connect-latency-ms", type=float, default=0.0, help="added once per new connection")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    args = parser.parse_args()
+    fake = FakeResend(args.latency_ms / 1000, args.connect_latency_ms / 1000, args.fail_rate)
+    try:
+        asyncio.run(serve(args.host, args.port, fake))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
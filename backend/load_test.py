@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+AximoIX API load-test harness
+
+Drives concurrent virtual users against a locally started server (and a local
+mongod) with a weighted mix of scenarios modelled on real visits:
+
+    page_load       GET /api/company + GET /api/services
+    modal_open      GET /api/services/{id}
+    contact_submit  POST /api/contact
+
+Reports throughput, p50/p95/p99 latency and error rates per endpoint and per
+scenario as JSON so runs can be compared.
+
+Usage:
+    python load_test.py --users 50 --duration 30
+    python load_test.py --mongod --users 100 --workers 2 --output run.json
+    python load_test.py --base-url http://127.0.0.1:8000 --mix page_load=1,contact_submit=1
+
+By default the harness starts `serve.py` on a free port, pointed at
+MONGO_URL (or mongodb://localhost:27017). Pass --mongod to also start a
+throwaway mongod on a temporary data directory. RESEND_API_KEY is removed
+from the server environment so contact submits never send real email.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+BACKEND_DIR = Path(__file__).parent
+
+SERVICE_IDS = ["1", "2", "3", "4", "5"]
+DEFAULT_MIX = {"page_load": 6, "modal_open": 3, "contact_submit": 1}
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client; one per virtual user"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None):
+        """Send one request and return (status, body bytes); reconnects on demand"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            "Connection: keep-alive\r\n"
+            "Accept: application/json\r\n"
+        )
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+        try:
+            self.writer.write(head.encode() + b"\r\n" + payload)
+            await self.writer.drain()
+            raw_head = await self.reader.readuntil(b"\r\n\r\n")
+            status = int(raw_head.split(b" ", 2)[1])
+            length = 0
+            for line in raw_head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            data = await self.reader.readexactly(length)
+            return status, data
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            raise
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Recorder:
+    """Collects latency samples and outcomes per endpoint and per scenario"""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.scenarios = {}
+        self.status_codes = {}
+
+    def _bucket(self, table, name):
+        return table.setdefault(name, {"latencies": [], "errors": 0})
+
+    def record_request(self, name, latency, status):
+        bucket = self._bucket(self.endpoints, name)
+        bucket["latencies"].append(latency)
+        key = str(status)
+        self.status_codes[key] = self.status_codes.get(key, 0) + 1
+        if status == "error" or status >= 400:
+            bucket["errors"] += 1
+
+    def record_scenario(self, name, latency, ok):
+        bucket = self._bucket(self.scenarios, name)
+        bucket["latencies"].append(latency)
+        if not ok:
+            bucket["errors"] += 1
+
+
+async def timed_request(connection, recorder, name, method, path, body=None):
+    started = time.perf_counter()
+    try:
+        status, _ = await connection.request(method, path, body)
+    except Exception:
+        status = "error"
+    recorder.record_request(name, time.perf_counter() - started, status)
+    return status != "error" and status < 400
+
+
+# ============ SCENARIOS ============
+
+async def page_load(connection, recorder):
+    ok_company = await timed_request(connection, recorder, "GET /api/company", "GET", "/api/company")
+    ok_services = await timed_request(connection, recorder, "GET /api/services", "GET", "/api/services")
+    return ok_company and ok_services
+
+
+async def modal_open(connection, recorder):
+    service_id = random.choice(SERVICE_IDS)
+    return await timed_request(
+        connection, recorder, "GET /api/services/{id}", "GET", f"/api/services/{service_id}"
+    )
+
+
+async def contact_submit(connection, recorder):
+    body = {
+        "name": "Load Test User",
+        "email": f"loadtest+{uuid.uuid4().hex[:8]}@example.com",
+        "service_interest": random.choice(["AI Solutions", "ICT Solutions", "Financial Technology"]),
+        "message": "Load test submission - safe to delete.",
+    }
+    return await timed_request(connection, recorder, "POST /api/contact", "POST", "/api/contact", body)
+
+
+SCENARIOS = {
+    "page_load": page_load,
+    "modal_open": modal_open,
+    "contact_submit": contact_submit,
+}
+
+
+async def virtual_user(host, port, mix, stop_at, start_delay, think_time, recorder):
+    await asyncio.sleep(start_delay)
+    loop = asyncio.get_running_loop()
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    connection = HttpConnection(host, port)
+    try:
+        while loop.time() < stop_at:
+            name = random.choices(names, weights)[0]
+            started = time.perf_counter()
+            ok = await SCENARIOS[name](connection, recorder)
+            recorder.record_scenario(name, time.perf_counter() - started, ok)
+            if think_time:
+                await asyncio.sleep(random.uniform(0, 2 * think_time))
+    finally:
+        connection.close()
+
+
+async def run_load(host, port, users, duration, mix, ramp_up=0.0, think_time=0.0):
+    recorder = Recorder()
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + ramp_up + duration
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        virtual_user(host, port, mix, stop_at, ramp_up * i / max(users, 1), think_time, recorder)
+        for i in range(users)
+    ])
+    return recorder, time.perf_counter() - started
+
+
+# ============ REPORTING ============
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(bucket, elapsed):
+    latencies = sorted(bucket["latencies"])
+    count = len(latencies)
+    to_ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        "count": count,
+        "errors": bucket["errors"],
+        "error_rate": round(bucket["errors"] / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": to_ms(sum(latencies) / count) if count else None,
+            "p50": to_ms(percentile(latencies, 0.50)),
+            "p95": to_ms(percentile(latencies, 0.95)),
+            "p99": to_ms(percentile(latencies, 0.99)),
+            "max": to_ms(latencies[-1]) if latencies else None,
+        },
+    }
+
+
+def build_report(recorder, elapsed, config):
+    all_requests = {"latencies": [], "errors": 0}
+    for bucket in recorder.endpoints.values():
+        all_requests["latencies"].extend(bucket["latencies"])
+        all_requests["errors"] += bucket["errors"]
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "config": config,
+        "elapsed_s": round(elapsed, 3),
+        "totals": summarize(all_requests, elapsed),
+        "status_codes": recorder.status_codes,
+        "endpoints": {name: summarize(b, elapsed) for name, b in sorted(recorder.endpoints.items())},
+        "scenarios": {name: summarize(b, elapsed) for name, b in sorted(recorder.scenarios.items())},
+    }
+
+
+# ============ LOCAL SERVER / MONGOD ============
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url, timeout=90.0):
+    """Poll /api/ping until the server answers or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/api/ping", timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+
+def start_mongod():
+    """Start a throwaway mongod on a temp data dir; returns (process, url, dbpath)"""
+    binary = os.getenv("MONGOD_BIN") or shutil.which("mongod")
+    if not binary:
+        raise RuntimeError("mongod not found - install MongoDB or set MONGOD_BIN")
+    port = free_port()
+    dbpath = tempfile.mkdtemp(prefix="aximoix-loadtest-")
+    process = subprocess.Popen(
+        [binary, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, f"mongodb://127.0.0.1:{port}/aximoix_loadtest", dbpath
+        except OSError:
+            time.sleep(0.25)
+    process.kill()
+    raise RuntimeError("mongod did not start within 30s")
+
+
+def start_server(port, workers, mongo_url):
+    env = dict(os.environ, PORT=str(port), HOST="127.0.0.1", WEB_CONCURRENCY=str(workers))
+    env.pop("RESEND_API_KEY", None)
+    if mongo_url:
+        env["MONGO_URL"] = mongo_url
+        env.pop("MONGODB_URL", None)
+    return subprocess.Popen(
+        [sys.executable, "serve.py"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def stop_process(process, timeout=40):
+    if process is None:
+        return
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent load test for the AximoIX API")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds after ramp-up starts")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="seconds over which users start")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between scenarios (s)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="scenario weights, e.g. page_load=6,modal_open=3,contact_submit=1")
+    parser.add_argument("--base-url", help="target an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="workers for the locally started server")
+    parser.add_argument("--mongo-url", help="MongoDB URL for the local server (default: MONGO_URL)")
+    parser.add_argument("--mongod", action="store_true", help="start a throwaway local mongod")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    mongod = server = None
+    dbpath = None
+    try:
+        mongo_url = args.mongo_url or os.getenv("MONGO_URL") or "mongodb://localhost:27017/aximoix_loadtest"
+        if args.base_url:
+            base_url = args.base_url.rstrip("/")
+        else:
+            if args.mongod:
+                mongod, mongo_url, dbpath = start_mongod()
+                print(f"🍃 Started mongod at {mongo_url}", file=sys.stderr)
+            port = free_port()
+            server = start_server(port, args.workers, mongo_url)
+            base_url = f"http://127.0.0.1:{port}"
+            print(f"🚀 Starting server on {base_url} with {args.workers} worker(s)", file=sys.stderr)
+        if not wait_until_ready(base_url):
+            raise RuntimeError(f"server at {base_url} did not become ready")
+
+        target = urlparse(base_url)
+        print(f"⏱️  {args.users} users for {args.duration}s, mix={args.mix}", file=sys.stderr)
+        recorder, elapsed = asyncio.run(run_load(
+            target.hostname, target.port or 80, args.users, args.duration,
+            args.mix, args.ramp_up, args.think_time,
+        ))
+        report = build_report(recorder, elapsed, {
+            "base_url": base_url,
+            "users": args.users,
+            "duration_s": args.duration,
+            "ramp_up_s": args.ramp_up,
+            "think_time_s": args.think_time,
+            "mix": args.mix,
+            "workers": None if args.base_url else args.workers,
+            "mongod": "local" if args.mongod else ("external" if not args.base_url else None),
+        })
+    finally:
+        stop_process(server)
+        stop_process(mongod, timeout=15)
+        if dbpath:
+            shutil.rmtree(dbpath, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+    return 0 if report["totals"]["error_rate"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Event-loop health: scheduling lag histogram and blocking-call detection
+
+Any synchronous work in an async handler stalls every other request on the
+worker until it returns. That includes a pymongo call, a blocking HTTP call
+and heavy printing. LoopLagMonitor makes such stalls visible in two ways:
+
+- **Lag.** A task on the loop sleeps `interval` seconds at a time. How late
+  it wakes up is the loop's scheduling lag, and each wake-up is observed into
+  a histogram with cumulative, Prometheus-style millisecond buckets.
+- **Blocking stacks.** A watchdog thread checks the loop's heartbeat. When
+  the loop has not come back for `threshold` seconds, the watchdog reads the
+  loop thread's stack from sys._current_frames(). The stack is taken while
+  the loop is still blocked, so it shows the call that is blocking it and the
+  innermost coroutine that made the call. One event is recorded per stall.
+  Its `lag_ms` is updated when the loop recovers.
+
+A stall caught with the loop parked in select() is not counted, neither as
+an event nor in the histogram. The loop had nothing to run: another thread
+was holding the GIL (threadpool work) or the process was descheduled, and
+nothing a handler did on the loop would show up that way.
+
+Events are kept in a ring of the last MAX_EVENTS. server.py runs a monitor
+per worker (LOOP_MONITOR, on by default) and reports it at /api/loop-health.
+check_loop_blocking.py runs every route once in strict mode and fails when
+any of them blocks the loop for longer than --max-ms.
+"""
+
+import asyncio
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+MAX_EVENTS = 20
+MAX_STACK_FRAMES = 40
+
+
+class LagHistogram:
+    """Cumulative histogram of lag samples, in milliseconds"""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms):
+        with self._lock:
+            self.count += 1
+            self.sum_ms += value_ms
+            self.max_ms = max(self.max_ms, value_ms)
+            for index, bound in enumerate(self.buckets):
+                if value_ms <= bound:
+                    self._counts[index] += 1
+                    break
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None past the last bucket)"""
+        with self._lock:
+            target = q * self.count
+            seen = 0
+            for bound, count in zip(self.buckets, self._counts):
+                seen += count
+                if seen >= target and self.count:
+                    return bound
+            return None
+
+    def snapshot(self):
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets, self._counts):
+                cumulative += count
+                buckets[f"le_{bound}"] = cumulative
+            buckets["le_inf"] = self.count
+            return {
+                "count": self.count,
+                "sum_ms": round(self.sum_ms, 3),
+                "max_ms": round(self.max_ms, 3),
+                "buckets": buckets,
+            }
+
+
+def _format_stack(frame):
+    """(frames innermost last, innermost coroutine) for a thread's current frame"""
+    frames = []
+    coroutine = None
+    while frame is not None and len(frames) < MAX_STACK_FRAMES:
+        code = frame.f_code
+        location = f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+        frames.append(location)
+        if coroutine is None and code.co_flags & inspect.CO_COROUTINE:
+            coroutine = location
+        frame = frame.f_back
+    frames.reverse()
+    return frames, coroutine
+
+
+def waiting(stack):
+    """Whether a loop thread's stack (innermost last) is the loop idling in select()"""
+    return (len(stack) >= 2 and stack[-1].startswith("select (selectors.py")
+            and stack[-2].startswith("_run_once (base_events.py"))
+
+
+class LoopLagMonitor:
+    def __init__(self, interval=0.1, threshold=0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = LagHistogram()
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.blocked_total = 0
+        self._beat = None
+        self._loop = None
+        self._loop_thread_id = None
+        self._task = None
+        self._watchdog = None
+        self._stop = threading.Event()
+        self._open_event = None
+        self._idle_stall = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self, loop=None):
+        """Start on `loop` (default: the running loop); call from the loop's thread"""
+        if self.running:
+            return self
+        if self._watchdog is not None and self._watchdog.is_alive():
+            # The previous run's watchdog may not have seen stop() yet; clearing
+            # _stop under it would leave two watchdogs on one monitor
+            self._stop.set()
+            self._watchdog.join()
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _measure(self):
+        loop = self._loop
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self._heartbeat(lag)
+
+    def _heartbeat(self, lag):
+        with self._lock:
+            idle, self._idle_stall = self._idle_stall and self._open_event is None, False
+            if not idle:
+                self.histogram.observe(lag * 1000)
+            self._beat = time.monotonic()
+            if self._open_event is not None:
+                # The stall is over: record how long the loop was actually held up
+                self._open_event["lag_ms"] = round(max(self._open_event["lag_ms"], lag * 1000), 1)
+                self._open_event = None
+
+    def _watch(self):
+        poll = max(0.005, self.threshold / 4)
+        while not self._stop.wait(poll):
+            with self._lock:
+                stalled = time.monotonic() - self._beat - self.interval
+                if stalled < self.threshold or self._open_event is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                stack, coroutine = _format_stack(frame)
+                if waiting(stack):
+                    # Look again on the next poll: the loop may wake up and block
+                    self._idle_stall = True
+                    continue
+                self._open_event = {
+                    "at": datetime.utcnow().isoformat(),
+                    "lag_ms": round(stalled * 1000, 1),
+                    "coroutine": coroutine,
+                    "blocking_call": stack[-1] if stack else None,
+                    "stack": stack,
+                }
+                self.events.append(self._open_event)
+                self.blocked_total += 1
+            print(f"🐢 Event loop blocked for {stalled * 1000:.0f}+ ms in {coroutine or 'a callback'}: "
+                  f"{stack[-1] if stack else '?'}")
+
+    def clear_events(self):
+        with self._lock:
+            self.events.clear()
+            self._open_event = None
+            self._idle_stall = False
+
+    def blocking_events(self, min_lag_ms=0):
+        with self._lock:
+            return [dict(event) for event in self.events if event["lag_ms"] >= min_lag_ms]
+
+    def metrics(self):
+        return {
+            "running": self.running,
+            "interval_ms": round(self.interval * 1000, 1),
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "lag_ms": {
+                **self.histogram.snapshot(),
+                "p50_le": self.histogram.quantile(0.5),
+                "p99_le": self.histogram.quantile(0.99),
+            },
+            "blocked_total": self.blocked_total,
+            "recent_blocking": self.blocking_events(),
+        }
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Batched contact notifications over Resend's batch API
+
+BatchMailer queues notifications and sends them through
+transport.send_batch(). A batch goes out as soon as `max_batch_size`
+notifications are queued (at most 100, Resend's limit), or `flush_interval`
+seconds after the first one was queued. Each submit() resolves to that
+notification's own result, {"id": ...} or {"error": ...}. A lead import or
+outage backlog of N notifications then takes N / 100 round trips instead of N.
+
+`on_sent(keys)` is called once per batch with the keys of the notifications
+that were accepted. send_pending() uses it to set `email_sent` on those
+contacts batch by batch, so an interrupted run never re-sends a batch that was
+already recorded. Each batch also carries an Idempotency-Key derived from its
+keys, so Resend drops a retried batch it has already accepted.
+
+Pending notifications are contacts with status "new" and `email_sent: false`
+created in the last --days days. They are the contacts whose notification
+failed (Resend down, circuit open) or that were imported or replayed from the
+contact spool without one.
+
+Usage:
+    python mail_batcher.py --days 7 --dry-run
+    python mail_batcher.py --days 7 --limit 5000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import os
+import sys
+from datetime import datetime, timedelta
+
+import tracing
+from mail_transport import MAX_BATCH_SIZE
+
+
+class BatchMailer:
+    def __init__(self, transport, max_batch_size=MAX_BATCH_SIZE, flush_interval=0.5,
+                 on_sent=None, breaker=None, timeout=None):
+        self.transport = transport
+        self.max_batch_size = max(1, min(max_batch_size, MAX_BATCH_SIZE))
+        self.flush_interval = flush_interval
+        self.on_sent = on_sent
+        self.breaker = breaker
+        self.timeout = timeout
+        self._pending = []
+        self._timer = None
+        self._loop = None
+        self._in_flight = set()
+        self._counters = {"queued": 0, "batches": 0, "sent": 0, "failed": 0}
+
+    def _check_loop(self):
+        # Queued futures belong to one event loop; drop state left by an old loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._pending = []
+            self._timer = None
+            self._in_flight = set()
+            self._loop = loop
+        return loop
+
+    async def submit(self, key, params):
+        """Queue one notification and wait for its result"""
+        return await self.enqueue(key, params)
+
+    def enqueue(self, key, params):
+        """Queue one notification; returns a future for its result"""
+        loop = self._check_loop()
+        future = loop.create_future()
+        self._pending.append((key, params, future))
+        self._counters["queued"] += 1
+        if len(self._pending) >= self.max_batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, self._start_flush)
+        return future
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            task = asyncio.ensure_future(self._send(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def flush(self):
+        """Send everything queued now and wait for the batches in flight"""
+        self._check_loop()
+        self._start_flush()
+        if self._in_flight:
+            await asyncio.gather(*list(self._in_flight), return_exceptions=True)
+
+    @staticmethod
+    def idempotency_key(keys):
+        return "batch-" + hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()[:32]
+
+    async def _send(self, batch):
+        keys = [key for key, _, _ in batch]
+        params_list = [params for _, params, _ in batch]
+        with tracing.span("mail.send_batch", "client", {"mail.batch_size": len(batch)}) as span:
+            try:
+                call = self.transport.send_batch
+                args = (params_list, self.timeout, self.idempotency_key(keys))
+                if self.breaker is not None:
+                    results = await self.breaker.call_async(call, *args)
+                else:
+                    results = await call(*args)
+            except Exception as e:
+                results = [{"error": f"{type(e).__name__}: {e}"}] * len(batch)
+                span.set_error(results[0]["error"])
+            span.set_attribute("mail.failed", sum(1 for result in results if "id" not in result))
+        self._counters["batches"] += 1
+
+        sent_keys = [key for key, result in zip(keys, results) if "id" in result]
+        self._counters["sent"] += len(sent_keys)
+        self._counters["failed"] += len(batch) - len(sent_keys)
+        if sent_keys and self.on_sent is not None:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.on_sent, sent_keys)
+            except Exception as e:
+                print(f"⚠️ Could not record {len(sent_keys)} sent notification(s): {type(e).__name__}: {e}")
+
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def metrics(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "flush_interval_ms": round(self.flush_interval * 1000),
+            "pending": len(self._pending),
+            **self._counters,
+        }
+
+
+# ============ PENDING NOTIFICATIONS ============
+
+def pending_filter(days, now=None):
+    since = (now or datetime.utcnow()) - timedelta(days=days)
+    return {"status": "new", "email_sent": False, "created_at": {"$gte": since}}
+
+
+def mark_email_sent(contacts, contact_ids):
+    """Record accepted notifications on their contacts"""
+    return contacts.update_many({"id": {"$in": list(contact_ids)}}, {"$set": {"email_sent": True}}).modified_count
+
+
+async def send_pending(contacts, transport, build_email, days=7, limit=0, max_batch_size=MAX_BATCH_SIZE,
+                       breaker=None, timeout=None, dry_run=False, should_stop=None):
+    """Send notifications for pending contacts in batches, marking each batch as it is accepted
+
+    The cursor is created, read one batch at a time and closed in the default
+    executor, so only one batch of contacts is in memory and the event loop
+    never waits on MongoDB (closing a cursor can send killCursors).
+    should_stop() is checked before each batch, e.g. to stay inside a request
+    budget; `stopped_early` in the result says whether it ended the run.
+    """
+    loop = asyncio.get_running_loop()
+    query = pending_filter(days)
+    if dry_run:
+        return {"pending": await loop.run_in_executor(None, contacts.count_documents, query), "dry_run": True}
+
+    mailer = BatchMailer(transport, max_batch_size, flush_interval=0, breaker=breaker, timeout=timeout,
+                         on_sent=lambda contact_ids: mark_email_sent(contacts, contact_ids))
+
+    def open_cursor():
+        cursor = contacts.find(query, {"_id": 0}).sort([("created_at", 1), ("id", 1)])
+        cursor = cursor.batch_size(mailer.max_batch_size)
+        return cursor.limit(limit) if limit else cursor
+
+    cursor = await loop.run_in_executor(None, open_cursor)
+    rows = iter(cursor)
+    total = 0
+    errors = set()
+    stopped_early = False
+    try:
+        while True:
+            if should_stop and should_stop():
+                stopped_early = True
+                break
+            chunk = await loop.run_in_executor(None, lambda: list(itertools.islice(rows, mailer.max_batch_size)))
+            if not chunk:
+                break
+            total += len(chunk)
+            submissions = [mailer.enqueue(contact["id"], build_email(contact)) for contact in chunk]
+            await mailer.flush()
+            errors.update(result["error"] for result in await asyncio.gather(*submissions) if "error" in result)
+    finally:
+        await loop.run_in_executor(None, cursor.close)
+    return {**mailer.metrics(), "contacts": total, "errors": sorted(errors)[:10], "stopped_early": stopped_early}
+
+
+# ============ CLI ============
+
+def main():
+    parser = argparse.ArgumentParser(description="Send pending contact notifications in batches")
+    parser.add_argument("--days", type=int, default=7, help="only contacts created in the last N days")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="count pending notifications only")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import server
+
+    if server.mail_transport is None and not args.dry_run:
+        sys.exit("Mail is not configured (set RESEND_API_KEY)")
+
+    async def run():
+        try:
+            return await send_pending(server.db.contacts, server.mail_transport, server.build_contact_email,
+                                      args.days, args.limit, args.batch_size, server.resend_breaker,
+                                      dry_run=args.dry_run)
+        finally:
+            if server.mail_transport is not None:
+                await server.mail_transport.aclose()
+
+    print(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
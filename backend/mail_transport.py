@@ -0,0 +1,300 @@
+"""
+Pluggable mail transports for contact notifications
+
+Every transport implements the same coroutine interface:
+
+    await transport.send(params, timeout=None)    -> {"id": ...}
+    await transport.send_batch(params_list, timeout=None, idempotency_key=None)
+                                                  -> [{"id": ...} | {"error": ...}, ...]
+    await transport.aclose()
+
+send_batch() posts up to MAX_BATCH_SIZE emails in one call to Resend's batch
+API, in permissive validation mode: an invalid email fails on its own instead
+of failing the whole batch. Results are returned in input order.
+
+`params` is the Resend email payload built by build_contact_email().
+
+Transports:
+    ResendHttpTransport  async httpx client that keeps a pool of keep-alive
+                         connections to the Resend API (HTTP/2 when the `h2`
+                         package is installed). An asyncio.Semaphore caps the
+                         number of concurrent sends. Runs in the event loop
+                         without tying up a threadpool thread per message.
+    ResendSdkTransport   the resend SDK's blocking Emails.send, run in the
+                         threadpool. Fallback when httpx is not installed.
+    FakeTransport        records payloads in memory and can simulate latency
+                         and failures, for tests and local runs.
+
+Point RESEND_API_URL at a local server (see fake_resend.py) to exercise the
+real HTTP path without sending mail.
+"""
+
+import abc
+import asyncio
+import importlib.util
+import itertools
+
+RESEND_API_URL = "https://api.resend.com"
+# Resend's limit on emails per batch call
+MAX_BATCH_SIZE = 100
+
+
+class MailTransportError(Exception):
+    """The mail API rejected a request or could not be reached"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class MailTransport(abc.ABC):
+    name = "base"
+
+    @abc.abstractmethod
+    async def send(self, params, timeout=None):
+        """Send one email; returns {"id": ...}"""
+
+    @abc.abstractmethod
+    async def send_batch(self, params_list, timeout=None, idempotency_key=None):
+        """Send up to MAX_BATCH_SIZE emails in one call; one result per email, in order"""
+
+    async def aclose(self):
+        pass
+
+    def metrics(self):
+        return {"transport": self.name}
+
+
+def map_batch_results(count, response):
+    """Align a permissive-mode batch response with the `count` emails that were sent"""
+    # `data` holds ids for the accepted emails only, in order; `errors` names the rejected indexes
+    errors = {error["index"]: error.get("message", "rejected") for error in response.get("errors") or []}
+    accepted = iter(response.get("data") or [])
+    results = []
+    for index in range(count):
+        if index in errors:
+            results.append({"error": errors[index]})
+        else:
+            item = next(accepted, None)
+            results.append({"id": item.get("id")} if item else {"error": "missing from batch response"})
+    return results
+
+
+class ResendHttpTransport(MailTransport):
+    name = "resend-http"
+
+    def __init__(self, api_key, base_url=RESEND_API_URL, timeout=5.0, max_connections=10,
+                 max_keepalive_connections=10, keepalive_expiry=60.0, concurrency=10, http2=None):
+        # httpx is imported on the first send, not at startup; fail now if it is missing
+        if importlib.util.find_spec("httpx") is None:
+            raise ImportError("httpx is not installed")
+        self._httpx = None
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.concurrency = concurrency
+        self.http2 = importlib.util.find_spec("h2") is not None if http2 is None else http2
+        self._client = None
+        self._loop = None
+        self._semaphore = None
+        self._closing = set()
+        self._counters = {"sent": 0, "failed": 0, "batches": 0}
+
+    def _ensure_client(self):
+        # Clients and semaphores are bound to one event loop; serverless
+        # runtimes may run each invocation on a fresh loop
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            if self._client is not None:
+                self._retire(self._client, self._loop)
+            if self._httpx is None:
+                import httpx
+                self._httpx = httpx
+            self._client = self._httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=self.http2,
+                limits=self._httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=self.timeout,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Accept": "application/json",
+                    "User-Agent": "aximoix-backend",
+                },
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._client
+
+    def _retire(self, client, loop):
+        """Close the client of a previous event loop instead of leaking its pool"""
+        if loop.is_running() and not loop.is_closed():
+            # Its connections belong to that loop (another thread's); close them there
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        task = asyncio.get_running_loop().create_task(self._close_quietly(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_quietly(client):
+        try:
+            await client.aclose()
+        except RuntimeError:
+            # "Event loop is closed": its sockets can't be shut down cleanly,
+            # but the pool is released and the client is marked closed
+            pass
+
+    async def _post(self, path, payload, timeout, headers=None):
+        client = self._ensure_client()
+        async with self._semaphore:
+            try:
+                response = await client.post(path, json=payload, headers=headers,
+                                             timeout=timeout if timeout is not None else self.timeout)
+            except self._httpx.HTTPError as e:
+                self._counters["failed"] += 1
+                raise MailTransportError(f"{type(e).__name__}: {e}") from e
+        if response.status_code >= 400:
+            self._counters["failed"] += 1
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise MailTransportError(f"Resend API error {response.status_code}: {message}", response.status_code)
+        return response.json()
+
+    async def send(self, params, timeout=None):
+        result = await self._post("/emails", params, timeout)
+        self._counters["sent"] += 1
+        return result
+
+    async def send_batch(self, params_list, timeout=None, idempotency_key=None):
+        headers = {"x-batch-validation": "permissive"}
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        response = await self._post("/emails/batch", params_list, timeout, headers)
+        results = map_batch_results(len(params_list), response)
+        self._counters["batches"] += 1
+        self._counters["sent"] += sum(1 for result in results if "id" in result)
+        self._counters["failed"] += sum(1 for result in results if "error" in result)
+        return results
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def metrics(self):
+        return {
+            "transport": self.name,
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "concurrency": self.concurrency,
+            **self._counters,
+        }
+
+
+class ResendSdkTransport(MailTransport):
+    name = "resend-sdk"
+
+    def __init__(self, configure=None):
+        # configure(resend) runs once, when the SDK is first imported
+        self.configure = configure
+        self._resend = None
+        self._counters = {"sent": 0, "failed": 0, "batches": 0}
+
+    def _sdk(self):
+        if self._resend is None:
+            import resend
+            if self.configure is not None:
+                self.configure(resend)
+            self._resend = resend
+        return self._resend
+
+    async def send(self, params, timeout=None):
+        from starlette.concurrency import run_in_threadpool
+
+        resend = self._sdk()
+        try:
+            # The SDK client reads the request deadline itself (see server.py)
+            result = await run_in_threadpool(resend.Emails.send, params)
+        except Exception as e:
+            self._counters["failed"] += 1
+            raise MailTransportError(f"{type(e).__name__}: {e}") from e
+        self._counters["sent"] += 1
+        return result
+
+    async def send_batch(self, params_list, timeout=None, idempotency_key=None):
+        from starlette.concurrency import run_in_threadpool
+
+        resend = self._sdk()
+        options = {"batch_validation": "permissive"}
+        if idempotency_key:
+            options["idempotency_key"] = idempotency_key
+        try:
+            response = await run_in_threadpool(resend.Batch.send, params_list, options)
+        except Exception as e:
+            self._counters["failed"] += len(params_list)
+            raise MailTransportError(f"{type(e).__name__}: {e}") from e
+        results = map_batch_results(len(params_list), response)
+        self._counters["batches"] += 1
+        self._counters["sent"] += sum(1 for result in results if "id" in result)
+        self._counters["failed"] += sum(1 for result in results if "error" in result)
+        return results
+
+    def metrics(self):
+        return {"transport": self.name, **self._counters}
+
+
+class FakeTransport(MailTransport):
+    name = "fake"
+
+    def __init__(self, latency=0.0, fail_every=0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.sent = []
+        self.batches = 0
+        self._calls = itertools.count(1)
+
+    async def send(self, params, timeout=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_every and next(self._calls) % self.fail_every == 0:
+            raise MailTransportError("simulated failure", 500)
+        self.sent.append(params)
+        return {"id": f"fake-{len(self.sent)}"}
+
+    async def send_batch(self, params_list, timeout=None, idempotency_key=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.batches += 1
+        results = []
+        for params in params_list:
+            if self.fail_every and next(self._calls) % self.fail_every == 0:
+                results.append({"error": "simulated failure"})
+            else:
+                self.sent.append(params)
+                results.append({"id": f"fake-{len(self.sent)}"})
+        return results
+
+    def metrics(self):
+        return {"transport": self.name, "sent": len(self.sent), "batches": self.batches}
+
+
+def create_transport(kind, api_key, configure_sdk=None, **options):
+    """Transport for MAIL_TRANSPORT: "http" (default), "sdk" or "fake"; falls back to the SDK without httpx"""
+    if kind == "fake":
+        return FakeTransport()
+    if kind == "http":
+        try:
+            return ResendHttpTransport(api_key, **options)
+        except ImportError:
+            print("⚠️ httpx not installed - using the resend SDK transport")
+    return ResendSdkTransport(configure_sdk)
@@ -0,0 +1,499 @@
+"""
+In-memory document store with a PyMongo-compatible subset
+
+Used when MongoDB is unavailable (demo mode), for local development
+(STORAGE_BACKEND=memory) and by the benchmark/check scripts. Documents are
+indexed by their `id` field, so the `{"id": ...}` lookups used throughout
+server.py are dict hits rather than scans.
+
+Supported surface:
+    find / find_one (with sort, skip, limit), insert_one / insert_many,
+    update_one / update_many, find_one_and_update, replace_one, count_documents,
+    delete_one / delete_many, create_index (no-op), with_options (no-op: there
+    is no replication, so write concerns don't apply)
+
+Filters: equality (including dotted paths), $eq $ne $gt $gte $lt $lte $in
+$nin $exists $regex, and top-level $and / $or. Any other operator, $text
+included (there are no text indexes here), raises ValueError instead of
+silently matching nothing.
+Updates: $set $unset $inc $setOnInsert.
+
+Optionally snapshots to a JSON file (bson.json_util, so ObjectId and datetime
+round-trip) after writes and on close, and optionally sleeps `latency` seconds
+per operation, like a network round trip, so checks can tell a driver call made
+on the event loop from one made in the threadpool.
+"""
+
+import copy
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from bson import ObjectId, json_util
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+        self.acknowledged = True
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+        self.acknowledged = True
+
+
+class UpdateResult:
+    def __init__(self, matched_count=0, modified_count=0, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+        self.acknowledged = True
+
+
+class DeleteResult:
+    def __init__(self, deleted_count=0):
+        self.deleted_count = deleted_count
+        self.acknowledged = True
+
+
+_MISSING = object()
+FIELD_OPERATORS = {"$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin", "$exists", "$regex", "$options"}
+LOGICAL_OPERATORS = {"$and", "$or"}
+
+
+def _get_path(document, path):
+    """Resolve a dotted path like 'detailed_info.technologies'"""
+    value = document
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def _set_path(document, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+
+def _unset_path(document, path):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.get(part)
+        if not isinstance(document, dict):
+            return
+    document.pop(parts[-1], None)
+
+
+def _compare(value, operator, expected):
+    if operator == "$eq":
+        return _equals(value, expected)
+    if operator == "$ne":
+        return not _equals(value, expected)
+    if operator == "$in":
+        return any(_equals(value, item) for item in expected)
+    if operator == "$nin":
+        return not any(_equals(value, item) for item in expected)
+    if operator == "$exists":
+        return (value is not _MISSING) == bool(expected)
+    if operator == "$regex":
+        return isinstance(value, str) and re.search(expected, value) is not None
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if operator == "$gt":
+            return value > expected
+        if operator == "$gte":
+            return value >= expected
+        if operator == "$lt":
+            return value < expected
+        if operator == "$lte":
+            return value <= expected
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported query operator: {operator}")
+
+
+def _equals(value, expected):
+    if value is _MISSING:
+        return expected is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        # Mongo semantics: a scalar matches any element of an array field
+        return expected in value
+    return value == expected
+
+
+def check_query(query):
+    """Raise ValueError for operators outside the supported subset"""
+    for key, condition in (query or {}).items():
+        if key in LOGICAL_OPERATORS:
+            for sub in condition:
+                check_query(sub)
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported query operator: {key}")
+        elif isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            for operator in condition:
+                if operator not in FIELD_OPERATORS:
+                    raise ValueError(f"Unsupported query operator: {operator}")
+
+
+def matches(document, query):
+    """True if `document` satisfies the (subset) Mongo `query`"""
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(document, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches(document, sub) for sub in condition):
+                return False
+            continue
+        if key.startswith("$"):
+            raise ValueError(f"Unsupported query operator: {key}")
+        value = _get_path(document, key)
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            options = condition.get("$options", "")
+            for operator, expected in condition.items():
+                if operator == "$options":
+                    continue
+                if operator == "$regex" and "i" in options:
+                    expected = re.compile(expected, re.IGNORECASE)
+                if not _compare(value, operator, expected):
+                    return False
+        elif not _equals(value, condition):
+            return False
+    return True
+
+
+def _apply_projection(document, projection):
+    if not projection:
+        return document
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        projected = {k: document[k] for k in include if k in document}
+        if projection.get("_id", 1) and "_id" in document:
+            projected["_id"] = document["_id"]
+        return projected
+    return {k: v for k, v in document.items() if projection.get(k, 1)}
+
+
+def _sort_key(value):
+    # None/missing sort first, as in MongoDB; mixed types compare by type name
+    if value is _MISSING or value is None:
+        return (0, "", 0)
+    return (1, type(value).__name__, value)
+
+
+class MemoryCursor:
+    """Lazy result set supporting the chained cursor calls used by the app"""
+
+    def __init__(self, documents, projection=None):
+        self._documents = documents
+        self._projection = projection
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=1):
+        keys = key_or_list if isinstance(key_or_list, list) else [(key_or_list, direction)]
+        for key, key_direction in reversed(keys):
+            self._documents.sort(
+                key=lambda d: _sort_key(_get_path(d, key)),
+                reverse=key_direction < 0,
+            )
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __iter__(self):
+        end = self._skip + self._limit if self._limit else None
+        for document in self._documents[self._skip:end]:
+            yield _apply_projection(copy.deepcopy(document), self._projection)
+
+    def close(self):
+        pass
+
+
+class MemoryCollection:
+    """Dict-indexed collection: `id` -> document"""
+
+    def __init__(self, name, database):
+        self.name = name
+        self.database = database
+        self._documents = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(document):
+        key = document.get("id")
+        return key if key is not None else str(document["_id"])
+
+    def _candidates(self, query):
+        """Use the id index for `{"id": <scalar>}` lookups, otherwise scan"""
+        query = query or {}
+        check_query(query)
+        key = query.get("id")
+        if key is not None and not isinstance(key, dict):
+            document = self._documents.get(key)
+            return [document] if document is not None and matches(document, query) else []
+        return [d for d in self._documents.values() if matches(d, query)]
+
+    # ---- reads ----
+
+    def find(self, filter=None, projection=None, **kwargs):
+        self.database._round_trip()
+        with self._lock:
+            return MemoryCursor(self._candidates(filter), projection)
+
+    def find_one(self, filter=None, projection=None, **kwargs):
+        self.database._round_trip()
+        with self._lock:
+            candidates = self._candidates(filter)
+            if not candidates:
+                return None
+            return _apply_projection(copy.deepcopy(candidates[0]), projection)
+
+    def count_documents(self, filter=None, **kwargs):
+        self.database._round_trip()
+        with self._lock:
+            if not filter:
+                return len(self._documents)
+            return len(self._candidates(filter))
+
+    def with_options(self, **kwargs):
+        return self
+
+    # ---- writes ----
+
+    def insert_one(self, document, **kwargs):
+        self.database._round_trip()
+        with self._lock:
+            document.setdefault("_id", ObjectId())
+            key = self._key(document)
+            if key in self._documents:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} id: {key}")
+            self._documents[key] = copy.deepcopy(document)
+        self.database._written()
+        return InsertOneResult(document["_id"])
+
+    def insert_many(self, documents, ordered=True, **kwargs):
+        return InsertManyResult([self.insert_one(document).inserted_id for document in documents])
+
+    def _apply_update(self, document, update, inserting=False):
+        if not any(key.startswith("$") for key in update):
+            raise ValueError("update only works with $ operators")
+        for operator, fields in update.items():
+            if operator == "$set" or (operator == "$setOnInsert" and inserting):
+                for path, value in fields.items():
+                    _set_path(document, path, copy.deepcopy(value))
+            elif operator == "$unset":
+                for path in fields:
+                    _unset_path(document, path)
+            elif operator == "$inc":
+                for path, amount in fields.items():
+                    current = _get_path(document, path)
+                    _set_path(document, path, (0 if current is _MISSING else current) + amount)
+            elif operator != "$setOnInsert":
+                raise ValueError(f"Unsupported update operator: {operator}")
+
+    def _upsert_base(self, filter):
+        """Seed an upserted document with the equality fields of the filter"""
+        base = {}
+        for key, value in (filter or {}).items():
+            if not key.startswith("$") and not (isinstance(value, dict) and any(k.startswith("$") for k in value)):
+                _set_path(base, key, copy.deepcopy(value))
+        return base
+
+    def _update(self, filter, update, upsert, many):
+        self.database._round_trip()
+        with self._lock:
+            targets = self._candidates(filter)
+            if not many:
+                targets = targets[:1]
+            modified = 0
+            for document in targets:
+                before = copy.deepcopy(document)
+                old_key = self._key(document)
+                self._apply_update(document, update)
+                if document != before:
+                    modified += 1
+                new_key = self._key(document)
+                if new_key != old_key:
+                    self._documents[new_key] = self._documents.pop(old_key)
+            upserted_id = None
+            if not targets and upsert:
+                document = self._upsert_base(filter)
+                self._apply_update(document, update, inserting=True)
+                self.insert_one(document)
+                upserted_id = document["_id"]
+        if modified:
+            self.database._written()
+        return UpdateResult(len(targets), modified, upserted_id)
+
+    def update_one(self, filter, update, upsert=False, **kwargs):
+        return self._update(filter, update, upsert, many=False)
+
+    def update_many(self, filter, update, upsert=False, **kwargs):
+        return self._update(filter, update, upsert, many=True)
+
+    def find_one_and_update(self, filter, update, projection=None, upsert=False,
+                            return_document=ReturnDocument.BEFORE, **kwargs):
+        self.database._round_trip()
+        with self._lock:
+            targets = self._candidates(filter)[:1]
+            if targets:
+                document = targets[0]
+                before = copy.deepcopy(document)
+                old_key = self._key(document)
+                self._apply_update(document, update)
+                new_key = self._key(document)
+                if new_key != old_key:
+                    self._documents[new_key] = self._documents.pop(old_key)
+                result = document if return_document == ReturnDocument.AFTER else before
+            elif upsert:
+                document = self._upsert_base(filter)
+                self._apply_update(document, update, inserting=True)
+                self.insert_one(document)
+                result = document if return_document == ReturnDocument.AFTER else None
+            else:
+                return None
+            result = _apply_projection(copy.deepcopy(result), projection) if result is not None else None
+        self.database._written()
+        return result
+
+    def replace_one(self, filter, replacement, upsert=False, **kwargs):
+        self.database._round_trip()
+        with self._lock:
+            targets = self._candidates(filter)[:1]
+            if targets:
+                existing = targets[0]
+                old_key = self._key(existing)
+                document = copy.deepcopy(replacement)
+                document["_id"] = existing["_id"]
+                del self._documents[old_key]
+                self._documents[self._key(document)] = document
+                self.database._written()
+                return UpdateResult(1, 1)
+            if upsert:
+                document = dict(self._upsert_base(filter), **copy.deepcopy(replacement))
+                self.insert_one(document)
+                return UpdateResult(0, 0, document["_id"])
+        return UpdateResult()
+
+    def delete_one(self, filter, **kwargs):
+        return self._delete(filter, many=False)
+
+    def delete_many(self, filter, **kwargs):
+        return self._delete(filter, many=True)
+
+    def _delete(self, filter, many):
+        self.database._round_trip()
+        with self._lock:
+            targets = self._candidates(filter)
+            if not many:
+                targets = targets[:1]
+            for document in targets:
+                del self._documents[self._key(document)]
+        if targets:
+            self.database._written()
+        return DeleteResult(len(targets))
+
+    def create_index(self, keys, **kwargs):
+        # Lookups by `id` are always indexed; other indexes are not needed in memory
+        if isinstance(keys, str):
+            return f"{keys}_1"
+        return "_".join(f"{key}_{direction}" for key, direction in keys)
+
+    def drop(self):
+        with self._lock:
+            self._documents.clear()
+        self.database._written()
+
+
+class MemoryDatabase:
+    """Collection namespace with optional JSON snapshotting"""
+
+    def __init__(self, name="demo_db", snapshot_path=None, snapshot_interval=2.0, latency=0.0):
+        self.name = name
+        self.latency = latency
+        self._collections = {}
+        self._lock = threading.Lock()
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.snapshot_interval = snapshot_interval
+        self._dirty = False
+        self._last_snapshot = 0.0
+        if self.snapshot_path and self.snapshot_path.exists():
+            self.load_snapshot()
+
+    def get_collection(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(name, self)
+            return self._collections[name]
+
+    def __getitem__(self, name):
+        return self.get_collection(name)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.get_collection(name)
+
+    def list_collection_names(self):
+        self._round_trip()
+        return [name for name, collection in self._collections.items() if collection._documents]
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    # ---- snapshots ----
+
+    def _written(self):
+        self._dirty = True
+        if self.snapshot_path and time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self.save_snapshot()
+
+    def save_snapshot(self):
+        """Atomically write every collection to the snapshot file"""
+        if not self.snapshot_path:
+            return
+        data = {}
+        for name, collection in list(self._collections.items()):
+            with collection._lock:
+                data[name] = list(collection._documents.values())
+        temporary = self.snapshot_path.with_suffix(self.snapshot_path.suffix + ".tmp")
+        temporary.parent.mkdir(parents=True, exist_ok=True)
+        # json_util keeps ObjectId/datetime intact across restarts
+        temporary.write_text(json_util.dumps(data))
+        os.replace(temporary, self.snapshot_path)
+        self._dirty = False
+        self._last_snapshot = time.monotonic()
+
+    def load_snapshot(self):
+        data = json_util.loads(self.snapshot_path.read_text())
+        for name, documents in data.items():
+            collection = self.get_collection(name)
+            for document in documents:
+                collection._documents[collection._key(document)] = document
+
+    def close(self):
+        if self._dirty:
+            self.save_snapshot()
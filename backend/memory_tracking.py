@@ -0,0 +1,218 @@
+"""
+Allocation instrumentation with tracemalloc: per-route peak / net bytes and snapshot diffs
+
+tracemalloc records every Python allocation with the line that made it. That
+makes a request about three times slower, so it only runs when asked for:
+
+- **Per route.** With MEMORY_TRACKING=1, server.py starts tracemalloc at
+  import and registers a middleware that records, for each route, the peak
+  and net bytes allocated while the request ran. The middleware is not
+  registered when the flag is off.
+- **Snapshots.** The admin endpoints start tracemalloc on the first snapshot
+  and keep the last MAX_SNAPSHOTS snapshots. A diff against an earlier
+  snapshot lists the lines whose allocations grew the most, which is how a
+  leak shows up.
+
+Both numbers are process-wide. Peak is the highest traced total during the
+request, minus the total when it started. Net is what was still allocated
+when it ended, including garbage that a later loop turn or GC frees, so it
+overstates what a request keeps. Concurrent requests on the same worker blur
+each other, so per-route numbers are exact only when requests run one at a
+time, as they do in check_allocations.py, which asserts per-route allocation
+budgets.
+"""
+
+import itertools
+import threading
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MAX_SNAPSHOTS = 5
+# Allocation sites that are noise in a snapshot: tracemalloc itself and imports
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def start(frames=1):
+    """Start tracemalloc if it isn't running; True if this call started it"""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(frames)
+    return True
+
+
+def kb(size):
+    return round(size / 1024, 1)
+
+
+class Allocation:
+    """Peak and net traced bytes between begin() and end(), on one thread of execution"""
+
+    __slots__ = ("before", "peak", "net")
+
+    def __init__(self):
+        self.before = None
+        self.peak = 0
+        self.net = 0
+
+    def begin(self):
+        tracemalloc.reset_peak()
+        self.before = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def end(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak = max(0, peak - self.before)
+        self.net = current - self.before
+        return self
+
+
+class RouteAllocations:
+    """Per-route request count, peak and net allocation (bytes)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, route, allocation):
+        with self._lock:
+            stats = self._stats.get(route)
+            if stats is None:
+                stats = self._stats[route] = {"requests": 0, "peak_total": 0, "peak_max": allocation.peak,
+                                              "net_total": 0, "net_max": allocation.net}
+            stats["requests"] += 1
+            stats["peak_total"] += allocation.peak
+            stats["peak_max"] = max(stats["peak_max"], allocation.peak)
+            stats["net_total"] += allocation.net
+            stats["net_max"] = max(stats["net_max"], allocation.net)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                route: {
+                    "requests": stats["requests"],
+                    "peak_kb_avg": kb(stats["peak_total"] / stats["requests"]),
+                    "peak_kb_max": kb(stats["peak_max"]),
+                    "net_kb_avg": kb(stats["net_total"] / stats["requests"]),
+                    "net_kb_max": kb(stats["net_max"]),
+                }
+                for route, stats in sorted(self._stats.items())
+            }
+
+
+class AllocationMiddleware:
+    """ASGI middleware recording each HTTP request's allocations under its route template
+
+    Plain ASGI rather than @app.middleware("http"), so the measurement spans
+    the whole exchange, response body included, and ends after the app has let
+    go of the request.
+    """
+
+    def __init__(self, app, stats):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        allocation = Allocation().begin()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            allocation.end()
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            self.stats.record(f"{scope['method']} {route.path if route is not None else '<unmatched>'}", allocation)
+
+
+# ============ SNAPSHOTS ============
+
+def _stat(stat):
+    frame = stat.traceback[0]
+    return {"location": f"{frame.filename}:{frame.lineno}", "size_kb": kb(stat.size), "count": stat.count}
+
+
+def _diff(stat):
+    return {**_stat(stat), "size_diff_kb": kb(stat.size_diff), "count_diff": stat.count_diff}
+
+
+class SnapshotStore:
+    def __init__(self, limit=MAX_SNAPSHOTS):
+        self.limit = limit
+        self._snapshots = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def take(self):
+        """(id, taken_at, snapshot); starts tracemalloc if needed"""
+        start()
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        with self._lock:
+            snapshot_id = next(self._ids)
+            taken_at = datetime.utcnow().isoformat()
+            self._snapshots[snapshot_id] = (taken_at, snapshot)
+            for old in sorted(self._snapshots)[:-self.limit]:
+                del self._snapshots[old]
+        return snapshot_id, taken_at, snapshot
+
+    def get(self, snapshot_id):
+        with self._lock:
+            return self._snapshots.get(snapshot_id)
+
+    def ids(self):
+        with self._lock:
+            return sorted(self._snapshots)
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+    def summary(self, limit=20):
+        """Take a snapshot; its id and the `limit` lines holding the most memory"""
+        snapshot_id, taken_at, snapshot = self.take()
+        stats = snapshot.statistics("lineno")
+        return {
+            "id": snapshot_id,
+            "taken_at": taken_at,
+            "traced_kb": kb(sum(stat.size for stat in stats)),
+            "top": [_stat(stat) for stat in stats[:limit]],
+        }
+
+    def diff(self, base_id, limit=20):
+        """Take a snapshot and compare it with snapshot `base_id`; None if that is gone"""
+        base = self.get(base_id)
+        if base is None:
+            return None
+        snapshot_id, taken_at, snapshot = self.take()
+        stats = snapshot.compare_to(base[1], "lineno")
+        return {
+            "base": {"id": base_id, "taken_at": base[0]},
+            "current": {"id": snapshot_id, "taken_at": taken_at},
+            "size_diff_kb": kb(sum(stat.size_diff for stat in stats)),
+            "top": [_diff(stat) for stat in stats[:limit]],
+        }
+
+
+def process_memory():
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (None, None)
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "traced_kb": kb(current) if current is not None else None,
+        "traced_peak_kb": kb(peak) if peak is not None else None,
+        # ru_maxrss is in KB on Linux
+        "max_rss_mb": round(max_rss_kb / 1024, 1) if max_rss_kb else None,
+    }
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, TypeAdapter
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import uuid
@@ -22,6 +22,14 @@ class ContactSubmissionCreate(BaseModel):
 class ContactSubmissionUpdate(BaseModel):
     status: str = Field(..., pattern="^(new|in-progress|resolved)$")
 
+class ContactSubmissionResponse(BaseModel):
+    success: bool
+    message: str
+    id: str
+    database: Optional[str] = None  # "mongodb", "memory" or "spooled"
+    email_status: Optional[str] = None  # "sent" or "not_configured"
+    error: Optional[str] = None
+
 # Service Models
 class ServiceDetail(BaseModel):
     overview: str
@@ -39,6 +47,7 @@ class Service(BaseModel):
     is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    version: Optional[int] = None  # set once edited through the admin API
 
 class ServiceCreate(BaseModel):
     title: str
@@ -55,6 +64,19 @@ class ServiceUpdate(BaseModel):
     detailed_info: Optional[ServiceDetail] = None
     is_active: Optional[bool] = None
 
+class ServiceSearchHit(BaseModel):
+    id: str
+    title: str
+    description: str
+    icon: str
+    score: float
+    matched_terms: List[str]
+
+class ServiceSearchResults(BaseModel):
+    query: str
+    total: int
+    results: List[ServiceSearchHit]
+
 # Company Models
 class CompanyAbout(BaseModel):
     goal: str
@@ -65,7 +87,9 @@ class CompanyContact(BaseModel):
     email: str
     phone: str
     address: str
-    social_media: Dict[str, str]
+    # Optional: the company document server.py seeds (and its static fallback) has no
+    # social_media, and responses are validated against this model
+    social_media: Optional[Dict[str, str]] = None
 
 class CompanyInfo(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -76,6 +100,7 @@ class CompanyInfo(BaseModel):
     about: CompanyAbout
     contact: CompanyContact
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    version: Optional[int] = None
 
 class CompanyInfoUpdate(BaseModel):
     name: Optional[str] = None
@@ -83,4 +108,14 @@ class CompanyInfoUpdate(BaseModel):
     tagline: Optional[str] = None
     description: Optional[str] = None
     about: Optional[CompanyAbout] = None
-    contact: Optional[CompanyContact] = None
\ No newline at end of file
+    contact: Optional[CompanyContact] = None
+
+# Compiled validators/serializers for whole responses. validate_python() plus
+# dump_json(exclude_unset=True) checks and encodes a document in pydantic-core
+# without a jsonable_encoder pass, and leaves out defaults (timestamps, ids)
+# the stored document never had. `_id` and other unknown keys are dropped.
+service_list_adapter = TypeAdapter(List[Service])
+service_adapter = TypeAdapter(Service)
+company_adapter = TypeAdapter(CompanyInfo)
+contact_response_adapter = TypeAdapter(ContactSubmissionResponse)
+service_search_adapter = TypeAdapter(ServiceSearchResults)
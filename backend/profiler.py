@@ -0,0 +1,213 @@
+"""
+Statistical (sampling) profiler for a running worker
+
+Every `interval` the profiler records the Python stack of each thread. Nothing
+is hooked into the interpreter (no sys.setprofile), so the code being profiled
+runs at full speed between samples. Each sample costs one stack walk per
+thread, a few µs (`profiler_sample` in bench_hotpaths.py), which is well under
+0.1% of a core at the default 5 ms interval. When no profile is running, no
+timer or thread exists at all. Two ways to take samples:
+
+    signal  an ITIMER_PROF timer raises SIGPROF every `interval` of process
+            CPU time. The handler runs on the main thread, where uvicorn runs
+            the event loop, and sees the exact frame it interrupted. Other
+            threads are read from sys._current_frames().
+    thread  a sampling thread wakes every `interval` of wall time. A thread
+            only gets the GIL when the running code releases it, and the event
+            loop releases it in every select(). So this mode mostly catches the
+            loop idle and undercounts its CPU work. It is the fallback when
+            start() is not called on the main thread or there is no setitimer
+            (Windows).
+
+Threads that are waiting are left out unless include_idle=True. That covers
+an event loop blocked in select() and idle threadpool workers.
+
+Output formats:
+
+    collapsed   one "thread;outer;...;inner <count>" line per distinct stack,
+                the input of flamegraph.pl, inferno and speedscope
+    speedscope  speedscope.app's JSON file format, one sampled profile per
+                thread, with weights in milliseconds
+
+Only one profile runs per worker at a time (acquire() / release()).
+server.py exposes it, when PROFILING is enabled, as
+POST /api/admin/profile?seconds=N, and as a per-request profile for any
+request that sends `X-Profile: <ADMIN_API_KEY>`.
+"""
+
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_INTERVAL = 0.005
+MAX_DEPTH = 128
+FORMATS = {
+    "collapsed": "text/plain; charset=utf-8",
+    "speedscope": "application/json",
+}
+# (file name, function) of leaf frames where a thread is waiting, not working
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+}
+
+_lock = threading.Lock()
+
+
+def acquire():
+    """Claim this worker's profiler; False if a profile is already running"""
+    return _lock.acquire(blocking=False)
+
+
+def release():
+    _lock.release()
+
+
+def _short_path(filename):
+    for marker in ("site-packages/", "dist-packages/"):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+def signal_mode_available():
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+class SamplingProfiler:
+    def __init__(self, interval=DEFAULT_INTERVAL, include_idle=False, mode="auto"):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.mode = mode  # "signal", "thread" or "auto" (signal when possible); resolved by start()
+        self.stacks = Counter()  # (thread name, (frame, ...)) -> samples, frames outermost first
+        self.samples = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._frames = {}        # code object -> frame key (name, file, first line)
+        self._stop = threading.Event()
+        self._thread = None
+        self._previous_handler = None
+
+    def _frame_key(self, code):
+        key = self._frames.get(code)
+        if key is None:
+            key = self._frames[code] = (code.co_name, _short_path(code.co_filename), code.co_firstlineno)
+        return key
+
+    def _sample(self, interrupted=None):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        if interrupted is not None:
+            # Signal mode: this thread was running `interrupted` when SIGPROF arrived
+            frames[own] = interrupted
+        else:
+            del frames[own]
+        for thread_id, frame in frames.items():
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                stack.append(self._frame_key(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[(names.get(thread_id, f"thread-{thread_id}"), tuple(stack))] += 1
+        self.samples += 1
+
+    def _on_signal(self, signum, frame):
+        self._sample(frame)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        if self.mode == "auto":
+            self.mode = "signal" if signal_mode_available() else "thread"
+        self.started_at = time.perf_counter()
+        if self.mode == "signal":
+            self._previous_handler = signal.signal(signal.SIGPROF, self._on_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self.mode == "signal":
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        else:
+            self._stop.set()
+            if self._thread is not None:
+                self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    @property
+    def sample_ms(self):
+        """Time one sample stands for: CPU time in signal mode, wall time in thread mode"""
+        if self.mode == "thread" and self.samples:
+            return self.duration * 1000 / self.samples
+        return self.interval * 1000
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # ---- output ----
+
+    def collapsed(self):
+        lines = []
+        for (thread_name, stack), count in sorted(self.stacks.items()):
+            frames = [thread_name] + [f"{name} ({path}:{line})" for name, path, line in stack]
+            lines.append(f"{';'.join(frame.replace(';', ':') for frame in frames)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def speedscope(self, name="profile"):
+        frames = {}
+        profiles = {}
+        # Samples are aggregated per stack, each weighted by the time it stands for
+        sample_ms = self.sample_ms
+        for (thread_name, stack), count in sorted(self.stacks.items()):
+            profile = profiles.setdefault(thread_name, {
+                "type": "sampled", "name": thread_name, "unit": "milliseconds",
+                "startValue": 0, "endValue": 0, "samples": [], "weights": [],
+            })
+            profile["samples"].append([frames.setdefault(frame, len(frames)) for frame in stack])
+            profile["weights"].append(round(count * sample_ms, 3))
+            profile["endValue"] = round(profile["endValue"] + count * sample_ms, 3)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "aximoix-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": frame_name, "file": path, "line": line}
+                                  for frame_name, path, line in frames]},
+            "profiles": list(profiles.values()),
+        }
+
+    def render(self, output_format, name="profile"):
+        """(body, media type) in one of FORMATS"""
+        if output_format == "speedscope":
+            return json.dumps(self.speedscope(name)), FORMATS["speedscope"]
+        return self.collapsed(), FORMATS["collapsed"]
+
+    def summary(self):
+        return {
+            "mode": self.mode,
+            "samples": self.samples,
+            "duration_ms": round(self.duration * 1000, 1),
+            "interval_ms": round(self.interval * 1000, 3),
+            "stacks": len(self.stacks),
+            "threads": len({thread_name for thread_name, _ in self.stacks}),
+        }
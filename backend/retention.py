@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Retention: TTL indexes for throwaway collections, and archival of old contacts
+
+TTL
+    Documents in ephemeral collections (`test`, written by /api/test-db)
+    expire through a TTL index on `created_at`. MongoDB's TTL monitor deletes
+    them in the background, about once a minute, so nothing has to call
+    /api/cleanup-test. ensure_ttl_indexes() also updates the expiry of an
+    existing TTL index in place (collMod) when the configured value changes.
+
+Archival
+    archive_contacts() moves resolved contacts created more than N days ago
+    out of `contacts`. Each pass takes one bounded batch (oldest first):
+    1. The batch is written to the archive sink.
+    2. Exactly those ids are deleted with one delete_many.
+    3. The job sleeps for `pause` seconds before the next batch.
+    The primary never sees one huge delete, and each batch is only removed
+    after it is archived. Sinks:
+
+    CollectionArchive  one document per batch in `contacts_archive`: the
+                       contacts as gzip-compressed extended JSON plus their ids
+                       and date range. The id is derived from the contact ids,
+                       so re-running an interrupted batch overwrites it rather
+                       than duplicating it.
+    FileArchive        appends one gzip member per batch to
+                       <dir>/contacts-YYYY-MM.ndjson.gz (fsync'd before the
+                       delete). `zcat` reads the file as plain NDJSON. A batch
+                       interrupted between the write and the delete is
+                       written twice, with identical rows.
+
+    Rollups in contact_rollups keep counting archived contacts. Don't run
+    `analytics.py rebuild` over days that have already been archived.
+
+Indexes
+    server.py builds no indexes on import, so a cold start doesn't pay for
+    them. `retention.py indexes` creates every index the app relies on (this
+    module's, analytics, export and search, and the TTL indexes); run it once
+    per deploy. `retention.py ttl` only (re)applies the TTL indexes.
+
+Usage:
+    python retention.py indexes
+    python retention.py ttl
+    python retention.py archive --days 365 --dry-run
+    python retention.py archive --days 365 --sink file --dir /var/backups/aximoix
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bson import Binary, json_util
+from pymongo.errors import OperationFailure
+
+ARCHIVE_COLLECTION = "contacts_archive"
+INDEX_OPTIONS_CONFLICT = 85
+# collection -> (date field, seconds to keep)
+DEFAULT_TTL = {"test": ("created_at", 3600)}
+
+
+# ============ TTL ============
+
+def ensure_ttl_indexes(database, ttl_specs=None):
+    """Create (or retune) one TTL index per ephemeral collection"""
+    applied = {}
+    for collection_name, (field, seconds) in (ttl_specs or DEFAULT_TTL).items():
+        collection = database[collection_name]
+        try:
+            collection.create_index(field, expireAfterSeconds=seconds)
+        except OperationFailure as e:
+            if e.code != INDEX_OPTIONS_CONFLICT:
+                raise
+            # Same key, different expiry: change it in place instead of rebuilding
+            database.command("collMod", collection_name,
+                             index={"keyPattern": {field: 1}, "expireAfterSeconds": seconds})
+        applied[collection_name] = {"field": field, "expire_after_seconds": seconds}
+    return applied
+
+
+# ============ ARCHIVE SINKS ============
+
+def _batch_id(contact_ids):
+    return "batch-" + hashlib.sha256("\n".join(contact_ids).encode("utf-8")).hexdigest()[:24]
+
+
+class CollectionArchive:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def write(self, contacts):
+        ids = [contact["id"] for contact in contacts]
+        payload = gzip.compress(json_util.dumps(contacts).encode("utf-8"), compresslevel=6)
+        self.collection.replace_one(
+            {"id": _batch_id(ids)},
+            {
+                "id": _batch_id(ids),
+                "archived_at": datetime.utcnow(),
+                "count": len(contacts),
+                "contact_ids": ids,
+                "first_created_at": contacts[0]["created_at"],
+                "last_created_at": contacts[-1]["created_at"],
+                "format": "json_util+gzip",
+                "payload": Binary(payload),
+            },
+            upsert=True,
+        )
+        return len(payload)
+
+    @staticmethod
+    def read(archive_document):
+        """Contacts stored in one archive document"""
+        return json_util.loads(gzip.decompress(archive_document["payload"]).decode("utf-8"))
+
+
+class FileArchive:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def write(self, contacts):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        month = contacts[0]["created_at"].strftime("%Y-%m")
+        lines = "".join(json_util.dumps(contact) + "\n" for contact in contacts)
+        member = gzip.compress(lines.encode("utf-8"), compresslevel=6)
+        with open(self.directory / f"contacts-{month}.ndjson.gz", "ab") as archive_file:
+            archive_file.write(member)
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+        return len(member)
+
+
+# ============ ARCHIVAL JOB ============
+
+def archive_filter(older_than_days, now=None):
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    return {"status": "resolved", "created_at": {"$lt": cutoff}}
+
+
+def archive_contacts(contacts, sink, older_than_days, batch_size=500, max_batches=None,
+                     pause=0.1, dry_run=False, should_stop=None):
+    """Move resolved contacts older than `older_than_days` to `sink`, one bounded batch at a time"""
+    # should_stop() is checked before each batch, e.g. to stay inside a request budget
+    query = archive_filter(older_than_days)
+    stats = {"batches": 0, "archived": 0, "deleted": 0, "archive_bytes": 0, "dry_run": dry_run}
+    if dry_run:
+        stats["eligible"] = contacts.count_documents(query)
+        return stats
+
+    while max_batches is None or stats["batches"] < max_batches:
+        if should_stop and should_stop():
+            break
+        batch = list(contacts.find(query, {"_id": 0}).sort([("created_at", 1), ("id", 1)]).limit(batch_size))
+        if not batch:
+            break
+        stats["archive_bytes"] += sink.write(batch)
+        stats["archived"] += len(batch)
+        # Only ids that were archived, and only if still resolved
+        deleted = contacts.delete_many({"id": {"$in": [contact["id"] for contact in batch]}, "status": "resolved"})
+        stats["deleted"] += deleted.deleted_count
+        stats["batches"] += 1
+        if len(batch) < batch_size:
+            break
+        time.sleep(pause)
+    return stats
+
+
+def ensure_indexes(database):
+    # Archival scans resolved contacts oldest-first
+    database.contacts.create_index([("status", 1), ("created_at", 1)])
+    database[ARCHIVE_COLLECTION].create_index("id", unique=True)
+    database[ARCHIVE_COLLECTION].create_index("contact_ids")
+    # /api/cleanup-test deletes by this flag
+    database.test.create_index("test")
+
+
+# ============ CLI ============
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexes, TTL indexes and contact archival")
+    parser.add_argument("command", choices=["indexes", "ttl", "archive"])
+    parser.add_argument("--days", type=int, default=int(os.getenv("CONTACT_RETENTION_DAYS", "365")),
+                        help="archive resolved contacts created more than this many days ago")
+    parser.add_argument("--sink", choices=["collection", "file"], default="collection")
+    parser.add_argument("--dir", default="contact-archive", help="directory for --sink file")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-batches", type=int)
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds between batches")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import server
+
+    if args.command == "indexes":
+        print(f"✅ Indexes in place; TTL: {server.ensure_indexes()}")
+        return
+    if args.command == "ttl":
+        print(ensure_ttl_indexes(server.db, server.TTL_COLLECTIONS))
+        return
+    sink = CollectionArchive(server.db[ARCHIVE_COLLECTION]) if args.sink == "collection" else FileArchive(args.dir)
+    stats = archive_contacts(server.db.contacts, sink, args.days, args.batch_size,
+                             args.max_batches, args.pause, args.dry_run)
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Production entry point for the AximoIX API (VM / container deployments)
+
+Runs `server:app` under uvicorn with one worker process per CPU, uvloop and
+httptools, keep-alive tuned for running behind a load balancer and a graceful
+shutdown window that lets each worker close its MongoDB client.
+
+The app is passed to uvicorn as an import string, so this supervisor process
+never imports server.py. Every worker is a freshly spawned interpreter that
+imports server.py itself and creates its own MongoClient, which means no
+connection pool is ever shared across a fork.
+
+Usage:
+    python serve.py                 # workers = CPU count
+    python serve.py --workers 4 --port 8080
+
+Environment (flags take precedence):
+    WEB_CONCURRENCY            number of worker processes (default: CPU count)
+    HOST / PORT                bind address (default: 0.0.0.0:8000)
+    KEEP_ALIVE_TIMEOUT         idle keep-alive seconds (default: 75)
+    GRACEFUL_SHUTDOWN_TIMEOUT  seconds to drain on SIGTERM (default: 30)
+    MAX_REQUESTS_PER_WORKER    recycle a worker after N requests (default: off)
+    LIMIT_CONCURRENCY          503 above N in-flight connections (default: off)
+    FORWARDED_ALLOW_IPS        trusted proxy IPs for X-Forwarded-* (default: 127.0.0.1)
+    ACCESS_LOG                 "1" to enable per-request access logs (default: off)
+"""
+
+import argparse
+import importlib.util
+import os
+from pathlib import Path
+
+import uvicorn
+
+BACKEND_DIR = Path(__file__).parent
+
+
+def _env_int(name, default=None):
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def default_workers():
+    """One worker per CPU; WEB_CONCURRENCY overrides it"""
+    return _env_int("WEB_CONCURRENCY", os.cpu_count() or 1)
+
+
+def get_server_config(workers=None, host=None, port=None):
+    """Build the uvicorn keyword arguments for the production profile"""
+    return {
+        "host": host or os.getenv("HOST", "0.0.0.0"),
+        "port": port or _env_int("PORT", 8000),
+        "workers": workers or default_workers(),
+        "app_dir": str(BACKEND_DIR),
+        # uvloop/httptools ship with uvicorn[standard]; fall back if missing
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+        # Keep idle connections open longer than typical LB idle timeouts (60s)
+        # so the balancer never reuses a socket we have already closed
+        "timeout_keep_alive": _env_int("KEEP_ALIVE_TIMEOUT", 75),
+        "timeout_graceful_shutdown": _env_int("GRACEFUL_SHUTDOWN_TIMEOUT", 30),
+        "limit_max_requests": _env_int("MAX_REQUESTS_PER_WORKER"),
+        "limit_concurrency": _env_int("LIMIT_CONCURRENCY"),
+        "backlog": _env_int("BACKLOG", 2048),
+        "proxy_headers": True,
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        "access_log": os.getenv("ACCESS_LOG", "0") == "1",
+        "server_header": False,
+        "lifespan": "on",
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the AximoIX API with the production profile")
+    parser.add_argument("--workers", type=int, help="worker processes (default: WEB_CONCURRENCY or CPU count)")
+    parser.add_argument("--host", help="bind host (default: HOST or 0.0.0.0)")
+    parser.add_argument("--port", type=int, help="bind port (default: PORT or 8000)")
+    args = parser.parse_args(argv)
+
+    config = get_server_config(workers=args.workers, host=args.host, port=args.port)
+    print(
+        f"🚀 Starting AximoIX API: {config['workers']} worker(s), "
+        f"loop={config['loop']}, http={config['http']}, "
+        f"keep-alive={config['timeout_keep_alive']}s on {config['host']}:{config['port']}"
+    )
+    uvicorn.run("server:app", **config)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,58 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response, Header, Depends, Query
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
 from typing import Optional, List
+from datetime import date
 import os
 import sys
 from datetime import datetime
 import uuid
+import asyncio
+import hmac
+import time
 import pymongo
 from bson import ObjectId
-import resend
 from dotenv import load_dotenv
 from pathlib import Path
+import tempfile
+from contact_spool import ContactSpool, SpoolReplayer
+from models import (Service, ServiceCreate, ServiceUpdate, CompanyInfo, CompanyInfoUpdate,
+                    ContactSubmissionResponse, ServiceSearchResults,
+                    service_list_adapter, service_adapter, company_adapter, contact_response_adapter,
+                    service_search_adapter)
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from mail_transport import create_transport, RESEND_API_URL as DEFAULT_RESEND_API_URL, MAX_BATCH_SIZE
+from mail_batcher import BatchMailer
+import mail_batcher
+from catalogue_cache import CatalogueCache
+from service_search import ServiceSearchIndex
+import analytics
+import contact_search
+import cache_policy
+import durability
+import tracing
+from loop_monitor import LoopLagMonitor
+from change_watcher import CatalogueWatcher
+from deadlines import (DeadlineExceeded, request_budget, operation_timeout, limited_by_budget,
+                       record_exceeded, remaining as deadline_remaining, metrics as deadline_metrics)
 
 # Load environment variables from .env file (for local development)
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-# Debug: Print Python and pymongo versions
-print(f"🐍 Python version: {sys.version}")
-print(f"📦 PyMongo version: {pymongo.__version__}")
-print(f"📁 Loading .env from: {env_path}")
+# Diagnostic routes (/api/debug, /api/env-check, /api/test-db, /api/test-mongodb,
+# /api/cleanup-test) and startup diagnostics; off in production by default so
+# cold starts don't pay for them. See debug_routes.py.
+DEBUG_ROUTES = os.getenv(
+    "DEBUG_ROUTES", "0" if os.getenv("VERCEL_ENV") == "production" else "1"
+).lower() in ("1", "true", "yes")
+
+if DEBUG_ROUTES:
+    print(f"🐍 Python version: {sys.version}")
+    print(f"📦 PyMongo version: {pymongo.__version__}")
+    print(f"📁 Loading .env from: {env_path}")
 
 # Get MongoDB connection string from environment variables
 # Vercel provides these directly, no need for dotenv in production
@@ -66,82 +99,91 @@ print(f"🔗 MongoDB URL: {MONGODB_URL[:50]}..." if len(MONGODB_URL) > 50 else f
 print(f"📁 Database name: {DB_NAME}")
 print(f"🌍 Environment: {os.getenv('VERCEL_ENV', 'development')}")
 
+# Storage backend: "mongodb" (default) or "memory" to skip MongoDB entirely
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongodb").lower()
+# Optional JSON file the in-memory store snapshots to, so demo data survives restarts
+MEMORY_STORE_SNAPSHOT = os.getenv("MEMORY_STORE_SNAPSHOT")
+# Simulated round trip per in-memory operation (check_loop_blocking.py sets it)
+MEMORY_STORE_LATENCY_MS = float(os.getenv("MEMORY_STORE_LATENCY_MS", "0"))
+
+def create_memory_database():
+    """In-memory document store used for demo mode, local development and tests"""
+    from memory_store import MemoryDatabase
+    memory_db = MemoryDatabase(name="demo_db", snapshot_path=MEMORY_STORE_SNAPSHOT,
+                               latency=MEMORY_STORE_LATENCY_MS / 1000)
+    if MEMORY_STORE_SNAPSHOT:
+        print(f"💾 In-memory store snapshots to: {MEMORY_STORE_SNAPSHOT}")
+    return memory_db
+
+# ============ TRACING ============
+# Spans per route, per MongoDB command and per mail call (tracing.py), exported
+# to a JSON-lines file or an OTLP/HTTP collector. Off unless TRACING is set.
+TRACING = os.getenv("TRACING", "off").lower()
+tracer = None
+if TRACING in tracing.EXPORTERS:
+    tracer = tracing.configure(
+        tracing.create_exporter(
+            TRACING,
+            path=os.getenv("TRACING_FILE", str(Path(tempfile.gettempdir()) / "aximoix-traces.ndjson")),
+            endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"),
+            headers=tracing.parse_headers(os.getenv("OTEL_EXPORTER_OTLP_HEADERS")),
+            service_name=os.getenv("OTEL_SERVICE_NAME", "aximoix-api")
+        ),
+        sample_ratio=float(os.getenv("TRACING_SAMPLE_RATIO", "1"))
+    )
+    print(f"🧭 Tracing enabled ({TRACING} exporter)")
+
 # Initialize MongoDB client
 client = None
 db = None
 
-try:
-    # Connection parameters for MongoDB Atlas
-    connection_params = {
-        "serverSelectionTimeoutMS": 15000,  # 15 seconds
-        "connectTimeoutMS": 30000,          # 30 seconds
-        "socketTimeoutMS": 45000,           # 45 seconds
-        "maxPoolSize": 10,
-        "minPoolSize": 1,
-        "retryWrites": True,
-        "w": "majority"
-    }
-    
-    print("🔗 Attempting to connect to MongoDB...")
-    
-    # Connect to MongoDB
-    client = pymongo.MongoClient(MONGODB_URL, **connection_params)
-    
-    # Test the connection
-    client.admin.command('ping')
-    
-    # Get the database
-    db = client[DB_NAME]
-    
-    print("✅ MongoDB connected successfully!")
-    print(f"📊 Database: {db.name}")
-    
-    # List collections (for debugging)
+if STORAGE_BACKEND == "memory":
+    print("🧠 STORAGE_BACKEND=memory - using in-memory document store")
+    db = create_memory_database()
+else:
     try:
-        collections = db.list_collection_names()
-        print(f"📊 Collections: {collections}")
-    except:
-        print("📊 Collections: Unable to list (new database)")
+        # Connection parameters for MongoDB Atlas
+        connection_params = {
+            "serverSelectionTimeoutMS": 15000,  # 15 seconds
+            "connectTimeoutMS": 30000,          # 30 seconds
+            "socketTimeoutMS": 45000,           # 45 seconds
+            "maxPoolSize": 10,
+            "minPoolSize": 1,
+            "retryWrites": True,
+            "w": "majority"
+        }
+        if tracer is not None:
+            # Command monitoring: a span per MongoDB command inside a traced request
+            connection_params["event_listeners"] = [tracing.MongoCommandTracer(tracer)]
         
-except Exception as e:
-    print(f"❌ MongoDB connection failed: {type(e).__name__}: {str(e)[:200]}")
-    print("⚠️ Running in demo mode with fallback data")
-    
-    # Create mock database for fallback
-    class MockCollection:
-        def find_one(self, *args, **kwargs):
-            return None
-        def find(self, *args, **kwargs):
-            return []
-        def insert_one(self, document):
-            class Result:
-                def __init__(self):
-                    self.inserted_id = str(uuid.uuid4())
-            return Result()
-        def count_documents(self, *args, **kwargs):
-            return 0
-        def create_collection(self, name):
-            pass
-    
-    class MockDB:
-        def __init__(self):
-            self.name = "demo_db"
-            self.contacts = MockCollection()
-            self.services = MockCollection()
-            self.company = MockCollection()
-            self.test = MockCollection()
+        print("🔗 Attempting to connect to MongoDB...")
         
-        def list_collection_names(self):
-            return ["contacts", "services", "company", "test"]
+        # Connect to MongoDB
+        client = pymongo.MongoClient(MONGODB_URL, **connection_params)
         
-        def __getattr__(self, name):
-            # Dynamically create collections as needed
-            return MockCollection()
+        # Test the connection
+        client.admin.command('ping')
         
-        def get_collection(self, name):
-            return MockCollection()
-    
-    db = MockDB()
+        # Get the database
+        db = client[DB_NAME]
+        
+        print("✅ MongoDB connected successfully!")
+        print(f"📊 Database: {db.name}")
+        
+        # List collections (for debugging)
+        try:
+            collections = db.list_collection_names()
+            print(f"📊 Collections: {collections}")
+        except:
+            print("📊 Collections: Unable to list (new database)")
+            
+    except Exception as e:
+        print(f"❌ MongoDB connection failed: {type(e).__name__}: {str(e)[:200]}")
+        print("⚠️ Running in demo mode with the in-memory document store")
+        if client is not None:
+            client.close()
+        client = None
+        db = create_memory_database()
 
 app = FastAPI(title="AximoIX API", version="1.0.0")
 
@@ -161,129 +203,336 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# ============ CDN CACHE POLICY ============
+# Cache-Control per route for Vercel's edge (cache_policy.py): catalogue reads
+# are served from the edge for CDN_S_MAXAGE, then stale while it revalidates,
+# and stale if the function fails; contact, admin and debug routes are never
+# stored. CDN_S_MAXAGE=0 turns edge caching off. With CDN_PURGE_URL set, a
+# catalogue version change purges its cache tag, so s-maxage can be long.
+CDN_S_MAXAGE = int(os.getenv("CDN_S_MAXAGE", "60"))
+CDN_STALE_WHILE_REVALIDATE = int(os.getenv("CDN_STALE_WHILE_REVALIDATE", "600"))
+CDN_STALE_IF_ERROR = int(os.getenv("CDN_STALE_IF_ERROR", "86400"))
+CDN_PURGE_URL = os.getenv("CDN_PURGE_URL")
+
+def catalogue_cache_policy(collection):
+    return cache_policy.CachePolicy(CDN_S_MAXAGE, CDN_STALE_WHILE_REVALIDATE, CDN_STALE_IF_ERROR,
+                                    tags=[collection])
+
+cache_policies = cache_policy.CachePolicies([
+    ("/api/contact", cache_policy.NO_STORE),
+    ("/api/admin/*", cache_policy.NO_STORE),
+    *((path, cache_policy.NO_STORE) for path in ("/api/test-mongodb", "/api/debug", "/api/env-check", "/api/test-db")),
+    ("/api/services*", catalogue_cache_policy("services")),
+    ("/api/company", catalogue_cache_policy("company")),
+], tag_header=os.getenv("CDN_CACHE_TAG_HEADER", "Cache-Tag"))
+
+cdn_purger = None
+if CDN_PURGE_URL:
+    cdn_purger = cache_policy.CdnPurger(
+        CDN_PURGE_URL,
+        token=os.getenv("CDN_PURGE_TOKEN"),
+        debounce=int(os.getenv("CDN_PURGE_DEBOUNCE_MS", "500")) / 1000
+    )
+
 # Security headers middleware
 @app.middleware("http")
 async def add_security_headers(request, call_next):
     response = await call_next(request)
+    cache_policies.apply(request, response)
     response.headers["X-Content-Type-Options"] = "nosniff"
     response.headers["X-Frame-Options"] = "DENY"
     response.headers["X-XSS-Protection"] = "1; mode=block"
     response.headers["Access-Control-Allow-Origin"] = "*"
-    response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
-    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, If-Match, traceparent"
     return response
 
+if tracer is not None:
+    @app.middleware("http")
+    async def trace_request(request, call_next):
+        """A server span per request, continuing the caller's W3C traceparent if it sent one"""
+        parent = tracing.parse_traceparent(request.headers.get("traceparent"))
+        with tracer.span(f"{request.method} {request.url.path}", "server",
+                         {"http.method": request.method, "url.path": request.url.path}, parent=parent) as span:
+            response = await call_next(request)
+            # Name the span after the route template, not the concrete path
+            route = request.scope.get("route")
+            if route is not None:
+                span.name = f"{request.method} {route.path}"
+                span.set_attribute("http.route", route.path)
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.set_error(f"HTTP {response.status_code}")
+            response.headers["traceresponse"] = span.traceparent
+            return response
+
+# ============ MEMORY TRACKING ============
+# Peak and net bytes allocated per route, measured with tracemalloc
+# (memory_tracking.py). Off unless MEMORY_TRACKING=1: tracing every allocation
+# makes requests about three times slower, so the middleware is not registered otherwise.
+# The admin snapshot/diff endpoints start tracemalloc on demand either way.
+MEMORY_TRACKING = os.getenv("MEMORY_TRACKING", "").lower() in ("1", "true", "yes")
+# memory_tracking (and tracemalloc) is imported on first use, so cold starts skip it
+route_allocations = None
+memory_snapshots = None
+
+def memory_stores():
+    """The per-route allocation stats and the snapshot store, created on first use"""
+    global route_allocations, memory_snapshots
+    if memory_snapshots is None:
+        import memory_tracking
+        route_allocations = memory_tracking.RouteAllocations()
+        memory_snapshots = memory_tracking.SnapshotStore()
+    return route_allocations, memory_snapshots
+
+if MEMORY_TRACKING:
+    import memory_tracking
+    memory_stores()
+    memory_tracking.start(int(os.getenv("MEMORY_TRACKING_FRAMES", "1")))
+    print("🧮 Memory tracking enabled (tracemalloc)")
+
+    app.add_middleware(memory_tracking.AllocationMiddleware, stats=route_allocations)
+
+# ============ CIRCUIT BREAKERS ============
+# Fail fast to cached/static data while a dependency is unhealthy instead of
+# letting every request wait out the client timeouts
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", "30"))
+MONGO_OPERATION_DEADLINE_MS = int(os.getenv("MONGO_OPERATION_DEADLINE_MS", "1500"))
+RESEND_DEADLINE_MS = int(os.getenv("RESEND_DEADLINE_MS", "5000"))
+
+mongodb_breaker = CircuitBreaker(
+    "mongodb",
+    failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+    recovery_timeout=CIRCUIT_RECOVERY_TIMEOUT,
+    deadline=MONGO_OPERATION_DEADLINE_MS / 1000,
+    failure_exceptions=(pymongo.errors.PyMongoError,)
+)
+resend_breaker = CircuitBreaker(
+    "resend",
+    failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+    recovery_timeout=CIRCUIT_RECOVERY_TIMEOUT,
+    deadline=RESEND_DEADLINE_MS / 1000
+)
+circuit_breakers = {breaker.name: breaker for breaker in (mongodb_breaker, resend_breaker)}
+
+def run_mongo(operation, deadline=None):
+    """
+    Run a MongoDB operation through the circuit breaker, bounded by its own
+    deadline and by what is left of the request's budget (pymongo.timeout also
+    sends the remainder to the server as maxTimeMS)
+    """
+    cap = deadline or mongodb_breaker.deadline
+    timeout = operation_timeout(cap)
+    budget_bound = limited_by_budget(cap)
+    def guarded():
+        try:
+            with pymongo.timeout(timeout):
+                return operation()
+        except pymongo.errors.PyMongoError as e:
+            if budget_bound and e.timeout:
+                # The request ran out of budget - not a MongoDB failure, so the breaker doesn't count it
+                record_exceeded()
+                raise DeadlineExceeded(f"request budget spent during MongoDB operation: {e}") from e
+            raise
+    return mongodb_breaker.call(guarded)
+
+# Catalogue reads: served fresh while the change watcher runs, otherwise kept
+# as the last good copy to serve while MongoDB is failing
+catalogue_cache = CatalogueCache()
+if cdn_purger is not None:
+    # A catalogue version change purges that collection's responses from the edge
+    catalogue_cache.add_listener(cdn_purger.purge)
+
+def version_etag(version):
+    return f'"{version}"'
+
+def cached_response(entry):
+    """Serve a cache entry's pre-rendered JSON body (with an ETag for versioned documents)"""
+    headers = {}
+    version = getattr(entry.value, "version", None)
+    if version is not None:
+        headers["ETag"] = version_etag(version)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+def render_model(adapter, data):
+    """
+    Validate `data` against a models.py TypeAdapter and encode it, both in
+    pydantic-core: returns (validated value, JSON bytes). Routes return the
+    bytes as a Response, so FastAPI skips its own response_model validation
+    and jsonable_encoder pass; `response_model` on the route documents the
+    schema.
+    """
+    value = adapter.validate_python(data)
+    return value, adapter.dump_json(value, exclude_unset=True)
+
+def model_response(adapter, data, status_code=200, headers=None):
+    _, body = render_model(adapter, data)
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
 # ============ EMAIL CONFIGURATION (RESEND) ============
+def configure_resend_sdk(resend):
+    """
+    Configure the resend SDK the first time the SDK transport uses it. The SDK
+    (and requests, which it uses) is not imported unless MAIL_TRANSPORT=sdk.
+    """
+    import requests
+
+    class DeadlineAwareRequestsClient(resend.RequestsClient):
+        """Resend HTTP client whose timeout is min(configured, request budget left)"""
+
+        def request(self, method, url, headers, json=None):
+            try:
+                resp = requests.request(
+                    method=method, url=url, headers=headers, json=json,
+                    timeout=operation_timeout(self._timeout)
+                )
+                return resp.content, resp.status_code, resp.headers
+            except requests.RequestException as e:
+                raise RuntimeError(f"Request failed: {e}") from e
+
+    resend.api_key = RESEND_API_KEY
+    resend.api_url = RESEND_API_URL
+    # Bound each Resend HTTP call by the breaker's deadline (SDK default is 30s)
+    # and by the remaining request budget
+    resend.default_http_client = DeadlineAwareRequestsClient(timeout=RESEND_DEADLINE_MS / 1000)
+
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 CONTACT_EMAIL_TO = os.getenv("CONTACT_EMAIL_TO", "services@aximoix.com")
 CONTACT_EMAIL_FROM = os.getenv("CONTACT_EMAIL_FROM", "noreply@aximoix.com")
 
+# Mail transport: "http" (pooled async httpx client, default), "sdk" (resend SDK in
+# the threadpool) or "fake". RESEND_API_URL can point at a local fake_resend.py.
+MAIL_TRANSPORT = os.getenv("MAIL_TRANSPORT", "http").lower()
+RESEND_API_URL = os.getenv("RESEND_API_URL", DEFAULT_RESEND_API_URL)
+mail_transport = None
+
+# Batch sending (Resend batch API, up to 100 emails per call). With
+# MAIL_BATCH_FLUSH_MS > 0, notifications from concurrent submissions are held
+# for up to that long and sent together; 0 sends each one on its own.
+# Backlogs always go out in batches (POST /api/admin/notifications/send-pending).
+MAIL_BATCH_SIZE = min(int(os.getenv("MAIL_BATCH_SIZE", str(MAX_BATCH_SIZE))), MAX_BATCH_SIZE)
+MAIL_BATCH_FLUSH_MS = int(os.getenv("MAIL_BATCH_FLUSH_MS", "0"))
+contact_mailer = None
+
 # Set Resend API key if available
-if RESEND_API_KEY:
-    resend.api_key = RESEND_API_KEY
-    print(f"✅ Resend API key configured")
+if RESEND_API_KEY or MAIL_TRANSPORT == "fake":
+    mail_transport = create_transport(
+        MAIL_TRANSPORT,
+        RESEND_API_KEY,
+        configure_sdk=configure_resend_sdk,
+        base_url=RESEND_API_URL,
+        timeout=RESEND_DEADLINE_MS / 1000,
+        max_connections=int(os.getenv("MAIL_MAX_CONNECTIONS", "10")),
+        max_keepalive_connections=int(os.getenv("MAIL_MAX_CONNECTIONS", "10")),
+        concurrency=int(os.getenv("MAIL_CONCURRENCY", "10"))
+    )
+    if MAIL_BATCH_FLUSH_MS > 0:
+        contact_mailer = BatchMailer(
+            mail_transport,
+            max_batch_size=MAIL_BATCH_SIZE,
+            flush_interval=MAIL_BATCH_FLUSH_MS / 1000,
+            breaker=resend_breaker,
+            timeout=RESEND_DEADLINE_MS / 1000
+        )
+    print(f"✅ Resend API key configured ({mail_transport.name} transport"
+          + (f", batched every {MAIL_BATCH_FLUSH_MS}ms" if contact_mailer else "") + ")")
     print(f"📧 Emails will be sent TO: {CONTACT_EMAIL_TO}")
     print(f"📧 Emails will be sent FROM: {CONTACT_EMAIL_FROM}")
 else:
     print(f"⚠️ Resend API key not configured")
 
-def send_contact_email(contact_data: dict) -> bool:
+def build_contact_email(contact_data: dict) -> dict:
     """
-    Send contact form submission email to services@aximoix.com using Resend
+    Build the Resend email parameters for a contact form submission
     
     Args:
         contact_data: Dictionary with keys: name, email, service_interest, message
         
     Returns:
-        bool: True if email sent successfully, False otherwise
+        dict: Resend send parameters (from, to, subject, html, text, reply_to)
     """
-    try:
-        # Check if Resend API key is configured
-        if not RESEND_API_KEY:
-            print("⚠️ Resend API key not configured - skipping email send")
-            print(f"   Please set RESEND_API_KEY environment variable")
-            return False
-        
-        # Create email content
-        name = contact_data.get("name", "Unknown")
-        email = contact_data.get("email", "unknown@example.com")
-        service_interest = contact_data.get("service_interest", "Service not specified")
-        message = contact_data.get("message", "")
-        timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-        
-        # HTML email template - AximoIX Brand Colors (Dark Theme)
-        html_content = f"""
-        <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <style>
-                    * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-                    body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #0a0a0a; color: #ffffff; }}
-                    .container {{ max-width: 600px; margin: 0 auto; background: #121212; border: 1px solid rgba(0, 255, 209, 0.2); border-radius: 12px; overflow: hidden; box-shadow: 0 10px 40px rgba(0, 255, 209, 0.1); }}
-                    .header {{ background: linear-gradient(135deg, #00FFD1 0%, #00D4A8 100%); padding: 40px 30px; text-align: center; }}
-                    .header h1 {{ font-size: 28px; color: #000; margin: 0; font-weight: 600; }}
-                    .header p {{ font-size: 14px; color: rgba(0, 0, 0, 0.7); margin-top: 8px; }}
-                    .content {{ padding: 40px 30px; }}
-                    .field {{ margin-bottom: 30px; }}
-                    .label {{ font-weight: 600; color: #00FFD1; font-size: 12px; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 8px; display: block; }}
-                    .value {{ color: #ffffff; font-size: 16px; padding: 12px 16px; background: rgba(0, 255, 209, 0.08); border-left: 3px solid #00FFD1; border-radius: 4px; word-break: break-word; }}
-                    .value a {{ color: #00FFD1; text-decoration: none; font-weight: 500; }}
-                    .value a:hover {{ text-decoration: underline; }}
-                    .divider {{ height: 1px; background: rgba(0, 255, 209, 0.2); margin: 30px 0; }}
-                    .footer {{ padding: 25px 30px; background: rgba(0, 255, 209, 0.05); border-top: 1px solid rgba(0, 255, 209, 0.1); text-align: center; }}
-                    .footer p {{ font-size: 12px; color: rgba(255, 255, 255, 0.6); margin: 4px 0; }}
-                    .cta-section {{ background: rgba(0, 255, 209, 0.1); padding: 20px; border-radius: 8px; margin: 20px 0; border: 1px solid rgba(0, 255, 209, 0.2); }}
-                    .cta-section p {{ color: rgba(255, 255, 255, 0.8); font-size: 14px; margin: 0; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>✉️ New Contact Inquiry</h1>
-                        <p>Message from AximoIX Contact Form</p>
+    # Create email content
+    name = contact_data.get("name", "Unknown")
+    email = contact_data.get("email", "unknown@example.com")
+    service_interest = contact_data.get("service_interest", "Service not specified")
+    message = contact_data.get("message", "")
+    # When the lead came in, not when this email is built (send-pending may run days later)
+    timestamp = (contact_data.get("created_at") or datetime.utcnow()).strftime("%Y-%m-%d %H:%M:%S UTC")
+    
+    # HTML email template - AximoIX Brand Colors (Dark Theme)
+    html_content = f"""
+    <html>
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <style>
+                * {{ margin: 0; padding: 0; box-sizing: border-box; }}
+                body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #0a0a0a; color: #ffffff; }}
+                .container {{ max-width: 600px; margin: 0 auto; background: #121212; border: 1px solid rgba(0, 255, 209, 0.2); border-radius: 12px; overflow: hidden; box-shadow: 0 10px 40px rgba(0, 255, 209, 0.1); }}
+                .header {{ background: linear-gradient(135deg, #00FFD1 0%, #00D4A8 100%); padding: 40px 30px; text-align: center; }}
+                .header h1 {{ font-size: 28px; color: #000; margin: 0; font-weight: 600; }}
+                .header p {{ font-size: 14px; color: rgba(0, 0, 0, 0.7); margin-top: 8px; }}
+                .content {{ padding: 40px 30px; }}
+                .field {{ margin-bottom: 30px; }}
+                .label {{ font-weight: 600; color: #00FFD1; font-size: 12px; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 8px; display: block; }}
+                .value {{ color: #ffffff; font-size: 16px; padding: 12px 16px; background: rgba(0, 255, 209, 0.08); border-left: 3px solid #00FFD1; border-radius: 4px; word-break: break-word; }}
+                .value a {{ color: #00FFD1; text-decoration: none; font-weight: 500; }}
+                .value a:hover {{ text-decoration: underline; }}
+                .divider {{ height: 1px; background: rgba(0, 255, 209, 0.2); margin: 30px 0; }}
+                .footer {{ padding: 25px 30px; background: rgba(0, 255, 209, 0.05); border-top: 1px solid rgba(0, 255, 209, 0.1); text-align: center; }}
+                .footer p {{ font-size: 12px; color: rgba(255, 255, 255, 0.6); margin: 4px 0; }}
+                .cta-section {{ background: rgba(0, 255, 209, 0.1); padding: 20px; border-radius: 8px; margin: 20px 0; border: 1px solid rgba(0, 255, 209, 0.2); }}
+                .cta-section p {{ color: rgba(255, 255, 255, 0.8); font-size: 14px; margin: 0; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>✉️ New Contact Inquiry</h1>
+                    <p>Message from AximoIX Contact Form</p>
+                </div>
+                
+                <div class="content">
+                    <div class="field">
+                        <span class="label">From</span>
+                        <div class="value"><a href="mailto:{email}">{name}</a></div>
+                    </div>
+                    
+                    <div class="field">
+                        <span class="label">Email Address</span>
+                        <div class="value"><a href="mailto:{email}">{email}</a></div>
                     </div>
                     
-                    <div class="content">
-                        <div class="field">
-                            <span class="label">From</span>
-                            <div class="value"><a href="mailto:{email}">{name}</a></div>
-                        </div>
-                        
-                        <div class="field">
-                            <span class="label">Email Address</span>
-                            <div class="value"><a href="mailto:{email}">{email}</a></div>
-                        </div>
-                        
-                        <div class="field">
-                            <span class="label">Service Interest</span>
-                            <div class="value">{service_interest}</div>
-                        </div>
-                        
-                        <div class="divider"></div>
-                        
-                        <div class="field">
-                            <span class="label">Message</span>
-                            <div class="value" style="border-left-color: #00FFD1; white-space: pre-wrap;">{message}</div>
-                        </div>
-                        
-                        <div class="cta-section">
-                            <p><strong>💡 Quick Action:</strong> Click the email address above to reply directly to this inquiry</p>
-                        </div>
+                    <div class="field">
+                        <span class="label">Service Interest</span>
+                        <div class="value">{service_interest}</div>
                     </div>
                     
-                    <div class="footer">
-                        <p><strong>AximoIX</strong> • Contact Form Submission</p>
-                        <p>Submitted: {timestamp}</p>
-                        <p style="margin-top: 12px; font-size: 11px; color: rgba(255, 255, 255, 0.4);">This is an automated email from your contact form.</p>
+                    <div class="divider"></div>
+                    
+                    <div class="field">
+                        <span class="label">Message</span>
+                        <div class="value" style="border-left-color: #00FFD1; white-space: pre-wrap;">{message}</div>
+                    </div>
+                    
+                    <div class="cta-section">
+                        <p><strong>💡 Quick Action:</strong> Click the email address above to reply directly to this inquiry</p>
                     </div>
                 </div>
-            </body>
-        </html>
-        """
-        
-        # Create plain text alternative
-        text_content = f"""
+                
+                <div class="footer">
+                    <p><strong>AximoIX</strong> • Contact Form Submission</p>
+                    <p>Submitted: {timestamp}</p>
+                    <p style="margin-top: 12px; font-size: 11px; color: rgba(255, 255, 255, 0.4);">This is an automated email from your contact form.</p>
+                </div>
+            </div>
+        </body>
+    </html>
+    """
+    
+    # Create plain text alternative
+    text_content = f"""
 New Contact Form Submission
 =============================
 
@@ -297,19 +546,55 @@ Message:
 ---
 Submitted on: {timestamp}
 """
+    
+    # Prepare email parameters for Resend
+    params = {
+        "from": CONTACT_EMAIL_FROM,
+        "to": [CONTACT_EMAIL_TO],
+        "subject": f"New Contact Form Submission from {name}",
+        "html": html_content,
+        "text": text_content,
+        "reply_to": email  # Reply-to set to contact person's email
+    }
+    return params
+
+async def send_contact_email(contact_data: dict) -> bool:
+    """
+    Send contact form submission email to services@aximoix.com using Resend
+    
+    Args:
+        contact_data: Dictionary with keys: name, email, service_interest, message
         
-        # Prepare email parameters for Resend
-        params = {
-            "from": CONTACT_EMAIL_FROM,
-            "to": [CONTACT_EMAIL_TO],
-            "subject": f"New Contact Form Submission from {name}",
-            "html": html_content,
-            "text": text_content,
-            "reply_to": email  # Reply-to set to contact person's email
-        }
+    Returns:
+        bool: True if email sent successfully, False otherwise
+    """
+    try:
+        # Check if Resend API key is configured
+        if mail_transport is None:
+            print("⚠️ Resend API key not configured - skipping email send")
+            print(f"   Please set RESEND_API_KEY environment variable")
+            return False
         
-        # Send email via Resend
-        response = resend.Emails.send(params)
+        params = build_contact_email(contact_data)
+        
+        with tracing.span("mail.send", "client", {"mail.transport": MAIL_TRANSPORT,
+                                                  "mail.batched": contact_mailer is not None}) as span:
+            if contact_mailer is not None:
+                # Wait for the batch this notification joins; the batch has its own breaker call
+                result = await contact_mailer.submit(contact_data["id"], params)
+                if "error" in result:
+                    span.set_error(result["error"])
+                    print(f"❌ Error sending email: {result['error']}")
+                    return False
+                print(f"✅ Email sent successfully to {CONTACT_EMAIL_TO} (batched)")
+                print(f"   Email ID: {result['id']}")
+                return True
+            
+            # Bounded by the request budget; raises at once if it is already spent
+            timeout = operation_timeout(resend_breaker.deadline)
+            
+            # Send email via Resend (fails fast while the circuit is open)
+            response = await resend_breaker.call_async(mail_transport.send, params, timeout)
         
         print(f"✅ Email sent successfully to {CONTACT_EMAIL_TO}")
         print(f"   Email ID: {response.get('id', 'N/A')}")
@@ -319,6 +604,7 @@ Submitted on: {timestamp}
         print(f"❌ Error sending email: {type(e).__name__}: {str(e)}")
         return False
 
+# Deliberately unconstrained: a lead the form accepted is never turned away with a 422
 class ContactForm(BaseModel):
     name: str
     email: str
@@ -486,10 +772,8 @@ def get_static_service_by_id(service_id):
 def seed_database():
     """Initialize database with default data if empty"""
     try:
-        # Check if we have a real MongoDB connection
         if client is None:
-            print("⚠️ Skipping database seeding - running in demo mode")
-            return
+            print("🌱 Seeding in-memory store for demo mode")
         
         # Check if services collection is empty
         services_count = db.services.count_documents({})
@@ -523,12 +807,17 @@ def seed_database():
                 "address": "3rd Floor 120 West Trinity Place Decatur, GA 30030"
             }
         }
-        db.company.replace_one(
-            {"id": "aximoix-company"},
-            company_data,
-            upsert=True
-        )
-        print("✅ Company data updated")
+        # ...unless it has been edited through the admin API (versioned)
+        existing = db.company.find_one({"id": "aximoix-company"}, {"version": 1})
+        if existing and existing.get("version"):
+            print(f"✅ Company data managed via admin API (version {existing['version']})")
+        else:
+            db.company.replace_one(
+                {"id": "aximoix-company"},
+                company_data,
+                upsert=True
+            )
+            print("✅ Company data updated")
             
     except Exception as e:
         print(f"❌ Error seeding database: {e}")
@@ -536,6 +825,145 @@ def seed_database():
 # Seed database on startup
 seed_database()
 
+# ============ CONTACT SPOOL ============
+# Contacts that can't be written to MongoDB within the deadline are spooled
+# locally and replayed in the background once MongoDB is healthy again
+CONTACT_WRITE_DEADLINE_MS = int(os.getenv("CONTACT_WRITE_DEADLINE_MS", "2000"))
+CONTACT_SPOOL_PATH = os.getenv(
+    "CONTACT_SPOOL_PATH",
+    str(Path(tempfile.gettempdir()) / "aximoix-contact-spool.ndjson")
+)
+
+contact_spool = ContactSpool(
+    CONTACT_SPOOL_PATH,
+    fsync_batch=int(os.getenv("CONTACT_SPOOL_FSYNC_BATCH", "16")),
+    fsync_interval=int(os.getenv("CONTACT_SPOOL_FSYNC_INTERVAL_MS", "50")) / 1000
+)
+
+def mongodb_is_healthy() -> bool:
+    """Quick ping used by the spool replayer before draining"""
+    if not client:
+        return False
+    try:
+        with pymongo.timeout(2):
+            client.admin.command('ping')
+        return True
+    except Exception:
+        return False
+
+spool_replayer = SpoolReplayer(
+    contact_spool,
+    get_collection=lambda: db.contacts,
+    is_healthy=mongodb_is_healthy,
+    interval=float(os.getenv("CONTACT_SPOOL_REPLAY_INTERVAL", "10"))
+)
+
+if client:
+    # Also drains anything left behind by a previous process
+    spool_replayer.start()
+
+# ============ CATALOGUE CHANGE WATCHER ============
+# Optional: tail change streams on services/company (or poll dbHash on a
+# standalone mongod) so catalogue reads come from memory until something changes.
+# Off by default - serverless instances freeze background threads between requests.
+CATALOGUE_WATCH = os.getenv("CATALOGUE_WATCH", "").lower() in ("1", "true", "yes")
+
+catalogue_watcher = CatalogueWatcher(
+    db,
+    catalogue_cache,
+    poll_interval=float(os.getenv("CATALOGUE_POLL_INTERVAL", "5"))
+)
+
+if client and CATALOGUE_WATCH:
+    catalogue_watcher.start()
+
+# ============ EVENT LOOP MONITOR ============
+# Scheduling lag of this worker's event loop, as a histogram, plus the stack of
+# whatever blocks the loop for longer than LOOP_BLOCK_THRESHOLD_MS (see
+# loop_monitor.py). Reported at /api/loop-health; stacks only to admins.
+LOOP_MONITOR = os.getenv("LOOP_MONITOR", "1").lower() in ("1", "true", "yes")
+loop_monitor = LoopLagMonitor(
+    interval=int(os.getenv("LOOP_LAG_INTERVAL_MS", "100")) / 1000,
+    threshold=int(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100")) / 1000
+)
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    if LOOP_MONITOR:
+        loop_monitor.start()
+
+# ============ CONTACT ANALYTICS ============
+# Daily lead-volume rollups, $inc'd on every submission (see analytics.py)
+contact_rollups = db[analytics.ROLLUP_COLLECTION]
+
+# ============ CONTACT WRITE DURABILITY ============
+# Write-concern tier per operation (durability.py) instead of the client's
+# w: majority for everything: the contact insert and its rollup are
+# acknowledged from the primary's journal, status changes wait for a majority.
+# CONTACT_WRITE_MODE=combined sends the notification first and inserts the
+# contact once, with its email_sent already set.
+CONTACT_INSERT_WRITE_CONCERN = os.getenv("CONTACT_INSERT_WRITE_CONCERN", "fast").lower()
+CONTACT_STATUS_WRITE_CONCERN = os.getenv("CONTACT_STATUS_WRITE_CONCERN", "majority").lower()
+CONTACT_WRITE_MODE = durability.write_mode(os.getenv("CONTACT_WRITE_MODE", "separate"))
+contacts_insert = durability.with_tier(db.contacts, CONTACT_INSERT_WRITE_CONCERN)
+contacts_status = durability.with_tier(db.contacts, CONTACT_STATUS_WRITE_CONCERN)
+contact_rollups_insert = durability.with_tier(contact_rollups, CONTACT_INSERT_WRITE_CONCERN)
+
+# ============ RETENTION ============
+# Ephemeral collections expire through TTL indexes; resolved contacts older
+# than CONTACT_RETENTION_DAYS are archived by `retention.py archive` (cron) or
+# POST /api/admin/retention/archive
+TTL_COLLECTIONS = {"test": ("created_at", int(os.getenv("TEST_DOCUMENT_TTL_SECONDS", "3600")))}
+CONTACT_RETENTION_DAYS = int(os.getenv("CONTACT_RETENTION_DAYS", "365"))
+
+# ============ INDEXES ============
+# Built once per deploy with `python retention.py indexes`, not on import:
+# every cold start would otherwise send a createIndexes per index (and a
+# collMod for a retuned TTL) before answering its first request.
+# check_import_time.py fails if an import starts creating indexes again.
+def ensure_indexes():
+    """Create the analytics, export, search and retention indexes and the TTL indexes"""
+    import contact_export
+    import retention
+    analytics.ensure_indexes(contact_rollups)
+    contact_export.ensure_indexes(db.contacts)
+    contact_search.ensure_indexes(db.contacts)
+    retention.ensure_indexes(db)
+    return retention.ensure_ttl_indexes(db, TTL_COLLECTIONS) if client else {}
+
+@app.on_event("shutdown")
+async def flush_cdn_purges():
+    """Send purges still waiting out their debounce"""
+    if cdn_purger is not None:
+        # Sync shutdown hooks run on the loop; the final POST doesn't
+        await run_in_threadpool(cdn_purger.close)
+
+@app.on_event("shutdown")
+def flush_traces():
+    """Export spans still buffered"""
+    if tracer is not None:
+        tracer.shutdown()
+
+@app.on_event("shutdown")
+async def close_mail_transport():
+    """Close pooled mail connections"""
+    if mail_transport is not None:
+        await mail_transport.aclose()
+
+@app.on_event("shutdown")
+def close_mongodb_client():
+    """Close this worker's MongoDB client so pooled sockets are released on graceful shutdown"""
+    loop_monitor.stop()
+    catalogue_watcher.stop()
+    spool_replayer.stop()
+    contact_spool.close()
+    if client:
+        client.close()
+        print("🔌 MongoDB client closed")
+    else:
+        # Flush the in-memory store's snapshot (no-op without MEMORY_STORE_SNAPSHOT)
+        db.close()
+
 # ============ API ENDPOINTS ============
 
 @app.get("/")
@@ -556,13 +984,29 @@ async def api_root():
         "endpoints": [
             "/api/ping",
             "/api/test",
-            "/api/test-mongodb",
-            "/api/debug",
-            "/api/env-check",
+            *(["/api/test-mongodb", "/api/debug", "/api/env-check", "/api/test-db"] if DEBUG_ROUTES else []),
             "/api/company",
             "/api/services",
+            "/api/services/search?q=",
             "/api/contact (POST)",
-            "/api/health"
+            "/api/health",
+            "/api/circuit-breakers",
+            "/api/deadlines",
+            "/api/loop-health",
+            "/api/admin/services (POST)",
+            "/api/admin/services/{service_id} (PATCH)",
+            "/api/admin/company (PATCH)",
+            "/api/admin/analytics/contacts",
+            "/api/admin/analytics/rebuild (POST)",
+            "/api/admin/contacts/export",
+            "/api/admin/contacts/search",
+            "/api/admin/retention/archive (POST)",
+            "/api/admin/notifications/send-pending (POST)",
+            "/api/admin/profile (POST, when PROFILING=1)",
+            "/api/admin/loop-health",
+            "/api/admin/memory",
+            "/api/admin/memory/snapshot (POST)",
+            "/api/admin/memory/diff?base="
         ]
     }
 
@@ -585,197 +1029,119 @@ async def ping():
         "status": "success"
     }
 
-# NEW: Debug endpoint to check MongoDB connection
-@app.get("/api/test-mongodb")
-async def test_mongodb_connection():
-    """Test MongoDB connection specifically"""
-    try:
-        if client:
-            # Test if we have a real client
-            client.admin.command('ping')
-            
-            # Get database stats
-            collections = db.list_collection_names()
-            services_count = db.services.count_documents({})
-            company_count = db.company.count_documents({})
-            contacts_count = db.contacts.count_documents({}) if 'contacts' in collections else 0
-            
-            return {
-                "status": "success",
-                "message": "MongoDB connected successfully",
-                "database": db.name,
-                "collections": collections,
-                "counts": {
-                    "services": services_count,
-                    "company": company_count,
-                    "contacts": contacts_count
-                },
-                "connection": {
-                    "url_set": True,
-                    "type": "real_mongodb"
-                },
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        else:
-            return {
-                "status": "demo_mode",
-                "message": "Running in demo mode - MongoDB not connected",
-                "database": "demo_db",
-                "connection": {
-                    "url_set": bool(MONGODB_URL and MONGODB_URL != "mongodb://localhost:27017/aximoix"),
-                    "type": "mock_database"
-                },
-                "timestamp": datetime.utcnow().isoformat()
-            }
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": str(e),
-            "connection_url": MONGODB_URL[:50] + "..." if len(MONGODB_URL) > 50 else MONGODB_URL,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-
-# NEW: Enhanced debug endpoint
-@app.get("/api/debug")
-async def debug_info():
-    """Debug endpoint to check everything"""
-    try:
-        if client:
-            # Test MongoDB
-            client.admin.command('ping')
-            db_status = "connected"
-            collections = db.list_collection_names()
-            
-            # Check contacts collection
-            contact_count = db.contacts.count_documents({}) if 'contacts' in collections else 0
-            
-            # Check services collection
-            services_count = db.services.count_documents({}) if 'services' in collections else 0
-            
-            # Check company collection
-            company_count = db.company.count_documents({}) if 'company' in collections else 0
-            
-        else:
-            db_status = "demo_mode"
-            collections = db.list_collection_names()
-            contact_count = 0
-            services_count = len(get_static_services())
-            company_count = 1
-    
-    except Exception as e:
-        db_status = f"disconnected: {str(e)}"
-        collections = []
-        contact_count = 0
-        services_count = 0
-        company_count = 0
-    
-    # Get environment info
-    env_vars = {}
-    for key in os.environ:
-        if "MONGO" in key.upper() or "URL" in key.upper() or "DB" in key.upper():
-            value = os.getenv(key)
-            if value and any(secret in key.lower() for secret in ['pass', 'key', 'secret']):
-                env_vars[key] = "*****"
-            else:
-                env_vars[key] = "SET" if value else "NOT SET"
-    
-    return {
-        "backend": "running",
-        "python_version": sys.version.split()[0],
-        "pymongo_version": pymongo.__version__,
-        "database": db_status,
-        "collections": collections,
-        "contact_submissions": contact_count,
-        "services_count": services_count,
-        "company_count": company_count,
-        "timestamp": datetime.utcnow().isoformat(),
-        "environment": os.getenv("VERCEL_ENV", "development"),
-        "environment_variables": env_vars
-    }
+# ============ DIAGNOSTIC ROUTES ============
+if DEBUG_ROUTES:
+    import debug_routes
+    debug_routes.register(app, sys.modules[__name__])
 
-@app.get("/api/env-check")
-async def env_check():
-    """Debug endpoint to check environment variables"""
-    env_info = {}
-    for key in os.environ:
-        if "MONGO" in key or "URL" in key or "DB" in key:
-            value = os.getenv(key)
-            if value and ("PASS" in key or "KEY" in key or "SECRET" in key):
-                env_info[key] = "****SET****"
-            else:
-                env_info[key] = "SET" if value else "NOT SET"
-    
-    return {
-        "mongodb_url": "SET" if MONGODB_URL and MONGODB_URL != "mongodb://localhost:27017/aximoix" else "NOT SET",
-        "db_name": DB_NAME,
-        "environment": os.getenv("VERCEL_ENV", "development"),
-        "all_relevant_vars": env_info,
-        "timestamp": datetime.utcnow().isoformat()
-    }
+# ============ ROUTE BUDGETS ============
+# End-to-end latency budget per route (ms); ROUTE_BUDGETS_MS overrides them.
+# Catalogue reads degrade to cached/static data when the budget runs out;
+# the contact route leaves room for the insert plus the Resend call.
+CATALOGUE_BUDGET_MS = 800
+CONTACT_BUDGET_MS = 8000
 
-@app.post("/api/contact")
+@app.post("/api/contact", response_model=ContactSubmissionResponse,
+          dependencies=[request_budget(CONTACT_BUDGET_MS)])
 async def submit_contact(contact: ContactForm):
     try:
         print(f"📧 Received contact from: {contact.name} ({contact.email})")
         
-        contact_data = contact.dict()
+        contact_data = contact.model_dump()
         contact_data["id"] = str(uuid.uuid4())
         contact_data["created_at"] = datetime.utcnow()
         contact_data["status"] = "new"
         contact_data["email_sent"] = False
+        # Case-normalized copy for the admin search's email index
+        contact_data["email_lower"] = contact_search.normalize_email(contact_data["email"])
         
-        # Save to MongoDB if connected
-        if client and hasattr(db, 'contacts'):
-            result = db.contacts.insert_one(contact_data)
-            print(f"✅ Contact saved to MongoDB with ID: {contact_data['id']}")
-        else:
-            print("📋 Running in demo mode - contact saved locally")
+        # Combined mode: notify first, so the contact is written once with its email_sent
+        combined = CONTACT_WRITE_MODE == "combined"
+        if combined:
+            email_sent = await send_contact_email(contact_data)
+            contact_data["email_sent"] = email_sent
         
-        # Send email notification to services@aximoix.com
-        email_sent = send_contact_email(contact_data)
+        # Save to MongoDB (or the in-memory store in demo mode); if MongoDB is
+        # down or slower than the deadline, spool locally instead of losing the lead
+        spooled = False
+        try:
+            await run_in_threadpool(run_mongo, lambda: contacts_insert.insert_one(contact_data),
+                                    CONTACT_WRITE_DEADLINE_MS / 1000)
+            if client:
+                print(f"✅ Contact saved to MongoDB with ID: {contact_data['id']}")
+            else:
+                print(f"📋 Running in demo mode - contact saved in memory with ID: {contact_data['id']}")
+        except (pymongo.errors.PyMongoError, CircuitOpenError, DeadlineExceeded) as e:
+            print(f"⚠️ MongoDB write failed ({type(e).__name__}) - spooling contact {contact_data['id']}")
+            contact_data.pop("_id", None)
+            await run_in_threadpool(contact_spool.append_contact, contact_data)
+            spool_replayer.start()
+            spooled = True
         
-        # Update email_sent status in database if callback email was sent
-        if email_sent and client and hasattr(db, 'contacts'):
+        # Count the lead in today's rollup; misses are repaired by `analytics.py rebuild`
+        if not spooled:
             try:
-                db.contacts.update_one(
-                    {"id": contact_data["id"]},
-                    {"$set": {"email_sent": True}}
-                )
-                print(f"✅ Email status updated in database")
+                await run_in_threadpool(run_mongo, lambda: analytics.record_contact(contact_rollups_insert, contact_data))
             except Exception as e:
-                print(f"⚠️ Could not update email status in database: {e}")
+                print(f"⚠️ Could not update contact rollup: {e}")
         
-        return {
+        if not combined:
+            # Send email notification to services@aximoix.com
+            email_sent = await send_contact_email(contact_data)
+            
+            # Update email_sent status in database if callback email was sent
+            if email_sent and spooled:
+                await run_in_threadpool(contact_spool.append_update, contact_data["id"], {"email_sent": True})
+            elif email_sent:
+                try:
+                    await run_in_threadpool(run_mongo, lambda: contacts_status.update_one(
+                        {"id": contact_data["id"]},
+                        {"$set": {"email_sent": True}}
+                    ), CONTACT_WRITE_DEADLINE_MS / 1000)
+                    print(f"✅ Email status updated in database")
+                except (pymongo.errors.PyMongoError, CircuitOpenError, DeadlineExceeded) as e:
+                    await run_in_threadpool(contact_spool.append_update, contact_data["id"], {"email_sent": True})
+                    print(f"⚠️ Could not update email status in database, spooled for replay: {e}")
+        
+        return model_response(contact_response_adapter, {
             "success": True,
             "message": "Thank you! Your message has been sent successfully.",
             "id": contact_data["id"],
-            "database": "mongodb" if client else "demo",
+            "database": "spooled" if spooled else ("mongodb" if client else "memory"),
             "email_status": "sent" if email_sent else "not_configured"
-        }
+        })
         
     except Exception as e:
         print(f"❌ Error processing contact: {e}")
         # Still return success to user even if something fails
-        return {
+        return model_response(contact_response_adapter, {
             "success": True,
             "message": "Thank you! Your message has been received. We'll get back to you soon.",
             "id": str(uuid.uuid4()),
             "error": str(e)
-        }
+        })
 
-@app.get("/api/company")
+@app.get("/api/company", response_model=CompanyInfo, response_model_exclude_unset=True,
+         dependencies=[request_budget(CATALOGUE_BUDGET_MS)])
 async def get_company():
+    cached = catalogue_cache.fresh("company")
+    if cached:
+        return cached_response(cached)
     try:
-        # Try to get from database first if we have real connection
-        if client:
-            company = db.company.find_one({"id": "aximoix-company"})
-            if company:
-                return convert_objectid(company)
+        # Try the database first (MongoDB, or the in-memory store in demo mode)
+        generation = catalogue_cache.generation("company")
+        company = await run_in_threadpool(run_mongo, lambda: db.company.find_one({"id": "aximoix-company"}))
+        if company:
+            value, body = render_model(company_adapter, company)
+            return cached_response(catalogue_cache.put("company", "company", value, generation, body))
     except Exception as e:
         print(f"❌ Error fetching company from DB: {e}")
+        stale = catalogue_cache.stale("company")
+        if stale:
+            return cached_response(stale)
     
     # Fallback to static data
-    return {
+    return model_response(company_adapter, {
         "name": "AximoIX",
         "motto": "Innovate. Engage. Grow.",
         "tagline": "Where Vision Meets Velocity",
@@ -790,50 +1156,434 @@ async def get_company():
             "phone": "+1 470 506 4390",
             "address": "3rd Floor 120 West Trinity Place Decatur, GA 30030"
         }
-    }
+    })
 
-@app.get("/api/services")
+@app.get("/api/services", response_model=List[Service], response_model_exclude_unset=True,
+         dependencies=[request_budget(CATALOGUE_BUDGET_MS)])
 async def get_services():
+    cached = catalogue_cache.fresh("services")
+    if cached:
+        return cached_response(cached)
     try:
-        # Try to get from database first if we have real connection
-        if client:
-            db_services = list(db.services.find({"is_active": True}))
-            if db_services and len(db_services) > 0:
-                # Convert ObjectId to string for JSON serialization
-                services = convert_objectid(db_services)
-                print(f"✅ Loaded {len(services)} services from database")
-                return services
+        # Try the database first (MongoDB, or the in-memory store in demo mode)
+        generation = catalogue_cache.generation("services")
+        db_services = await run_in_threadpool(run_mongo, lambda: list(db.services.find({"is_active": True})))
+        if db_services and len(db_services) > 0:
+            # Validate and encode in one pass (drops the ObjectId `_id`)
+            services, body = render_model(service_list_adapter, db_services)
+            print(f"✅ Loaded {len(services)} services from database")
+            return cached_response(catalogue_cache.put("services", "services", services, generation, body))
     except Exception as e:
         print(f"❌ Error fetching services from DB: {e}")
+        stale = catalogue_cache.stale("services")
+        if stale:
+            return cached_response(stale)
     
     # Return static data as fallback
     print("📋 Using static services data as fallback")
-    return get_static_services()
+    return model_response(service_list_adapter, get_static_services())
 
-@app.get("/api/services/{service_id}")
+# ============ SERVICE SEARCH ============
+# BM25 over an in-process inverted index of the catalogue (service_search.py).
+# The index is refreshed when the services generation moves, or after
+# SEARCH_INDEX_MAX_AGE seconds when no change watcher keeps the cache current;
+# every other query is answered from memory.
+SEARCH_INDEX_MAX_AGE = float(os.getenv("SEARCH_INDEX_MAX_AGE", "60"))
+service_index = ServiceSearchIndex()
+
+def current_services():
+    """Active services as validated models: fresh cache, then MongoDB, then the last good or static copy"""
+    cached = catalogue_cache.fresh("services")
+    if cached:
+        return cached.value
+    try:
+        generation = catalogue_cache.generation("services")
+        db_services = run_mongo(lambda: list(db.services.find({"is_active": True})))
+        if db_services:
+            services, body = render_model(service_list_adapter, db_services)
+            catalogue_cache.put("services", "services", services, generation, body)
+            return services
+    except Exception as e:
+        print(f"❌ Error fetching services for the search index: {e}")
+        stale = catalogue_cache.stale("services")
+        if stale:
+            return stale.value
+    return service_list_adapter.validate_python(get_static_services())
+
+def refresh_service_index():
+    generation = catalogue_cache.generation("services")
+    expired = (not catalogue_cache.watching
+               and time.monotonic() - service_index.built_at > SEARCH_INDEX_MAX_AGE)
+    if service_index.generation != generation or expired:
+        services = [service.model_dump(exclude_unset=True) for service in current_services()]
+        indexed, removed = service_index.update(services, generation)
+        if indexed or removed:
+            print(f"🔎 Search index updated: {indexed} service(s) indexed, {removed} removed")
+
+# Registered before /api/services/{service_id} so "search" isn't taken for an id
+@app.get("/api/services/search", response_model=ServiceSearchResults,
+         dependencies=[request_budget(CATALOGUE_BUDGET_MS)])
+async def search_services(q: str = Query(..., min_length=1, max_length=200),
+                          limit: int = Query(10, ge=1, le=50)):
+    """Rank active services for `q` (BM25, with prefix matching for partial words)"""
+    # A rebuild may read the catalogue from MongoDB, so it runs in the threadpool
+    await run_in_threadpool(refresh_service_index)
+    hits = service_index.search(q, limit)
+    return model_response(service_search_adapter, {
+        "query": q,
+        "total": len(hits),
+        "results": [
+            {
+                "id": service["id"],
+                "title": service["title"],
+                "description": service["description"],
+                "icon": service["icon"],
+                "score": round(score, 4),
+                "matched_terms": terms
+            }
+            for service, score, terms in hits
+        ]
+    })
+
+@app.get("/api/services/{service_id}", response_model=Service, response_model_exclude_unset=True,
+         dependencies=[request_budget(CATALOGUE_BUDGET_MS)])
 async def get_service(service_id: str):
+    cache_key = f"service:{service_id}"
+    cached = catalogue_cache.fresh(cache_key)
+    if cached:
+        return cached_response(cached)
     try:
-        # Try to get from database first if we have real connection
-        if client:
-            service = db.services.find_one({"id": service_id})
-            if service:
-                # Convert ObjectId to string for JSON serialization
-                converted_service = convert_objectid(service)
-                print(f"✅ Loaded service {service_id} from database")
-                return converted_service
+        # Try the database first (MongoDB, or the in-memory store in demo mode)
+        generation = catalogue_cache.generation("services")
+        service = await run_in_threadpool(run_mongo, lambda: db.services.find_one({"id": service_id}))
+        if service:
+            value, body = render_model(service_adapter, service)
+            print(f"✅ Loaded service {service_id} from database")
+            return cached_response(catalogue_cache.put(cache_key, "services", value, generation, body))
     except Exception as e:
         print(f"❌ Error fetching service from DB: {e}")
+        stale = catalogue_cache.stale(cache_key)
+        if stale:
+            return cached_response(stale)
     
     # Fallback to static data
     static_service = get_static_service_by_id(service_id)
     if static_service:
         print(f"📋 Using static data for service {service_id}")
-        return static_service
+        return model_response(service_adapter, static_service)
     
     raise HTTPException(status_code=404, detail="Service not found")
 
+# ============ ADMIN API ============
+# Catalogue writes. Every write bumps the document's `version` and `updated_at`;
+# updates must send the version they were based on in If-Match, so concurrent
+# edits fail with 412 instead of overwriting each other. Responses carry the
+# new version in the body and the ETag header.
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+ADMIN_BUDGET_MS = 5000
+# Rollup rebuilds scan contacts, so they get a longer budget than interactive calls
+ANALYTICS_REBUILD_BUDGET_MS = 60000
+
+async def require_admin(authorization: Optional[str] = Header(None)):
+    """Bearer-token check for /api/admin routes; disabled unless ADMIN_API_KEY is set"""
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=503, detail="Admin API is not configured")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin credentials",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+admin_dependencies = [Depends(require_admin), request_budget(ADMIN_BUDGET_MS)]
+
+def parse_if_match(if_match: Optional[str]) -> int:
+    """Expected version from an If-Match header ("3", W/"3" or 3)"""
+    if if_match is None:
+        raise HTTPException(status_code=428, detail="If-Match header with the current version is required")
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid If-Match version: {if_match}")
+
+# pymongo blocks, so handlers that call it are plain defs (FastAPI runs them in
+# the threadpool) or await run_in_threadpool(run_mongo, ...); the threadpool
+# copies the request's context, so its deadline and trace span carry over.
+def admin_db_call(operation, deadline=None):
+    """Run an admin database call; surface an unavailable database as 503"""
+    try:
+        return run_mongo(operation, deadline)
+    except (pymongo.errors.PyMongoError, CircuitOpenError, DeadlineExceeded) as e:
+        print(f"❌ Admin database call failed: {type(e).__name__}: {e}")
+        raise HTTPException(status_code=503, detail="Database unavailable, try again shortly")
+
+def versioned_response(adapter, document, status_code=200, headers=None):
+    return model_response(
+        adapter, document, status_code,
+        headers={"ETag": version_etag(document["version"]), **(headers or {})}
+    )
+
+def apply_versioned_update(collection_name, document_id, fields, expected_version):
+    """$set `fields` if the stored version still equals `expected_version`"""
+    if not fields:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    # Documents written before versioning (seeded data) count as version 0
+    version_filter = {"$in": [0, None]} if expected_version == 0 else expected_version
+    updated = admin_db_call(lambda: db[collection_name].find_one_and_update(
+        {"id": document_id, "version": version_filter},
+        {"$set": {**fields, "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+        return_document=pymongo.ReturnDocument.AFTER
+    ))
+    if updated is None:
+        current = admin_db_call(lambda: db[collection_name].find_one({"id": document_id}, {"version": 1}))
+        if current is None:
+            raise HTTPException(status_code=404, detail=f"{collection_name} document {document_id} not found")
+        current_version = current.get("version", 0)
+        raise HTTPException(
+            status_code=412,
+            detail={"message": "Version conflict", "current_version": current_version},
+            headers={"ETag": version_etag(current_version)}
+        )
+    catalogue_cache.invalidate(collection_name)
+    print(f"✏️ Updated {collection_name}/{document_id} to version {updated['version']}")
+    return convert_objectid(updated)
+
+@app.post("/api/admin/services", status_code=201, response_model=Service, dependencies=admin_dependencies)
+def create_service(service: ServiceCreate):
+    service_data = Service(**service.model_dump()).model_dump()
+    service_data["version"] = 1
+    admin_db_call(lambda: db.services.insert_one(service_data))
+    catalogue_cache.invalidate("services")
+    print(f"✏️ Created service {service_data['id']}")
+    return versioned_response(
+        service_adapter,
+        service_data,
+        status_code=201,
+        headers={"Location": f"/api/services/{service_data['id']}"}
+    )
+
+@app.patch("/api/admin/services/{service_id}", response_model=Service, dependencies=admin_dependencies)
+def update_service(service_id: str, update: ServiceUpdate, if_match: Optional[str] = Header(None)):
+    fields = update.model_dump(exclude_unset=True)
+    return versioned_response(service_adapter,
+                              apply_versioned_update("services", service_id, fields, parse_if_match(if_match)))
+
+@app.patch("/api/admin/company", response_model=CompanyInfo, dependencies=admin_dependencies)
+def update_company(update: CompanyInfoUpdate, if_match: Optional[str] = Header(None)):
+    fields = update.model_dump(exclude_unset=True)
+    return versioned_response(company_adapter,
+                              apply_versioned_update("company", "aximoix-company", fields, parse_if_match(if_match)))
+
+@app.get("/api/admin/analytics/contacts", dependencies=admin_dependencies)
+def contact_analytics(bucket: str = "day", start: Optional[date] = None, end: Optional[date] = None):
+    """Lead volume per day/week/month, per service_interest and per status, from the rollups"""
+    if bucket not in analytics.BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(analytics.BUCKETS)}")
+    start_at = datetime.combine(start, datetime.min.time()) if start else None
+    end_at = datetime.combine(end, datetime.min.time()) if end else None
+    return admin_db_call(lambda: analytics.query_rollups(contact_rollups, bucket, start_at, end_at))
+
+@app.post("/api/admin/analytics/rebuild",
+          dependencies=[Depends(require_admin), request_budget(ANALYTICS_REBUILD_BUDGET_MS)])
+def rebuild_contact_analytics(start: date, end: date):
+    """Recount contacts created in [start, end) and replace those days' rollups (closed days only)"""
+    start_at = datetime.combine(start, datetime.min.time())
+    end_at = datetime.combine(end, datetime.min.time())
+    result = admin_db_call(
+        lambda: analytics.rebuild_rollups(db.contacts, contact_rollups, start_at, end_at),
+        ANALYTICS_REBUILD_BUDGET_MS / 1000
+    )
+    print(f"📊 Rebuilt contact rollups {start}..{result['end']}: {result}")
+    return result
+
+@app.get("/api/admin/contacts/export", dependencies=[Depends(require_admin)])
+async def export_contacts(
+    format: str = "ndjson",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    status: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = 0,
+    batch_size: Optional[int] = None
+):
+    """
+    Stream contacts as NDJSON or CSV, oldest first, in constant memory.
+    No request budget: the stream runs as long as the download does.
+    Every row carries its resume token (NDJSON `cursor` field, last CSV
+    column); resume an interrupted download with `after` = the last row's cursor.
+    """
+    import contact_export
+    if format not in contact_export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(contact_export.FORMATS)}")
+    try:
+        chunks = contact_export.stream_export(
+            db.contacts,
+            export_format=format,
+            start=datetime.combine(start, datetime.min.time()) if start else None,
+            end=datetime.combine(end, datetime.min.time()) if end else None,
+            status=status,
+            after=after,
+            batch_size=max(1, min(batch_size or contact_export.DEFAULT_BATCH_SIZE, 10000)),
+            limit=max(0, limit)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = f"contacts-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    # A sync generator: Starlette iterates it in the threadpool, off the event loop
+    return StreamingResponse(
+        chunks,
+        media_type=contact_export.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/api/admin/contacts/search", dependencies=admin_dependencies)
+def search_contacts(
+    q: str = Query(..., min_length=1, max_length=200),
+    mode: str = "auto",
+    status: Optional[str] = None,
+    service_interest: Optional[str] = None,
+    page: int = Query(1, ge=1, le=50),
+    page_size: int = Query(contact_search.DEFAULT_PAGE_SIZE, ge=1, le=contact_search.MAX_PAGE_SIZE),
+    include_total: bool = False
+):
+    """
+    Find leads by name, email address prefix or @domain, or message words (text
+    index on name/message, index on email_lower), best match first. See contact_search.py.
+    """
+    if mode not in contact_search.MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(contact_search.MODES)}")
+    return admin_db_call(lambda: contact_search.search_contacts(
+        db.contacts, q, mode, status, service_interest, page, page_size, include_total
+    ))
+
+@app.post("/api/admin/retention/archive",
+          dependencies=[Depends(require_admin), request_budget(ANALYTICS_REBUILD_BUDGET_MS)])
+def archive_old_contacts(days: int = CONTACT_RETENTION_DAYS, batch_size: int = 500,
+                         max_batches: int = 20, dry_run: bool = False):
+    """Archive resolved contacts older than `days` into contacts_archive, in bounded batches"""
+    # A plain def: FastAPI runs it in the threadpool, so the pauses between batches don't block the loop
+    if days < 1:
+        raise HTTPException(status_code=400, detail="days must be at least 1")
+    import retention
+    sink = retention.CollectionArchive(db[retention.ARCHIVE_COLLECTION])
+    stats = admin_db_call(
+        lambda: retention.archive_contacts(
+            db.contacts, sink, days,
+            batch_size=max(1, min(batch_size, 5000)),
+            max_batches=max(1, max_batches),
+            dry_run=dry_run,
+            # Stop between batches while there is still budget to finish one
+            should_stop=lambda: deadline_remaining(60) < 5
+        ),
+        ANALYTICS_REBUILD_BUDGET_MS / 1000
+    )
+    print(f"🗄️ Contact archival ({days}d): {stats}")
+    return stats
+
+@app.post("/api/admin/notifications/send-pending",
+          dependencies=[Depends(require_admin), request_budget(ANALYTICS_REBUILD_BUDGET_MS)])
+async def send_pending_notifications(days: int = 7, limit: int = 1000, dry_run: bool = False):
+    """Send notifications for recent contacts with email_sent=false, through the batch API"""
+    if days < 1:
+        raise HTTPException(status_code=400, detail="days must be at least 1")
+    if mail_transport is None and not dry_run:
+        raise HTTPException(status_code=503, detail="Mail is not configured")
+    try:
+        stats = await mail_batcher.send_pending(
+            contacts_status, mail_transport, build_contact_email,
+            days=days,
+            limit=max(1, min(limit, 10000)),
+            max_batch_size=MAIL_BATCH_SIZE,
+            breaker=resend_breaker,
+            dry_run=dry_run,
+            # Stop between batches while there is still budget to send one
+            should_stop=lambda: deadline_remaining(60) < RESEND_DEADLINE_MS / 1000 + 1
+        )
+    except pymongo.errors.PyMongoError as e:
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {type(e).__name__}")
+    print(f"📧 Pending notifications ({days}d): {stats}")
+    return stats
+
+# ============ PROFILING ============
+# Sampling profiler for this worker (profiler.py), for admins: profile the
+# next N seconds with POST /api/admin/profile, or one request by sending
+# `X-Profile: <ADMIN_API_KEY>` with it. Off unless PROFILING=1; when off,
+# neither the route nor the middleware is registered, so requests pay nothing.
+PROFILING = os.getenv("PROFILING", "").lower() in ("1", "true", "yes")
+PROFILE_MAX_SECONDS = 30
+# Finer than the default 5 ms, so a request of a few ms still gets samples
+PROFILE_REQUEST_INTERVAL_MS = float(os.getenv("PROFILE_REQUEST_INTERVAL_MS", "1"))
+
+def profile_headers(sampler, **extra):
+    summary = sampler.summary()
+    return {
+        "X-Profile-Mode": summary["mode"],
+        "X-Profile-Samples": str(summary["samples"]),
+        "X-Profile-Duration-Ms": str(summary["duration_ms"]),
+        "Cache-Control": "no-store",
+        **extra
+    }
+
+if PROFILING:
+    import profiler
+
+    @app.middleware("http")
+    async def profile_request(request, call_next):
+        """Answer a request flagged with X-Profile with its profile instead of its response"""
+        token = request.headers.get("x-profile")
+        if token is None or not ADMIN_API_KEY or not hmac.compare_digest(token.encode(), ADMIN_API_KEY.encode()):
+            return await call_next(request)
+        output_format = request.headers.get("x-profile-format", "collapsed")
+        if output_format not in profiler.FORMATS or not profiler.acquire():
+            response = await call_next(request)
+            response.headers["X-Profile"] = "busy" if output_format in profiler.FORMATS else "invalid-format"
+            return response
+        try:
+            sampler = profiler.SamplingProfiler(PROFILE_REQUEST_INTERVAL_MS / 1000).start()
+            try:
+                response = await call_next(request)
+                # Drain the body so work done while streaming it is profiled too
+                async for _ in response.body_iterator:
+                    pass
+            finally:
+                sampler.stop()
+        finally:
+            profiler.release()
+        body, media_type = sampler.render(output_format, name=f"{request.method} {request.url.path}")
+        print(f"🔬 Profiled {request.method} {request.url.path}: {sampler.summary()}")
+        return Response(content=body, media_type=media_type,
+                        headers=profile_headers(sampler, **{"X-Profiled-Status": str(response.status_code)}))
+
+    @app.post("/api/admin/profile",
+              dependencies=[Depends(require_admin), request_budget(ANALYTICS_REBUILD_BUDGET_MS)])
+    async def profile_worker(
+        seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+        format: str = "collapsed",
+        interval_ms: float = Query(profiler.DEFAULT_INTERVAL * 1000, ge=1, le=100),
+        include_idle: bool = False
+    ):
+        """Sample every thread of the worker that serves this call for `seconds`"""
+        if format not in profiler.FORMATS:
+            raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(profiler.FORMATS)}")
+        if not profiler.acquire():
+            raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+        try:
+            sampler = profiler.SamplingProfiler(interval_ms / 1000, include_idle).start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                sampler.stop()
+        finally:
+            profiler.release()
+        print(f"🔬 Profiled worker {os.getpid()} for {seconds}s: {sampler.summary()}")
+        body, media_type = sampler.render(format, name=f"worker {os.getpid()}, {seconds:g}s")
+        return Response(content=body, media_type=media_type,
+                        headers=profile_headers(sampler, **{"X-Profile-Worker": str(os.getpid())}))
+
 @app.get("/api/health")
-async def health_check():
+def health_check():
+    # A plain def: the ping and the counts run in the threadpool
     try:
         # Test if we have MongoDB connection
         if client:
@@ -847,10 +1597,10 @@ async def health_check():
             contacts_count = db.contacts.count_documents({}) if 'contacts' in collections else 0
         else:
             db_status = "demo_mode"
-            services_count = len(get_static_services())
-            company_count = 1
-            contacts_count = 0
-            collections = ["demo_mode"]
+            services_count = db.services.count_documents({})
+            company_count = db.company.count_documents({})
+            contacts_count = db.contacts.count_documents({})
+            collections = db.list_collection_names()
         
         return {
             "status": "healthy", 
@@ -861,6 +1611,32 @@ async def health_check():
                 "company": company_count,
                 "contacts": contacts_count
             },
+            "circuit_breakers": {name: breaker.state for name, breaker in circuit_breakers.items()},
+            "contact_spool": {
+                "pending": contact_spool.pending_count(),
+                "replayed": spool_replayer.replayed_total,
+                "last_error": spool_replayer.last_error
+            },
+            "catalogue_cache": {
+                **catalogue_cache.metrics(),
+                "watcher": catalogue_watcher.metrics()
+            },
+            "service_search": service_index.metrics(),
+            "cdn_cache": {
+                "policies": cache_policies.describe(),
+                "purger": cdn_purger.metrics() if cdn_purger is not None else "off"
+            },
+            "contact_writes": {
+                "insert": CONTACT_INSERT_WRITE_CONCERN,
+                "status": CONTACT_STATUS_WRITE_CONCERN,
+                "mode": CONTACT_WRITE_MODE
+            },
+            "tracing": tracer.metrics() if tracer is not None else "off",
+            "event_loop": {
+                "lag_p99_le_ms": loop_monitor.histogram.quantile(0.99),
+                "lag_max_ms": round(loop_monitor.histogram.max_ms, 1),
+                "blocked_total": loop_monitor.blocked_total
+            },
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
@@ -871,80 +1647,84 @@ async def health_check():
             "timestamp": datetime.utcnow().isoformat()
         }
 
-# Test database operations
-@app.get("/api/test-db")
-async def test_database():
-    """Test database connection and operations"""
-    try:
-        if client:
-            # Test connection
-            client.admin.command('ping')
-            
-            # Test collections
-            collections = db.list_collection_names()
-            
-            # Test insert
-            test_doc = {
-                "id": "test-" + str(uuid.uuid4()),
-                "message": "Test document from Vercel",
-                "created_at": datetime.utcnow(),
-                "test": True
-            }
-            
-            result = db.test.insert_one(test_doc)
-            
-            # Test read
-            found_doc = db.test.find_one({"id": test_doc["id"]})
-            
-            # Clean up
-            db.test.delete_one({"id": test_doc["id"]})
-            
-            return {
-                "status": "success",
-                "database": "connected",
-                "collections": collections,
-                "test_insert": "successful",
-                "test_read": "successful" if found_doc else "failed",
-                "message": "Real MongoDB connection working"
-            }
-        else:
-            return {
-                "status": "demo_mode",
-                "database": "mock_database",
-                "message": "Running in demo mode - no real MongoDB connection",
-                "test_insert": "simulated",
-                "test_read": "simulated"
-            }
-            
-    except Exception as e:
-        return {
-            "status": "error",
-            "database": "disconnected",
-            "error": str(e)
-        }
+@app.get("/api/circuit-breakers")
+async def circuit_breaker_metrics():
+    """State and counters for each dependency's circuit breaker"""
+    return {
+        "breakers": {name: breaker.metrics() for name, breaker in circuit_breakers.items()},
+        "mail_transport": mail_transport.metrics() if mail_transport else None,
+        "mail_batcher": contact_mailer.metrics() if contact_mailer else None,
+        "timestamp": datetime.utcnow().isoformat()
+    }
 
-# Add a route to clean up test data
-@app.delete("/api/cleanup-test")
-async def cleanup_test_data():
-    """Clean up any test data"""
-    try:
-        if client and hasattr(db, 'test'):
-            result = db.test.delete_many({"test": True})
-            return {
-                "success": True,
-                "deleted_count": result.deleted_count,
-                "message": "Test data cleaned up"
-            }
-        return {
-            "success": True,
-            "message": "No test data to clean up"
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e)
-        }
+@app.get("/api/deadlines")
+async def deadline_metrics_endpoint():
+    """Per-route latency budgets, request counts and deadline-exceeded counts"""
+    return {
+        "routes": deadline_metrics(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/api/loop-health")
+async def loop_health():
+    """Event-loop lag histogram (ms) and how often the loop was blocked"""
+    metrics = loop_monitor.metrics()
+    metrics.pop("recent_blocking")
+    return {**metrics, "timestamp": datetime.utcnow().isoformat()}
+
+@app.get("/api/admin/loop-health", dependencies=[Depends(require_admin)])
+async def loop_health_admin():
+    """/api/loop-health plus the stacks of the most recent blocking calls"""
+    return {**loop_monitor.metrics(), "timestamp": datetime.utcnow().isoformat()}
+
+@app.get("/api/admin/memory", dependencies=[Depends(require_admin)])
+async def memory_admin():
+    """Traced and peak RSS memory of this worker, per-route allocations and the stored snapshot ids"""
+    import memory_tracking
+    route_allocations, memory_snapshots = memory_stores()
+    return {
+        **memory_tracking.process_memory(),
+        "worker": os.getpid(),
+        "routes": route_allocations.metrics(),
+        "snapshots": memory_snapshots.ids(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Snapshots walk every traced block, and stopping tracemalloc frees every trace,
+# so these run in the threadpool, off the event loop
+@app.post("/api/admin/memory/snapshot", dependencies=[Depends(require_admin)])
+def memory_snapshot(limit: int = Query(20, ge=1, le=200)):
+    """Snapshot this worker's traced allocations (starting tracemalloc if needed); the top lines by size"""
+    import tracemalloc
+    _, memory_snapshots = memory_stores()
+    started = not tracemalloc.is_tracing()
+    summary = memory_snapshots.summary(limit)
+    print(f"🧮 Memory snapshot {summary['id']} on worker {os.getpid()}: {summary['traced_kb']} KB traced")
+    return {**summary, "worker": os.getpid(), "tracing_started": started}
+
+@app.get("/api/admin/memory/diff", dependencies=[Depends(require_admin)])
+def memory_diff(base: int, limit: int = Query(20, ge=1, le=200)):
+    """Take a new snapshot and list the lines whose allocations changed most since snapshot `base`"""
+    _, memory_snapshots = memory_stores()
+    diff = memory_snapshots.diff(base, limit)
+    if diff is None:
+        raise HTTPException(status_code=404,
+                            detail=f"Snapshot {base} not found on worker {os.getpid()}; kept: {memory_snapshots.ids()}")
+    return {**diff, "worker": os.getpid()}
+
+@app.delete("/api/admin/memory", dependencies=[Depends(require_admin)])
+def memory_reset():
+    """Drop snapshots and per-route numbers; stop tracemalloc unless MEMORY_TRACKING keeps it on"""
+    import memory_tracking
+    import tracemalloc
+    route_allocations, memory_snapshots = memory_stores()
+    memory_snapshots.clear()
+    route_allocations.reset()
+    if not MEMORY_TRACKING:
+        tracemalloc.stop()
+    return {**memory_tracking.process_memory(), "worker": os.getpid()}
 
 if __name__ == "__main__":
+    # Single-process development server; use serve.py for multi-worker production
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
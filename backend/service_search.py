@@ -0,0 +1,200 @@
+"""
+In-process full-text search over the service catalogue (BM25)
+
+The index maps each term to the services that contain it (an inverted index
+of term -> {service id: weighted term frequency}). Fields are weighted before
+counting, so a hit in the title outweighs one in a case study:
+
+    title 3, features 2, technologies 2, description 1.5,
+    overview / benefits / case studies 1
+
+Tokens are lowercased, stopwords dropped and common suffixes stripped
+(stem()), so "migration" and "migrated" meet at "migrat". Queries are scored
+with Okapi BM25 (k1=1.2, b=0.75). For search-as-you-type, each query term
+also matches, at PREFIX_WEIGHT of an exact match:
+- vocabulary terms it is a prefix of ("blockch" -> "blockchain"), found in a
+  sorted vocabulary with bisect
+- a stem it runs past by up to 3 characters ("migrati" -> "migrat")
+
+update(services) applies a new catalogue incrementally. Services whose content
+fingerprint is unchanged are left alone, changed ones are re-indexed and
+removed ones are dropped. server.py calls it when the catalogue generation
+moves (admin write or change-watcher invalidation), or after
+SEARCH_INDEX_MAX_AGE seconds when nothing watches the catalogue. Queries never
+touch MongoDB.
+"""
+
+import bisect
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "features": 2.0,
+    "detailed_info.technologies": 2.0,
+    "description": 1.5,
+    "detailed_info.overview": 1.0,
+    "detailed_info.benefits": 1.0,
+    "detailed_info.case_studies": 1.0,
+}
+K1 = 1.2
+B = 0.75
+PREFIX_WEIGHT = 0.8
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 32
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or our that the to with your we you".split()
+)
+
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+# Longest first; a stem keeps at least MIN_STEM_LENGTH characters
+SUFFIXES = ("ings", "ing", "ions", "ion", "ed", "es", "s")
+MIN_STEM_LENGTH = 4
+
+
+def stem(token):
+    """Crude suffix stripping: enough to match plural and verb forms of catalogue terms"""
+    if token.endswith("ss"):
+        return token
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text):
+    return [stem(token) for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _field(service, path):
+    value = service
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+        if value is None:
+            return []
+    return value if isinstance(value, list) else [value]
+
+
+def fingerprint(service):
+    return hashlib.sha1(json.dumps(service, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ServiceSearchIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}      # term -> {service id: weighted tf}
+        self._lengths = {}       # service id -> weighted document length
+        self._fingerprints = {}  # service id -> content fingerprint
+        self._services = {}      # service id -> service dict
+        self._vocabulary = []    # sorted terms, for prefix lookups
+        self._average_length = 0.0
+        self.generation = None
+        self.built_at = 0.0
+        self._counters = {"updates": 0, "documents_indexed": 0, "documents_removed": 0, "queries": 0}
+
+    # ---- building ----
+
+    def _add(self, service_id, service):
+        frequencies = Counter()
+        for path, weight in FIELD_WEIGHTS.items():
+            for text in _field(service, path):
+                for token in tokenize(str(text)):
+                    frequencies[token] += weight
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, {})[service_id] = frequency
+        self._lengths[service_id] = sum(frequencies.values())
+        self._services[service_id] = service
+
+    def _remove(self, service_id):
+        for term in list(self._postings):
+            postings = self._postings[term]
+            if postings.pop(service_id, None) is not None and not postings:
+                del self._postings[term]
+        self._lengths.pop(service_id, None)
+        self._services.pop(service_id, None)
+        self._fingerprints.pop(service_id, None)
+
+    def update(self, services, generation=None):
+        """Bring the index in line with `services` (dicts with an `id`); returns (indexed, removed)"""
+        incoming = {service["id"]: service for service in services}
+        with self._lock:
+            removed = [service_id for service_id in self._fingerprints if service_id not in incoming]
+            for service_id in removed:
+                self._remove(service_id)
+            indexed = 0
+            for service_id, service in incoming.items():
+                digest = fingerprint(service)
+                if self._fingerprints.get(service_id) == digest:
+                    continue
+                self._remove(service_id)
+                self._add(service_id, service)
+                self._fingerprints[service_id] = digest
+                indexed += 1
+            if indexed or removed:
+                self._vocabulary = sorted(self._postings)
+                self._average_length = (sum(self._lengths.values()) / len(self._lengths)) if self._lengths else 0.0
+            self.generation = generation
+            self.built_at = time.monotonic()
+            self._counters["updates"] += 1
+            self._counters["documents_indexed"] += indexed
+            self._counters["documents_removed"] += len(removed)
+        return indexed, len(removed)
+
+    # ---- querying ----
+
+    def _expand(self, token):
+        """(term, weight) pairs a query token matches: itself, plus terms it prefixes"""
+        matches = [(token, 1.0)] if token in self._postings else []
+        if len(token) >= MIN_PREFIX_LENGTH:
+            start = bisect.bisect_left(self._vocabulary, token)
+            for term in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+                if not term.startswith(token):
+                    break
+                if term != token:
+                    matches.append((term, PREFIX_WEIGHT))
+        # A partly typed word can run past its stem ("migratio" -> "migrat")
+        for cut in range(1, 4):
+            shorter = token[:-cut]
+            if len(shorter) < MIN_STEM_LENGTH:
+                break
+            if shorter in self._postings:
+                matches.append((shorter, PREFIX_WEIGHT))
+                break
+        return matches
+
+    def _idf(self, term):
+        documents = len(self._lengths)
+        containing = len(self._postings[term])
+        return math.log(1 + (documents - containing + 0.5) / (containing + 0.5))
+
+    def search(self, query, limit=10):
+        """[(service, score, matched terms)] best first"""
+        with self._lock:
+            self._counters["queries"] += 1
+            scores = {}
+            matched = {}
+            for token in dict.fromkeys(tokenize(query)):
+                for term, weight in self._expand(token):
+                    idf = self._idf(term)
+                    for service_id, frequency in self._postings[term].items():
+                        length_norm = 1 - B + B * self._lengths[service_id] / (self._average_length or 1)
+                        score = idf * frequency * (K1 + 1) / (frequency + K1 * length_norm)
+                        scores[service_id] = scores.get(service_id, 0.0) + weight * score
+                        matched.setdefault(service_id, set()).add(term)
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            return [(self._services[service_id], score, sorted(matched[service_id])) for service_id, score in ranked]
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "documents": len(self._lengths),
+                "terms": len(self._postings),
+                "generation": self.generation,
+                "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at else None,
+                **self._counters,
+            }
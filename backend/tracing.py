@@ -0,0 +1,393 @@
+"""
+Request tracing: spans for routes, MongoDB commands and mail calls
+
+A span records one timed piece of work: a route (kind "server"), a MongoDB
+command or a Resend call ("client"), or anything else ("internal"). Spans
+in a request share its trace id. The current span lives in a contextvar
+(like deadlines.py), so child spans attach to the request. That holds across
+awaits and threadpool calls too. Spans are parented as follows:
+
+- Routes continue the caller's trace when it sends a W3C `traceparent`
+  header (the frontend does, see src/hooks/useApi.js), and otherwise start a
+  new one. Each response carries `traceresponse` with the trace and span id.
+- MongoDB commands are traced through PyMongo command monitoring
+  (MongoCommandTracer, passed to MongoClient as an event listener). A command
+  is recorded only when it runs inside a traced span. Command bodies are
+  never recorded, so no contact data ends up in a span.
+- Mail sends wrap the transport call (server.send_contact_email,
+  mail_batcher.BatchMailer).
+
+Finished spans are buffered and exported in batches from a background thread:
+
+    file    one JSON object per line (JsonFileExporter), fully offline
+    otlp    OTLP/HTTP JSON to a collector's /v1/traces (Jaeger, Tempo, the
+            OpenTelemetry Collector), sent with httpx
+    memory  kept in a list, for tests
+
+When tracing is off (configure() never called), span() returns a shared no-op
+span. The middleware and the command listener are not installed at all.
+"""
+
+import contextvars
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from pymongo import monitoring
+
+KINDS = {"internal": 1, "server": 2, "client": 3}
+EXPORTERS = ("file", "otlp", "memory")
+DEFAULT_OTLP_ENDPOINT = "http://localhost:4318"
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?$")
+
+_current = contextvars.ContextVar("current_span", default=None)
+_tracer = None
+
+
+# ============ TRACE CONTEXT ============
+
+def parse_traceparent(header):
+    """(trace id, parent span id, sampled) from a W3C traceparent header, or None if invalid"""
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if not match:
+        return None
+    version, trace_id, span_id, flags, rest = match.groups()
+    if version == "ff" or (version == "00" and rest) or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+def new_id(length):
+    return f"{random.getrandbits(length * 4):0{length}x}"
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "sampled",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name, kind, trace_id, parent_id, sampled, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = new_id(16)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, message):
+        self.error = str(message)[:500]
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @property
+    def duration_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns else None
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": datetime.fromtimestamp(self.start_ns / 1e9, timezone.utc).isoformat(),
+            "duration_ms": round(self.duration_ms, 3) if self.end_ns else None,
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+class _NoopSpan:
+    """What span() yields while tracing is off"""
+    sampled = False
+    traceparent = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, message):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+# ============ EXPORTERS ============
+
+class MemoryExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def close(self):
+        pass
+
+
+class JsonFileExporter:
+    """Appends one JSON line per span to `path`"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans):
+        with open(self.path, "a", encoding="utf-8") as output:
+            output.write("".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans))
+
+    def close(self):
+        pass
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class OtlpHttpExporter:
+    """OTLP/HTTP with the JSON encoding (ids as hex strings), POSTed to <endpoint>/v1/traces"""
+
+    def __init__(self, endpoint=DEFAULT_OTLP_ENDPOINT, headers=None, service_name="aximoix-api", timeout=5.0):
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else f"{endpoint}/v1/traces"
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.resource = {"attributes": _otlp_attributes({"service.name": service_name})}
+        self.timeout = timeout
+        self._client = None
+        self.failures = 0
+
+    def payload(self, spans):
+        return {"resourceSpans": [{
+            "resource": self.resource,
+            "scopeSpans": [{
+                "scope": {"name": "aximoix.tracing"},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                    "name": span.name,
+                    "kind": KINDS[span.kind],
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": _otlp_attributes(span.attributes),
+                    "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                } for span in spans],
+            }],
+        }]}
+
+    def export(self, spans):
+        if self._client is None:
+            import httpx
+            self._client = httpx.Client(timeout=self.timeout)
+        try:
+            response = self._client.post(self.url, json=self.payload(spans), headers=self.headers)
+            response.raise_for_status()
+        except Exception as e:
+            self.failures += 1
+            if self.failures == 1 or self.failures % 100 == 0:
+                print(f"⚠️ Could not export {len(spans)} span(s) to {self.url}: {type(e).__name__}: {e}")
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+
+def parse_headers(value):
+    """OTEL_EXPORTER_OTLP_HEADERS format: key1=value1,key2=value2"""
+    headers = {}
+    for item in (value or "").split(","):
+        key, _, header_value = item.partition("=")
+        if key.strip() and header_value.strip():
+            headers[key.strip()] = header_value.strip()
+    return headers
+
+
+def create_exporter(kind, path=None, endpoint=None, headers=None, service_name="aximoix-api"):
+    if kind == "file":
+        return JsonFileExporter(path)
+    if kind == "otlp":
+        return OtlpHttpExporter(endpoint or DEFAULT_OTLP_ENDPOINT, headers, service_name)
+    if kind == "memory":
+        return MemoryExporter()
+    raise ValueError(f"Unknown trace exporter: {kind} (expected one of {', '.join(EXPORTERS)})")
+
+
+# ============ TRACER ============
+
+class Tracer:
+    """Creates spans and exports finished ones in batches from a background thread"""
+
+    def __init__(self, exporter, sample_ratio=1.0, batch_size=256, flush_interval=2.0):
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._counters = {"started": 0, "exported": 0, "dropped": 0}
+
+    def start_span(self, name, kind="internal", attributes=None, parent=None):
+        """`parent` is a Span, a parsed traceparent tuple, or None for the current span"""
+        parent = _current.get() if parent is None else parent
+        if isinstance(parent, Span):
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        elif parent:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = new_id(32), None, random.random() < self.sample_ratio
+        self._counters["started"] += 1
+        return Span(name, kind, trace_id, parent_id, sampled, attributes)
+
+    def end_span(self, span):
+        span.end_ns = time.time_ns()
+        if not span.sampled:
+            return
+        with self._lock:
+            self._buffer.append(span)
+            full = len(self._buffer) >= self.batch_size
+        if self._thread is None:
+            self._start_thread()
+        if full:
+            self._wake.set()
+
+    @contextmanager
+    def span(self, name, kind="internal", attributes=None, parent=None):
+        span = self.start_span(name, kind, attributes, parent)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current.reset(token)
+            self.end_span(span)
+
+    def _start_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Export everything buffered now"""
+        with self._export_lock:
+            with self._lock:
+                spans, self._buffer = self._buffer, []
+            for start in range(0, len(spans), self.batch_size):
+                batch = spans[start:start + self.batch_size]
+                try:
+                    self.exporter.export(batch)
+                    self._counters["exported"] += len(batch)
+                except Exception as e:
+                    self._counters["dropped"] += len(batch)
+                    print(f"⚠️ Trace export failed: {type(e).__name__}: {e}")
+
+    def shutdown(self):
+        self.flush()
+        self.exporter.close()
+
+    def metrics(self):
+        with self._lock:
+            buffered = len(self._buffer)
+        return {"exporter": type(self.exporter).__name__, "sample_ratio": self.sample_ratio,
+                "buffered": buffered, **self._counters}
+
+
+def configure(exporter, **options):
+    """Turn tracing on for this process"""
+    global _tracer
+    _tracer = Tracer(exporter, **options)
+    return _tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+def current_span():
+    return _current.get()
+
+
+def span(name, kind="internal", attributes=None):
+    """Context manager for a child of the current span (a no-op while tracing is off)"""
+    if _tracer is None:
+        return _noop_span()
+    return _tracer.span(name, kind, attributes)
+
+
+@contextmanager
+def _noop_span():
+    yield NOOP_SPAN
+
+
+# ============ MONGODB COMMAND MONITORING ============
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """A client span per MongoDB command that runs inside a traced span"""
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self._spans = {}
+
+    def started(self, event):
+        parent = _current.get()
+        if parent is None or not parent.sampled:
+            return
+        collection = event.command.get(event.command_name)
+        host, port = event.connection_id
+        self._spans[(event.request_id, event.connection_id)] = self.tracer.start_span(
+            f"mongodb.{event.command_name}", "client", {
+                "db.system": "mongodb",
+                "db.name": event.database_name,
+                "db.operation": event.command_name,
+                "db.mongodb.collection": collection if isinstance(collection, str) else None,
+                "net.peer.name": host,
+                "net.peer.port": port,
+            }, parent=parent)
+
+    def _finish(self, event, error=None):
+        span = self._spans.pop((event.request_id, event.connection_id), None)
+        if span is None:
+            return
+        if error:
+            span.set_error(error)
+        self.tracer.end_span(span)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        failure = event.failure if isinstance(event.failure, dict) else {}
+        self._finish(event, failure.get("errmsg") or failure.get("codeName") or "command failed")
@@ -11,6 +11,12 @@ const getApiBaseUrl = () => {
 
 const config = {
   API_BASE_URL: getApiBaseUrl(),
+  // Static snapshots of the read-only endpoints (backend/export_static.py -> public/api).
+  // Off unless the build exports them (npm run build:static); see PERFORMANCE.md
+  STATIC_API_BASE_URL: `${process.env.PUBLIC_URL || ''}/api`,
+  USE_STATIC_API: process.env.REACT_APP_USE_STATIC_API === 'true',
+  // Send a W3C traceparent on every API call (simple GETs then need a CORS preflight)
+  TRACE_API_REQUESTS: process.env.REACT_APP_TRACE_API_REQUESTS === 'true',
   ENV: process.env.NODE_ENV || 'production',
   IS_PRODUCTION: process.env.NODE_ENV === 'production'
 };
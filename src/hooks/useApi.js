@@ -3,6 +3,40 @@ import { useState, useEffect, useCallback } from 'react';
 import axios from 'axios';
 import config from '../config';
 
+// Read-only endpoints that backend/export_static.py snapshots into public/api
+const STATIC_ENDPOINTS = /^\/(company|services(\/[\w-]+)?)$/;
+
+// Try the CDN-served snapshot first; null means "ask the API"
+const fetchStaticSnapshot = async (endpoint) => {
+  if (!config.USE_STATIC_API || !STATIC_ENDPOINTS.test(endpoint)) {
+    return null;
+  }
+  try {
+    const response = await axios.get(`${config.STATIC_API_BASE_URL}${endpoint}.json`, {
+      timeout: 5000,
+      withCredentials: false
+    });
+    // Dev servers answer unknown paths with index.html; only accept JSON payloads
+    return response.data && typeof response.data === 'object' ? response.data : null;
+  } catch (err) {
+    return null;
+  }
+};
+
+// W3C trace context, so backend traces (backend/tracing.py) start at the browser call
+const newTraceparent = () => {
+  const hex = (bytes) => Array.from(
+    window.crypto.getRandomValues(new Uint8Array(bytes)),
+    (byte) => byte.toString(16).padStart(2, '0')
+  ).join('');
+  return `00-${hex(16)}-${hex(8)}-01`;
+};
+
+// A custom header makes a simple GET need a CORS preflight, so those only carry
+// one when REACT_APP_TRACE_API_REQUESTS=true; requests that are preflighted anyway always do
+const traceHeaders = (preflighted = false) =>
+  (preflighted || config.TRACE_API_REQUESTS ? { traceparent: newTraceparent() } : {});
+
 // Custom hook for API calls
 export const useApi = (endpoint, dependencies = []) => {
   const [data, setData] = useState(null);
@@ -14,6 +48,12 @@ export const useApi = (endpoint, dependencies = []) => {
       setLoading(true);
       setError(null);
       
+      const snapshot = await fetchStaticSnapshot(endpoint);
+      if (snapshot) {
+        setData(snapshot);
+        return;
+      }
+      
       const apiUrl = `${config.API_BASE_URL}${endpoint}`;
       
       const response = await axios.get(apiUrl, {
@@ -21,6 +61,7 @@ export const useApi = (endpoint, dependencies = []) => {
         headers: {
           'Content-Type': 'application/json',
           'Accept': 'application/json',
+          ...traceHeaders(true),
         },
         withCredentials: false
       });
@@ -232,6 +273,7 @@ export const apiService = {
         timeout: 15000,
         headers: {
           'Content-Type': 'application/json',
+          ...traceHeaders(true),
         }
       });
       
@@ -263,11 +305,16 @@ export const apiService = {
   },
 
   getServices: async () => {
+    const snapshot = await fetchStaticSnapshot('/services');
+    if (snapshot) {
+      return { success: true, data: snapshot };
+    }
     try {
       const apiUrl = `${config.API_BASE_URL}/services`;
       const response = await axios.get(apiUrl, {
         timeout: 15000,
-        withCredentials: false
+        withCredentials: false,
+        headers: traceHeaders()
       });
       return { success: true, data: response.data };
     } catch (error) {
@@ -281,12 +328,17 @@ export const apiService = {
   },
 
   getServiceDetails: async (serviceId) => {
+    const snapshot = await fetchStaticSnapshot(`/services/${serviceId}`);
+    if (snapshot) {
+      return { success: true, data: snapshot };
+    }
     try {
       const apiUrl = `${config.API_BASE_URL}/services/${serviceId}`;
       console.log(`🔍 Fetching service details for: ${serviceId} from ${apiUrl}`);
       const response = await axios.get(apiUrl, {
         timeout: 15000,
-        withCredentials: false
+        withCredentials: false,
+        headers: traceHeaders()
       });
       
       console.log(`✅ Service details loaded:`, response.data);
@@ -310,12 +362,37 @@ export const apiService = {
     }
   },
 
+  // Ranked service search (BM25 over the catalogue, matches partial words)
+  searchServices: async (query, limit = 10) => {
+    try {
+      const apiUrl = `${config.API_BASE_URL}/services/search`;
+      const response = await axios.get(apiUrl, {
+        params: { q: query, limit },
+        timeout: 5000,
+        withCredentials: false,
+        headers: traceHeaders()
+      });
+      return { success: true, data: response.data };
+    } catch (error) {
+      console.error('❌ Error searching services:', error);
+      return {
+        success: false,
+        error: error.response?.data?.detail || error.message || 'Search failed'
+      };
+    }
+  },
+
   getCompanyInfo: async () => {
+    const snapshot = await fetchStaticSnapshot('/company');
+    if (snapshot) {
+      return { success: true, data: snapshot };
+    }
     try {
       const apiUrl = `${config.API_BASE_URL}/company`;
       const response = await axios.get(apiUrl, {
         timeout: 15000,
-        withCredentials: false
+        withCredentials: false,
+        headers: traceHeaders()
       });
       return { success: true, data: response.data };
     } catch (error) {
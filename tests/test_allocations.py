@@ -0,0 +1,53 @@
+"""
+Per-route and per-function allocation budgets (check_allocations.ROUTES / FUNCTIONS)
+
+The server fixture imports a fresh server module with MEMORY_TRACKING=1, so
+the allocation middleware is registered. The environment, the server module
+and tracemalloc are restored afterwards, so other test modules don't run
+with tracking on.
+"""
+
+import asyncio
+import sys
+import tracemalloc
+
+import pytest
+
+import check_allocations
+
+REPEAT = 10
+
+
+@pytest.fixture(scope="module")
+def server():
+    previous = sys.modules.pop("server", None)
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in check_allocations.environment().items():
+            patch.setenv(name, value)
+        try:
+            yield check_allocations.load_server()
+        finally:
+            tracemalloc.stop()
+            sys.modules.pop("server", None)
+            if previous is not None:
+                sys.modules["server"] = previous
+
+
+def assert_within_budget(result):
+    peak_budget, net_budget, over = check_allocations.over_budget(result)
+    assert not over, (f"{result['name']} allocated peak {result['peak_kb']} KB (budget {peak_budget:g}), "
+                      f"net {result['net_kb']} KB per call (budget {net_budget:g}); find the allocating lines "
+                      "with POST /api/admin/memory/snapshot and GET /api/admin/memory/diff")
+
+
+@pytest.mark.parametrize("route", check_allocations.ROUTES, ids=lambda route: f"{route[0]} {route[1]}")
+def test_route_within_allocation_budget(server, route):
+    [result] = asyncio.run(check_allocations.measure_routes(server, [route], REPEAT))
+    assert all(status < 500 for status in result["status"]), result
+    assert_within_budget(result)
+
+
+@pytest.mark.parametrize("name", check_allocations.FUNCTIONS)
+def test_function_within_allocation_budget(server, name):
+    [result] = check_allocations.measure_functions(server, REPEAT, [name])
+    assert_within_budget(result)
@@ -0,0 +1,120 @@
+"""
+CDN cache policies: which route gets which Cache-Control, and how purges are coalesced
+"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+from starlette.responses import Response
+
+from cache_policy import NO_STORE, CachePolicies, CachePolicy, CdnPurger
+
+CATALOGUE = CachePolicy(60, 300, 86400, tags=("services",))
+COMPANY = CachePolicy(300, tags=("company",))
+
+
+@pytest.fixture
+def policies():
+    return CachePolicies([
+        ("/api/admin/*", NO_STORE),
+        ("/api/services*", CATALOGUE),
+        ("/api/company", COMPANY),
+    ])
+
+
+def request(method, route_path=None, url_path=None):
+    route = SimpleNamespace(path=route_path) if route_path else None
+    return SimpleNamespace(method=method, scope={"route": route}, url=SimpleNamespace(path=url_path or route_path))
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.posts = []
+        self.fail = fail
+        self.posted = threading.Event()
+
+    def post(self, url, json=None, headers=None):
+        self.posts.append((url, json, headers))
+        self.posted.set()
+        if self.fail:
+            raise ConnectionError("purge endpoint down")
+        return SimpleNamespace(raise_for_status=lambda: None)
+
+    def close(self):
+        pass
+
+
+def test_policy_headers():
+    assert CATALOGUE.header == "public, max-age=0, s-maxage=60, stale-while-revalidate=300, stale-if-error=86400"
+    assert COMPANY.header == "public, max-age=0, s-maxage=300"
+    assert NO_STORE.header == "no-store" and not NO_STORE.cacheable
+
+
+def test_policy_for_first_matching_rule_and_method(policies):
+    assert policies.policy_for("GET", "/api/services/{service_id}") is CATALOGUE
+    assert policies.policy_for("HEAD", "/api/company") is COMPANY
+    assert policies.policy_for("PUT", "/api/company") is NO_STORE
+    assert policies.policy_for("GET", "/api/admin/services") is NO_STORE
+    assert policies.policy_for("GET", "/api/health") is NO_STORE
+
+
+def test_apply_uses_the_route_template_and_sets_tags(policies):
+    response = Response("[]")
+    policies.apply(request("GET", "/api/services/{service_id}", "/api/services/3"), response)
+    assert response.headers["Cache-Control"] == CATALOGUE.header
+    assert response.headers["Cache-Tag"] == "services"
+
+
+def test_apply_falls_back_to_the_url_without_a_route(policies):
+    response = Response("{}")
+    policies.apply(request("GET", url_path="/api/company"), response)
+    assert response.headers["Cache-Control"] == COMPANY.header
+
+
+def test_apply_never_caches_errors_and_keeps_a_route_choice(policies):
+    error = Response("{}", status_code=503)
+    policies.apply(request("GET", "/api/company"), error)
+    assert error.headers["Cache-Control"] == "no-store" and "Cache-Tag" not in error.headers
+    chosen = Response("{}", headers={"Cache-Control": "private"})
+    policies.apply(request("GET", "/api/company"), chosen)
+    assert chosen.headers["Cache-Control"] == "private"
+
+
+def test_immediate_purge_waits_for_the_post_off_the_event_loop():
+    purger = CdnPurger("https://cdn.example/purge", token="secret", debounce=0)
+    purger._client = FakeClient()
+    purger.purge(["services", ""])
+    assert purger._client.posts == [("https://cdn.example/purge", {"tags": ["services"]},
+                                     {"Authorization": "Bearer secret"})]
+    assert purger.metrics()["purges"] == 1
+
+
+def test_debounced_purges_coalesce_into_one_post():
+    purger = CdnPurger("https://cdn.example/purge", debounce=0.2)
+    client = purger._client = FakeClient()
+    for tags in (["services"], ["company"], ["services"]):
+        purger.purge(tags)
+    assert client.posted.wait(5)
+    with purger._send_lock:  # the flush has finished
+        pass
+    assert client.posts[0][1] == {"tags": ["company", "services"]}
+    metrics = purger.metrics()
+    assert (metrics["requested"], metrics["purges"], metrics["pending"]) == (3, 1, [])
+
+
+def test_failed_purge_is_counted():
+    purger = CdnPurger("https://cdn.example/purge", debounce=0)
+    purger._client = FakeClient(fail=True)
+    purger.purge(["company"])
+    metrics = purger.metrics()
+    assert (metrics["failures"], metrics["purges"]) == (1, 0)
+    assert "purge endpoint down" in metrics["last_error"]
+
+
+def test_close_flushes_what_is_pending():
+    purger = CdnPurger("https://cdn.example/purge", debounce=60)
+    client = purger._client = FakeClient()
+    purger.purge(["services"])
+    purger.close()
+    assert client.posts[0][1] == {"tags": ["services"]}
@@ -0,0 +1,129 @@
+"""
+CircuitBreaker state transitions: closed -> open -> half_open -> closed / open
+"""
+
+import asyncio
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def fail():
+    raise ConnectionError("unreachable")
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+
+def test_opens_after_consecutive_failures_only(clock):
+    breaker = CircuitBreaker("mongodb", failure_threshold=3)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    # A success in between resets the count
+    assert breaker.call(lambda: "ok") == "ok"
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == CLOSED
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    assert breaker.metrics()["opened"] == 1
+
+
+def test_open_circuit_rejects_without_calling(clock):
+    breaker = CircuitBreaker("resend", failure_threshold=1, recovery_timeout=30)
+    trip(breaker)
+    clock.now += 10
+    calls = []
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.call(calls.append, 1)
+    assert calls == []
+    assert raised.value.retry_after == pytest.approx(20)
+    assert breaker.metrics()["rejected"] == 1
+
+
+def test_half_open_after_recovery_timeout_and_closes_on_success(clock):
+    breaker = CircuitBreaker("mongodb", failure_threshold=1, recovery_timeout=30)
+    trip(breaker)
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+    assert breaker.metrics()["consecutive_failures"] == 0
+
+
+def test_half_open_failure_reopens_and_restarts_the_timeout(clock):
+    breaker = CircuitBreaker("mongodb", failure_threshold=5, recovery_timeout=30)
+    trip(breaker)
+    clock.now += 30
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    clock.now += 29
+    assert breaker.state == OPEN
+    clock.now += 1
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_lets_through_a_limited_number_of_trials(clock):
+    breaker = CircuitBreaker("mongodb", failure_threshold=1, recovery_timeout=1, half_open_max_calls=2)
+    trip(breaker)
+    clock.now += 1
+    assert breaker.allow_request() and breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_non_dependency_errors_free_the_trial_slot(clock):
+    breaker = CircuitBreaker("mongodb", failure_threshold=1, recovery_timeout=1,
+                             failure_exceptions=(ConnectionError,))
+
+    def cancelled():
+        raise TimeoutError("caller's own deadline")
+
+    trip(breaker)
+    clock.now += 1
+    with pytest.raises(TimeoutError):
+        breaker.call(cancelled)
+    # Neither a failure nor a success: still half-open, and the slot is free again
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_call_async_follows_the_same_transitions():
+    breaker = CircuitBreaker("resend", failure_threshold=1, recovery_timeout=60)
+
+    async def send():
+        raise ConnectionError("resend down")
+
+    async def scenario():
+        with pytest.raises(ConnectionError):
+            await breaker.call_async(send)
+        with pytest.raises(CircuitOpenError):
+            await breaker.call_async(send)
+
+    asyncio.run(scenario())
+    metrics = breaker.metrics()
+    assert (metrics["state"], metrics["calls"], metrics["failures"], metrics["rejected"]) == (OPEN, 1, 1, 1)
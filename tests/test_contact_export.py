@@ -0,0 +1,106 @@
+"""
+Contact export to a file: checkpoints, --resume after an interruption, and resumes that must refuse
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from contact_export import export_to_file, prepare_resume
+from memory_store import MemoryDatabase
+
+CONTACTS = 7
+
+
+@pytest.fixture
+def contacts():
+    collection = MemoryDatabase()["contacts"]
+    start = datetime(2025, 1, 1)
+    for number in range(CONTACTS):
+        collection.insert_one({"id": f"c{number}", "name": f"Lead {number}", "email": f"lead{number}@example.com",
+                               "message": "Hello", "status": "new", "email_sent": True,
+                               # Two contacts share each timestamp, so resuming relies on the id tie-break
+                               "created_at": start + timedelta(hours=number // 2)})
+    return collection
+
+
+class Interrupted:
+    """The collection, but the cursor dies after `rows` rows, like a dropped connection"""
+
+    def __init__(self, collection, rows):
+        self.collection = collection
+        self.rows = rows
+
+    def find(self, *args, **kwargs):
+        cursor = self.collection.find(*args, **kwargs)
+        rows = self.rows
+
+        class DyingCursor:
+            def sort(self, *args):
+                cursor.sort(*args)
+                return self
+
+            def batch_size(self, size):
+                return self
+
+            def __iter__(self):
+                for number, row in enumerate(cursor):
+                    if number == rows:
+                        raise ConnectionError("connection reset")
+                    yield row
+
+            def close(self):
+                pass
+
+        return DyingCursor()
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_resume_truncates_the_partial_batch_and_matches_a_full_export(tmp_path, contacts, export_format):
+    full = tmp_path / f"full.{export_format}"
+    assert export_to_file(contacts, str(full), export_format, batch_size=2) == (CONTACTS, False)
+
+    output = tmp_path / f"leads.{export_format}"
+    with pytest.raises(ConnectionError):
+        export_to_file(Interrupted(contacts, 5), str(output), export_format, batch_size=2)
+    state = output.with_name(output.name + ".cursor")
+    assert state.exists()
+    # Row 5 was written after the last checkpoint (row 4); resuming writes it once
+    written, resumed = export_to_file(contacts, str(output), export_format, batch_size=2, resume=True)
+    assert (written, resumed) == (CONTACTS - 4, True)
+    assert output.read_bytes() == full.read_bytes()
+    assert not state.exists()
+
+
+def test_resume_without_a_checkpoint_starts_a_new_export(tmp_path, contacts):
+    output = tmp_path / "leads.ndjson"
+    assert export_to_file(contacts, str(output), resume=True) == (CONTACTS, False)
+
+
+def checkpointed(tmp_path, contacts):
+    output = tmp_path / "leads.ndjson"
+    with pytest.raises(ConnectionError):
+        export_to_file(Interrupted(contacts, 3), str(output), batch_size=2)
+    return output, str(output) + ".cursor"
+
+
+def test_resume_refuses_a_missing_output(tmp_path, contacts):
+    output, state = checkpointed(tmp_path, contacts)
+    output.rename(tmp_path / "moved.ndjson")
+    with pytest.raises(ValueError, match="is missing"):
+        prepare_resume(str(output), state)
+
+
+def test_resume_refuses_an_output_shorter_than_the_checkpoint(tmp_path, contacts):
+    output, state = checkpointed(tmp_path, contacts)
+    output.write_text("")
+    with pytest.raises(ValueError, match="shorter than"):
+        prepare_resume(str(output), state)
+
+
+def test_resume_refuses_to_overwrite_an_output_without_a_checkpoint(tmp_path, contacts):
+    output = tmp_path / "leads.ndjson"
+    output.write_text('{"id": "kept"}\n')
+    with pytest.raises(ValueError, match="no checkpoint"):
+        export_to_file(contacts, str(output), resume=True)
+    assert output.read_text() == '{"id": "kept"}\n'
@@ -0,0 +1,102 @@
+"""
+Contact search: the MongoDB filters build_filter produces, and search_contacts over the in-memory store
+"""
+
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from contact_search import SNIPPET_LENGTH, build_filter, detect_mode, normalize_email, search_contacts
+from memory_store import MemoryDatabase
+
+
+@pytest.fixture
+def contacts():
+    collection = MemoryDatabase()["contacts"]
+    now = datetime(2025, 6, 1)
+    rows = [
+        ("1", "Jane Smith", "Jane.Smith@Acme.com", "We need a Kubernetes migration", "new", "ICT Solutions"),
+        ("2", "Kubernetes Consulting Ltd", "ops@kube.io", "Quote for hosting", "resolved", "ICT Solutions"),
+        ("3", "Amara Mensah", "amara@globex.io", "Migrating our shop, then kubernetes", "new", "AI Solutions"),
+        ("4", "John Smithers", "j.smithers@acme.com", "x" * (SNIPPET_LENGTH + 50), "in-progress", None),
+    ]
+    for number, (contact_id, name, email, message, status, service) in enumerate(rows):
+        collection.insert_one({"id": contact_id, "name": name, "email": email, "email_lower": normalize_email(email),
+                               "message": message, "status": status, "service_interest": service,
+                               "email_sent": True, "created_at": now - timedelta(days=number)})
+    return collection
+
+
+def ids(result):
+    return [hit["id"] for hit in result["results"]]
+
+
+@pytest.mark.parametrize("query, mode", [
+    ("@acme.com", "email"), ("j.smith", "email"), ("jane smith", "text"), ("kubernetes", "text"),
+])
+def test_detect_mode(query, mode):
+    assert detect_mode(query) == mode
+
+
+def test_build_filter_text_query_with_filters():
+    assert build_filter("kubernetes migration", "text", status="new", service_interest="ICT Solutions") == {
+        "$text": {"$search": "kubernetes migration"}, "status": "new", "service_interest": "ICT Solutions"}
+
+
+def test_build_filter_anchors_an_address_prefix():
+    pattern = build_filter("  J.Smith@Acme ", "email")["email_lower"]["$regex"]
+    assert pattern == r"^j\.smith@acme"
+    assert re.search(pattern, "j.smith@acme.com")
+    assert not re.search(pattern, "aj.smith@acme.com") and not re.search(pattern, "jxsmith@acme.com")
+
+
+def test_build_filter_matches_a_domain_anywhere():
+    pattern = build_filter("@Acme.com", "email")["email_lower"]["$regex"]
+    assert pattern == r"@acme\.com"
+    assert re.search(pattern, "jane.smith@acme.com")
+
+
+def test_text_search_ranks_name_hits_above_message_hits(contacts):
+    result = search_contacts(contacts, "kubernetes", include_total=True)
+    assert result["mode"] == "text"
+    assert ids(result) == ["2", "1", "3"]
+    assert result["total"] == 3
+    assert result["results"][0]["score"] > result["results"][1]["score"]
+
+
+def test_text_search_stems_and_filters(contacts):
+    assert ids(search_contacts(contacts, "migration", status="new")) == ["1", "3"]
+    assert ids(search_contacts(contacts, "kubernetes", service_interest="AI Solutions")) == ["3"]
+
+
+def test_email_search_by_prefix_and_domain(contacts):
+    result = search_contacts(contacts, "J.SMITH")
+    assert (result["mode"], ids(result)) == ("email", ["4"])
+    assert ids(search_contacts(contacts, "jane.smith@")) == ["1"]
+    assert ids(search_contacts(contacts, "@acme.com")) == ["1", "4"]
+    assert [hit["score"] for hit in search_contacts(contacts, "@acme.com")["results"]] == [None, None]
+    # Not a prefix of either address
+    assert ids(search_contacts(contacts, "smith@acme", mode="email")) == []
+
+
+def test_auto_mode_retries_a_bare_word_as_an_address_prefix(contacts):
+    result = search_contacts(contacts, "amara@")
+    assert (result["mode"], ids(result)) == ("email", ["3"])
+    result = search_contacts(contacts, "ops")
+    assert (result["mode"], ids(result)) == ("email", ["2"])
+
+
+def test_pagination_and_snippets(contacts):
+    first = search_contacts(contacts, "@acme.com", page_size=1, include_total=True)
+    second = search_contacts(contacts, "@acme.com", page=2, page_size=1)
+    assert (ids(first), first["has_more"], first["total"]) == (["1"], True, 2)
+    assert (ids(second), second["has_more"]) == (["4"], False)
+    assert second["results"][0]["message"].endswith("…")
+    assert len(second["results"][0]["message"]) == SNIPPET_LENGTH + 1
+
+
+@pytest.mark.parametrize("query, mode", [("   ", "auto"), ("smith", "fuzzy")])
+def test_invalid_queries_are_rejected(contacts, query, mode):
+    with pytest.raises(ValueError):
+        search_contacts(contacts, query, mode)
@@ -0,0 +1,175 @@
+"""
+ContactSpool: append, rotate-on-replay, idempotent replay, torn lines and orphan adoption
+
+Replays go into an in-memory collection; FakeBulkCollection applies each
+UpdateOne with update_one, so `$setOnInsert` upserts behave as in MongoDB.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from contact_spool import ContactSpool
+from memory_store import MemoryDatabase
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+
+class FakeBulkCollection:
+    def __init__(self):
+        self.collection = MemoryDatabase()["contacts"]
+
+    def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            self.collection.update_one(request._filter, request._doc, upsert=request._upsert)
+
+    def find_one(self, *args, **kwargs):
+        return self.collection.find_one(*args, **kwargs)
+
+    def count_documents(self, filter):
+        return self.collection.count_documents(filter)
+
+
+def contact(contact_id, **fields):
+    return {"id": contact_id, "name": f"Lead {contact_id}", "email": f"{contact_id}@example.com",
+            "email_sent": False, **fields}
+
+
+@pytest.fixture
+def spool(tmp_path):
+    spool = ContactSpool(tmp_path / "spool.ndjson", fsync_batch=1)
+    yield spool
+    spool.close()
+
+
+def write_orphan(tmp_path):
+    """Spool one contact from a child process that then exits; returns its pid"""
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1]); from contact_spool import ContactSpool; "
+        "spool = ContactSpool(sys.argv[2]); spool.append_contact({'id': 'orphan', 'email_sent': False}); "
+        "import os; print(os.getpid())"
+    )
+    result = subprocess.run([sys.executable, "-c", script, BACKEND, str(tmp_path / "spool.ndjson")],
+                            capture_output=True, text=True, check=True)
+    return int(result.stdout)
+
+
+def test_append_writes_one_record_per_line_and_counts_it(spool):
+    spool.append_contact(contact("a"))
+    spool.append_update("a", {"email_sent": True})
+    assert spool.pending_count() == 2
+    assert len(spool.path.read_text().splitlines()) == 2
+
+
+def test_replay_rotates_the_file_and_applies_every_record(spool):
+    spool.append_contact(contact("a"))
+    spool.append_update("a", {"email_sent": True})
+    collection = FakeBulkCollection()
+    assert spool.replay(collection) == 2
+    assert collection.find_one({"id": "a"})["email_sent"] is True
+    assert not spool.path.exists() and not spool.replay_path.exists()
+    assert spool.pending_count() == 0
+    # Appends after the rotation start a fresh file
+    spool.append_contact(contact("b"))
+    assert spool.pending_count() == 1 and spool.path.exists()
+
+
+def test_replay_is_idempotent(spool):
+    collection = FakeBulkCollection()
+    collection.collection.insert_one(contact("a", email_sent=True))
+    spool.append_contact(contact("a"))
+    spool.append_contact(contact("b"))
+    spool.replay(collection)
+    # A second spooling of the same contact (e.g. a retry) doesn't duplicate or overwrite it
+    spool.append_contact(contact("b", name="changed"))
+    spool.replay(collection)
+    assert collection.count_documents({}) == 2
+    assert collection.find_one({"id": "a"})["email_sent"] is True
+    assert collection.find_one({"id": "b"})["name"] == "Lead b"
+
+
+def test_replay_skips_a_torn_final_line(spool, capsys):
+    spool.append_contact(contact("a"))
+    spool.close()
+    with open(spool.path, "a", encoding="utf-8") as spool_file:
+        spool_file.write('{"op": "insert", "doc": {"id": "b", "na')
+    collection = FakeBulkCollection()
+    assert spool.replay(collection) == 1
+    assert collection.find_one({"id": "a"}) is not None
+    assert "Skipping unreadable spool line" in capsys.readouterr().out
+    assert not spool.replay_path.exists()
+
+
+def test_replay_keeps_the_file_when_a_batch_fails(spool):
+    class Down(FakeBulkCollection):
+        def bulk_write(self, requests, ordered=True):
+            raise ConnectionError("primary unreachable")
+
+    spool.append_contact(contact("a"))
+    with pytest.raises(ConnectionError):
+        spool.replay(Down())
+    assert spool.replay_path.exists() and spool.pending_count() == 1
+    assert spool.replay(FakeBulkCollection()) == 1
+    assert spool.pending_count() == 0
+
+
+def test_orphan_of_an_exited_worker_is_adopted_once(tmp_path, spool):
+    write_orphan(tmp_path)
+    assert spool.has_orphans()
+    collection = FakeBulkCollection()
+    assert spool.replay(collection) == 1
+    assert collection.find_one({"id": "orphan"}) is not None
+    assert not spool.has_orphans()
+    assert [path for path in tmp_path.iterdir() if not path.name.endswith(".lock")] == []
+
+
+def test_file_claimed_by_a_live_worker_is_left_to_it(tmp_path, spool):
+    write_orphan(tmp_path)
+    # Another live worker (posing as our parent process) claims the orphan first
+    other = ContactSpool(tmp_path / "spool.ndjson")
+    other.pid = os.getppid()
+    other.lock_path = other._lock_path(other.pid)
+    try:
+        [claimed] = other._claim_orphans()
+        assert claimed.name.endswith(f".claimed-{other.pid}")
+        assert not spool.has_orphans()
+        assert spool.replay(FakeBulkCollection()) == 0
+        assert other.replay(FakeBulkCollection()) == 1
+    finally:
+        other.close()
+
+
+def test_claim_lost_to_another_worker_is_skipped(tmp_path, spool, monkeypatch):
+    write_orphan(tmp_path)
+    real_replace = os.replace
+
+    def claimed_first(source, target):
+        os.remove(source)  # another worker renamed it a moment earlier
+        return real_replace(source, target)
+
+    monkeypatch.setattr(os, "replace", claimed_first)
+    assert spool.replay(FakeBulkCollection()) == 0
+
+
+def test_orphan_is_found_when_its_pid_was_reused(tmp_path, spool):
+    # The file's owner pid belongs to a live process (our parent), but the
+    # owner's lock is free: the worker that wrote it has exited
+    alive_pid = os.getppid()
+    orphan = tmp_path / f"spool.ndjson.{alive_pid}"
+    orphan.write_text('{"op": "insert", "doc": {"id": "reused"}}\n')
+    (tmp_path / f"spool.ndjson.{alive_pid}.lock").touch()
+    collection = FakeBulkCollection()
+    assert spool.replay(collection) == 1
+    assert collection.find_one({"id": "reused"}) is not None
+
+
+def test_stale_claim_of_an_exited_claimer_is_reclaimed(tmp_path, spool):
+    claimer_pid = write_orphan(tmp_path)
+    stale = tmp_path / f"spool.ndjson.1.claimed-{claimer_pid}"
+    stale.write_text('{"op": "insert", "doc": {"id": "stale"}}\n')
+    collection = FakeBulkCollection()
+    assert spool.replay(collection) == 2
+    assert collection.find_one({"id": "stale"}) is not None
+    assert not stale.exists()
@@ -0,0 +1,108 @@
+"""
+Request deadlines: the budget a route declares, what remains of it, and per-operation timeouts
+"""
+
+import contextvars
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import deadlines
+from deadlines import (DeadlineExceeded, RequestDeadline, limited_by_budget, operation_timeout,
+                       remaining, request_budget)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 500.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(deadlines.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def in_request():
+    """Run a function with a request deadline set, in its own context"""
+    def run(budget_ms, func, route="/api/test"):
+        def scoped():
+            deadlines._current.set(RequestDeadline(route, budget_ms))
+            return func()
+        return contextvars.copy_context().run(scoped)
+    return run
+
+
+def test_outside_a_request_there_is_no_budget():
+    assert remaining() is None
+    assert remaining(2.5) == 2.5
+    assert operation_timeout(1.5) == 1.5
+    assert not limited_by_budget(1.5)
+
+
+def test_remaining_counts_down_from_the_budget(clock, in_request):
+    def spend():
+        first = remaining()
+        clock.now += 0.3
+        return first, remaining()
+
+    assert in_request(800, spend) == (pytest.approx(0.8), pytest.approx(0.5))
+
+
+def test_operation_timeout_is_the_smaller_of_cap_and_remaining(clock, in_request):
+    def timeouts():
+        capped = operation_timeout(0.2)
+        clock.now += 0.7
+        return capped, operation_timeout(1.5), limited_by_budget(1.5), limited_by_budget(0.05)
+
+    capped, bounded, limited, not_limited = in_request(800, timeouts)
+    assert capped == pytest.approx(0.2)
+    assert bounded == pytest.approx(0.1)
+    assert limited and not not_limited
+
+
+def test_spent_budget_raises_and_is_counted(clock, in_request):
+    def overrun():
+        clock.now += 1
+        operation_timeout(1.5)
+
+    before = deadlines.metrics().get("/api/overrun", {}).get("deadline_exceeded", 0)
+    with pytest.raises(DeadlineExceeded, match="/api/overrun exceeded its 500ms budget"):
+        in_request(500, overrun, route="/api/overrun")
+    assert deadlines.metrics()["/api/overrun"]["deadline_exceeded"] == before + 1
+
+
+def test_request_budget_dependency_reaches_async_and_threadpool_routes(monkeypatch):
+    monkeypatch.setitem(deadlines.BUDGET_OVERRIDES_MS, "/api/overridden", 5000)
+    app = FastAPI()
+
+    @app.get("/api/async", dependencies=[request_budget(800)])
+    async def async_route():
+        return {"remaining": remaining()}
+
+    @app.get("/api/sync", dependencies=[request_budget(800)])
+    def sync_route():
+        # A plain def runs in the threadpool; the deadline is copied with the context
+        return {"remaining": remaining()}
+
+    @app.get("/api/overridden", dependencies=[request_budget(800)])
+    def overridden_route():
+        return {"budget_ms": deadlines.current_deadline().budget_ms}
+
+    @app.get("/api/none")
+    def unbudgeted_route():
+        return {"remaining": remaining()}
+
+    client = TestClient(app)
+    for path in ("/api/async", "/api/sync"):
+        assert 0 < client.get(path).json()["remaining"] <= 0.8
+    assert client.get("/api/overridden").json() == {"budget_ms": 5000}
+    assert client.get("/api/none").json() == {"remaining": None}
+    assert deadlines.metrics()["/api/sync"]["budget_ms"] == 800
+    assert deadlines.metrics()["/api/overridden"]["requests"] >= 1
@@ -0,0 +1,41 @@
+"""
+No route may block the event loop for longer than check_loop_blocking.DEFAULT_MAX_MS
+
+Each in-memory store operation sleeps like a MongoDB round trip (see
+check_loop_blocking.run), so a driver call made on the loop fails the test.
+"""
+
+import asyncio
+
+import pytest
+
+import check_loop_blocking
+
+
+def describe(result):
+    worst = max(result["events"], key=lambda event: event["lag_ms"])
+    return (f"{result['route']} blocked the loop for {worst['lag_ms']:.0f} ms in "
+            f"{worst['coroutine'] or 'a callback'}:\n" + "\n".join(worst["stack"][-12:]))
+
+
+@pytest.mark.parametrize("route", check_loop_blocking.ROUTES, ids=lambda route: f"{route[0]} {route[1]}")
+def test_route_does_not_block_the_loop(route):
+    [result] = asyncio.run(check_loop_blocking.run([route]))
+    assert all(status < 500 for status in result["status"]), result
+    assert not result["events"], describe(result)
+
+
+def test_check_catches_a_driver_call_on_the_loop():
+    import server
+
+    async def blocking_lookup():
+        return server.db.services.find_one({"id": "1"}) is not None
+
+    server.app.add_api_route("/api/loop-check-blocking", blocking_lookup)
+    route = server.app.router.routes[-1]
+    try:
+        [result] = asyncio.run(check_loop_blocking.run([("GET", "/api/loop-check-blocking", None, False)]))
+    finally:
+        server.app.router.routes.remove(route)
+    assert result["events"]
+    assert result["max_lag_ms"] >= check_loop_blocking.DEFAULT_MAX_MS
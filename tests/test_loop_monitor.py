@@ -0,0 +1,66 @@
+"""
+Event-loop monitor: blocking stalls are recorded, idle stalls in select() are not, and restarts
+"""
+
+import asyncio
+import threading
+import time
+
+import loop_monitor
+from loop_monitor import LoopLagMonitor, waiting
+
+IDLE_STACK = ["run_forever (base_events.py:608)", "_run_once (base_events.py:1884)", "select (selectors.py:468)"]
+
+
+def watchdogs():
+    return [thread for thread in threading.enumerate() if thread.name == "loop-watchdog"]
+
+
+async def block_loop(monitor, seconds):
+    monitor.start()
+    await asyncio.sleep(monitor.interval * 2)
+    time.sleep(seconds)
+    await asyncio.sleep(monitor.interval * 3)
+    monitor.stop()
+
+
+def test_waiting_is_the_loop_idling_in_select():
+    assert waiting(IDLE_STACK)
+    assert not waiting(IDLE_STACK[:2] + ["find_one (collection.py:1506)"])
+    assert not waiting(["select (selectors.py:468)"])
+
+
+def test_a_blocking_call_on_the_loop_is_recorded():
+    monitor = LoopLagMonitor(interval=0.005, threshold=0.02)
+    asyncio.run(block_loop(monitor, 0.1))
+    assert monitor.blocked_total == 1
+    [event] = monitor.blocking_events()
+    assert event["coroutine"].startswith("block_loop (test_loop_monitor.py")
+    assert event["lag_ms"] >= 90 and monitor.histogram.max_ms >= 90
+
+
+def test_a_stall_in_select_is_not_counted(monkeypatch):
+    # As the watchdog sees it when another thread holds the GIL and the loop can't wake up
+    monkeypatch.setattr(loop_monitor, "_format_stack", lambda frame: (IDLE_STACK, None))
+    monitor = LoopLagMonitor(interval=0.005, threshold=0.02)
+    asyncio.run(block_loop(monitor, 0.1))
+    assert monitor.blocked_total == 0 and monitor.blocking_events() == []
+    assert monitor.histogram.count and monitor.histogram.max_ms < 90
+
+
+def test_restart_after_stop_keeps_one_watchdog():
+    monitor = LoopLagMonitor(interval=0.005, threshold=0.4)
+
+    async def restart():
+        monitor.start()
+        first = monitor._watchdog
+        monitor.stop()
+        monitor.start()
+        await asyncio.sleep(0)
+        assert not first.is_alive() and monitor._watchdog.is_alive()
+        assert len(watchdogs()) == 1
+        monitor.stop()
+
+    asyncio.run(restart())
+    monitor._watchdog.join(1)
+    assert watchdogs() == []
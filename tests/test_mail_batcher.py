@@ -0,0 +1,76 @@
+"""
+Pending notifications: batches mark email_sent, the cursor stays off the event loop, should_stop ends a run
+"""
+
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+from mail_batcher import send_pending
+from mail_transport import FakeTransport
+from memory_store import MemoryDatabase
+
+PENDING = 5
+
+
+@pytest.fixture
+def contacts():
+    collection = MemoryDatabase()["contacts"]
+    for number in range(PENDING):
+        collection.insert_one({"id": f"c{number}", "email": f"lead{number}@example.com", "status": "new",
+                               "email_sent": False, "created_at": datetime.utcnow()})
+    collection.insert_one({"id": "done", "email": "done@example.com", "status": "new",
+                           "email_sent": True, "created_at": datetime.utcnow()})
+    return collection
+
+
+class Watched:
+    """The collection, recording which thread each cursor call runs on"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.threads = []
+
+    def find(self, *args, **kwargs):
+        self.threads.append(threading.current_thread())
+        cursor = self.collection.find(*args, **kwargs)
+        close = cursor.close
+
+        def watched_close():
+            self.threads.append(threading.current_thread())
+            close()
+
+        cursor.close = watched_close
+        return cursor
+
+    def update_many(self, *args, **kwargs):
+        return self.collection.update_many(*args, **kwargs)
+
+
+def build_email(contact):
+    return {"to": [contact["email"]], "subject": contact["id"]}
+
+
+def test_sends_in_batches_and_marks_sent(contacts):
+    transport = FakeTransport()
+    stats = asyncio.run(send_pending(contacts, transport, build_email, max_batch_size=2))
+    assert (stats["contacts"], stats["sent"], stats["batches"], stats["stopped_early"]) == (PENDING, PENDING, 3, False)
+    assert transport.batches == 3
+    assert contacts.count_documents({"email_sent": False}) == 0
+
+
+def test_cursor_is_opened_and_closed_off_the_loop(contacts):
+    watched = Watched(contacts)
+    asyncio.run(send_pending(watched, FakeTransport(), build_email, max_batch_size=2))
+    assert len(watched.threads) == 2
+    assert threading.main_thread() not in watched.threads
+
+
+def test_should_stop_ends_the_run_between_batches(contacts):
+    transport = FakeTransport()
+    stats = asyncio.run(send_pending(contacts, transport, build_email, max_batch_size=2,
+                                     should_stop=lambda: transport.batches == 1))
+    assert (stats["contacts"], stats["sent"], stats["stopped_early"]) == (2, 2, True)
+    assert contacts.count_documents({"email_sent": False}) == PENDING - 2
@@ -0,0 +1,44 @@
+"""
+Mail transports: the abstract interface, batch result mapping and the per-loop HTTP client
+"""
+
+import asyncio
+
+import pytest
+
+from mail_transport import FakeTransport, MailTransport, ResendHttpTransport, map_batch_results
+
+
+def test_transports_must_implement_send_and_send_batch():
+    class SendOnly(MailTransport):
+        async def send(self, params, timeout=None):
+            return {"id": "1"}
+
+    with pytest.raises(TypeError):
+        MailTransport()
+    with pytest.raises(TypeError):
+        SendOnly()
+    assert FakeTransport().metrics()["transport"] == "fake"
+
+
+def test_batch_results_follow_input_order():
+    response = {"data": [{"id": "a"}, {"id": "c"}], "errors": [{"index": 1, "message": "invalid to"}]}
+    assert map_batch_results(4, response) == [
+        {"id": "a"}, {"error": "invalid to"}, {"id": "c"}, {"error": "missing from batch response"}]
+
+
+def test_client_of_a_previous_loop_is_closed():
+    pytest.importorskip("httpx")
+    transport = ResendHttpTransport("re_test", http2=False)
+
+    async def client():
+        current = transport._ensure_client()
+        await asyncio.sleep(0)  # let the retired client's close run
+        return current
+
+    first = asyncio.run(client())
+    second = asyncio.run(client())
+    assert first is not second
+    assert first.is_closed and not second.is_closed
+    asyncio.run(transport.aclose())
+    assert second.is_closed
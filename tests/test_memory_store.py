@@ -0,0 +1,135 @@
+"""
+In-memory document store: query operators, updates and cursors match MongoDB's semantics
+"""
+
+from datetime import datetime
+
+import pytest
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from memory_store import MemoryDatabase, matches
+
+
+@pytest.fixture
+def services():
+    collection = MemoryDatabase()["services"]
+    collection.insert_many([
+        {"id": "1", "title": "Web Development", "price": 100, "tags": ["react", "python"],
+         "detailed_info": {"technologies": ["React", "FastAPI"]}, "created_at": datetime(2024, 1, 1)},
+        {"id": "2", "title": "Mobile Apps", "price": 250, "tags": ["swift"], "created_at": datetime(2024, 3, 1)},
+        {"id": "3", "title": "Cloud Migration", "price": None, "tags": [], "created_at": datetime(2024, 2, 1)},
+    ])
+    return collection
+
+
+def ids(cursor):
+    return [document["id"] for document in cursor]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ({"title": "Mobile Apps"}, ["2"]),
+    ({"price": {"$eq": 100}}, ["1"]),
+    ({"price": {"$ne": 100}}, ["2", "3"]),
+    ({"price": {"$gt": 100}}, ["2"]),
+    ({"price": {"$gte": 100}}, ["1", "2"]),
+    ({"price": {"$lt": 250}}, ["1"]),
+    ({"price": {"$lte": 250, "$gt": 100}}, ["2"]),
+    ({"id": {"$in": ["1", "3", "9"]}}, ["1", "3"]),
+    ({"id": {"$nin": ["1"]}}, ["2", "3"]),
+    ({"detailed_info": {"$exists": True}}, ["1"]),
+    ({"detailed_info": {"$exists": False}}, ["2", "3"]),
+    ({"detailed_info.technologies": "FastAPI"}, ["1"]),
+    ({"tags": "swift"}, ["2"]),
+    ({"price": None}, ["3"]),
+    ({"title": {"$regex": "^mo", "$options": "i"}}, ["2"]),
+    ({"title": {"$regex": "^mo"}}, []),
+    ({"$or": [{"id": "1"}, {"price": 250}]}, ["1", "2"]),
+    ({"$and": [{"price": {"$gte": 100}}, {"tags": "react"}]}, ["1"]),
+])
+def test_query_operators(services, query, expected):
+    assert sorted(ids(services.find(query))) == expected
+    assert services.count_documents(query) == len(expected)
+
+
+@pytest.mark.parametrize("query", [
+    {"$text": {"$search": "cloud"}},
+    {"$nor": [{"id": "1"}]},
+    {"tags": {"$size": 0}},
+    {"$or": [{"tags": {"$elemMatch": {"$eq": "react"}}}]},
+])
+def test_unsupported_operators_raise_instead_of_matching_nothing(services, query):
+    with pytest.raises(ValueError, match="Unsupported query operator"):
+        services.find(query)
+    with pytest.raises(ValueError, match="Unsupported query operator"):
+        services.count_documents(query)
+
+
+def test_unsupported_operator_raises_on_an_empty_collection():
+    with pytest.raises(ValueError):
+        MemoryDatabase()["empty"].find_one({"$text": {"$search": "anything"}})
+
+
+def test_matches_rejects_text_search():
+    with pytest.raises(ValueError):
+        matches({"title": "Cloud"}, {"$text": {"$search": "cloud"}})
+
+
+def test_sort_skip_limit_and_projection(services):
+    cursor = services.find({}, {"_id": 0, "id": 1, "price": 1}).sort("price", -1).skip(1).limit(1)
+    assert list(cursor) == [{"id": "1", "price": 100}]
+    # None sorts first ascending, as in MongoDB
+    assert ids(services.find().sort("price", 1)) == ["3", "1", "2"]
+    assert ids(services.find().sort([("created_at", -1)])) == ["2", "3", "1"]
+
+
+def test_results_are_copies(services):
+    services.find_one({"id": "1"})["tags"].append("mutated")
+    assert services.find_one({"id": "1"})["tags"] == ["react", "python"]
+
+
+def test_update_operators(services):
+    result = services.update_one({"id": "1"}, {"$set": {"detailed_info.level": "senior"},
+                                               "$inc": {"price": 5, "views": 1},
+                                               "$unset": {"tags": ""}})
+    assert (result.matched_count, result.modified_count) == (1, 1)
+    document = services.find_one({"id": "1"}, {"_id": 0})
+    assert document["price"] == 105 and document["views"] == 1
+    assert document["detailed_info"]["level"] == "senior" and "tags" not in document
+    assert services.update_many({"price": {"$gte": 105}}, {"$set": {"featured": True}}).modified_count == 2
+
+
+def test_upsert_seeds_from_the_filter_and_applies_set_on_insert(services):
+    result = services.update_one({"id": "4"}, {"$setOnInsert": {"title": "New"}, "$set": {"price": 1}}, upsert=True)
+    assert result.upserted_id is not None
+    assert services.find_one({"id": "4"}, {"_id": 0}) == {"id": "4", "title": "New", "price": 1}
+    # $setOnInsert is skipped when the document exists
+    services.update_one({"id": "4"}, {"$setOnInsert": {"title": "Other"}}, upsert=True)
+    assert services.find_one({"id": "4"})["title"] == "New"
+
+
+def test_update_without_operators_is_rejected(services):
+    with pytest.raises(ValueError):
+        services.update_one({"id": "1"}, {"title": "replaced"})
+    with pytest.raises(ValueError, match="Unsupported update operator"):
+        services.update_one({"id": "1"}, {"$push": {"tags": "go"}})
+
+
+def test_find_one_and_update_returns_before_or_after(services):
+    before = services.find_one_and_update({"id": "2"}, {"$inc": {"price": 50}})
+    after = services.find_one_and_update({"id": "2"}, {"$inc": {"price": 50}},
+                                         return_document=ReturnDocument.AFTER)
+    assert (before["price"], after["price"]) == (250, 350)
+    assert services.find_one_and_update({"id": "9"}, {"$set": {"price": 1}}) is None
+
+
+def test_duplicate_id_is_rejected(services):
+    with pytest.raises(DuplicateKeyError):
+        services.insert_one({"id": "1", "title": "Again"})
+
+
+def test_replace_and_delete(services):
+    services.replace_one({"id": "2"}, {"id": "2", "title": "Replaced"})
+    assert services.find_one({"id": "2"}, {"_id": 0}) == {"id": "2", "title": "Replaced"}
+    assert services.delete_many({"price": {"$exists": True}}).deleted_count == 2
+    assert ids(services.find()) == ["2"]
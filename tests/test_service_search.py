@@ -0,0 +1,79 @@
+"""
+Service search: BM25 ranking, field weights, prefix expansion and incremental updates
+"""
+
+import pytest
+
+from service_search import PREFIX_WEIGHT, ServiceSearchIndex, stem, tokenize
+
+SERVICES = [
+    {"id": "1", "title": "Blockchain Development", "description": "Smart contracts and dApps",
+     "features": ["Token design"], "detailed_info": {"technologies": ["Solidity"]}},
+    {"id": "2", "title": "Cloud Migration", "description": "Move workloads to the cloud",
+     "features": ["Lift and shift", "Kubernetes"], "detailed_info": {"technologies": ["AWS", "Terraform"],
+                                                                      "overview": "We migrated banks"}},
+    {"id": "3", "title": "Web Development", "description": "React frontends with a blockchain wallet login",
+     "features": ["SEO"], "detailed_info": {"technologies": ["React", "FastAPI"]}},
+]
+
+
+@pytest.fixture
+def index():
+    index = ServiceSearchIndex()
+    index.update(SERVICES, generation=1)
+    return index
+
+
+def ranked_ids(index, query):
+    return [service["id"] for service, _, _ in index.search(query)]
+
+
+def test_tokenize_drops_stopwords_and_stems():
+    assert tokenize("The migration of our workloads") == ["migrat", "workload"]
+    assert stem("business") == "business"
+    assert stem("apps") == "apps"  # too short to strip
+
+
+def test_title_hit_outranks_a_description_hit(index):
+    assert ranked_ids(index, "blockchain") == ["1", "3"]
+
+
+def test_scores_follow_bm25_idf(index):
+    # "development" is in two titles, "kubernetes" in one feature: the rarer term scores higher per hit
+    [(_, kubernetes, _)] = index.search("kubernetes")
+    development = {service["id"]: score for service, score, _ in index.search("development")}
+    assert set(development) == {"1", "3"}
+    assert kubernetes > 0 and all(score > 0 for score in development.values())
+    assert index._idf("kubernet") > index._idf("development")
+
+
+def test_stemming_matches_other_word_forms(index):
+    assert ranked_ids(index, "migrating") == ["2"]
+    [(_, _, matched)] = index.search("migrated")
+    assert matched == ["migrat"]
+
+
+def test_prefix_expands_to_vocabulary_terms(index):
+    results = index.search("blockch")
+    assert [service["id"] for service, _, _ in results] == ["1", "3"]
+    assert results[0][2] == ["blockchain"]
+    exact = {service["id"]: score for service, score, _ in index.search("blockchain")}
+    assert results[0][1] == pytest.approx(exact["1"] * PREFIX_WEIGHT)
+
+
+def test_prefix_running_past_the_stem_still_matches(index):
+    assert ranked_ids(index, "migratio") == ["2"]
+
+
+def test_single_letter_prefix_does_not_expand(index):
+    assert index.search("b") == []
+
+
+def test_update_reindexes_only_changed_services_and_drops_removed_ones(index):
+    changed = [dict(SERVICES[0], title="Blockchain Audits"), SERVICES[1]]
+    assert index.update(changed, generation=2) == (1, 1)
+    assert ranked_ids(index, "audits") == ["1"]
+    assert ranked_ids(index, "react") == []
+    assert index.update(changed, generation=3) == (0, 0)
+    metrics = index.metrics()
+    assert (metrics["documents"], metrics["generation"]) == (2, 3)